@@ -1,112 +1,209 @@
+from django.contrib.auth import get_user_model
+from django.contrib.postgres.lookups import PostgresSimpleLookup
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    TrigramSimilarity,
+)
 from django.db import models
-from django.db.models import Q
+from django.db.models import (
+    CharField,
+    F,
+    FloatField,
+    Func,
+    OuterRef,
+    Q,
+    Subquery,
+    Value,
+)
+from django.db.models.functions import Cast, Greatest
+
+
+# postgres text search config, names should not be stemmed
+SEARCH_CONFIG = "simple"
+
+
+@CharField.register_lookup
+class TrigramWordSimilar(PostgresSimpleLookup):
+    """
+    True if the value contains a word-like extent similar to the lookup
+    string, served by gin_trgm_ops indexes
+    """
+
+    lookup_name = "trigram_word_similar"
+    operator = "%%>"
+
+
+class TrigramWordSimilarity(Func):
+    function = "WORD_SIMILARITY"
+    output_field = FloatField()
+
+    def __init__(self, expression, string, **extra):
+        super().__init__(Value(string), expression, **extra)
+
+
+def build_search_query(query):
+    """
+    Converts a raw user query into a prefix matching tsquery where every
+    token must match, e.g. "jo smi" -> 'jo':* & 'smi':*
+    """
+    if not query:
+        return None
+
+    search_query = None
+    for token in query.split():
+        # strip characters that carry meaning in tsquery syntax
+        token = "".join(char for char in token if char not in "'\\:&|!()<>*")
+        if not token:
+            continue
+        token_query = SearchQuery(
+            f"'{token}':*", config=SEARCH_CONFIG, search_type="raw"
+        )
+        search_query = (
+            token_query if search_query is None else search_query & token_query
+        )
+    return search_query
+
+
+def build_search_vector(fields):
+    vector = None
+    for field, weight in fields:
+        if not isinstance(field, str):
+            field = Cast(field, CharField())
+        field_vector = SearchVector(field, weight=weight, config=SEARCH_CONFIG)
+        vector = field_vector if vector is None else vector + field_vector
+    return vector
 
 
 class AccountManager(models.Manager):
+    # available to the search_vector data migration
+    use_in_migrations = True
+
+    # (field, weight) pairs indexed into search_vector
+    search_fields = (
+        ("user__first_name", "A"),
+        ("user__last_name", "A"),
+        ("user__email", "B"),
+        ("address", "C"),
+        ("city", "C"),
+        ("phone_number", "C"),
+        ("state", "C"),
+        ("zipcode", "C"),
+    )
+    # names are compared whole, longer fields by their closest extent
+    fuzzy_fields = (
+        ("user__first_name", "trigram_similar"),
+        ("user__last_name", "trigram_similar"),
+        ("user__email", "trigram_word_similar"),
+        ("address", "trigram_word_similar"),
+        ("phone_number", "trigram_word_similar"),
+    )
+
     def business(self, business_id):
         qs = self.get_queryset()
         if business_id is not None:
             qs = qs.filter(business=business_id)
         return qs
 
+    def update_search_vector(self, *args, **kwargs):
+        """
+        Recomputes search_vector for the filtered accounts in a single
+        UPDATE, all accounts are updated if no filters are given
+        """
+        vector = (
+            self.get_queryset()
+            .filter(pk=OuterRef("pk"))
+            .annotate(vector=build_search_vector(self.search_fields))
+            .values("vector")[:1]
+        )
+        return (
+            self.get_queryset()
+            .filter(*args, **kwargs)
+            .update(search_vector=Subquery(vector))
+        )
 
-class StudentManager(AccountManager):
     def search(self, query=None, qs_initial=None):
-        if qs_initial is None or len(qs_initial) == 0:
+        if qs_initial is None:
             qs = self.get_queryset()
         else:
             qs = qs_initial
 
         if query is not None:
-            or_lookup = (
-                Q(user__first_name__icontains=query)
-                | Q(user__last_name__icontains=query)
-                | Q(user__email__iexact=query)
-                | Q(user_uuid__iexact=query)
-                | Q(address__icontains=query)
-                | Q(city__icontains=query)
-                | Q(phone_number__icontains=query)
-                | Q(state__icontains=query)
-                | Q(zipcode__icontains=query)
-                | Q(school__name__icontains=query)
-                | Q(primary_parent__user__first_name__icontains=query)
-                | Q(primary_parent__user__last_name__icontains=query)
-                | Q(secondary_parent__user__first_name__icontains=query)
-                | Q(secondary_parent__user__last_name__icontains=query)
+            search_query = build_search_query(query)
+            if search_query is None:
+                return qs.none()
+            qs = (
+                qs.filter(search_vector=search_query)
+                .annotate(rank=SearchRank(F("search_vector"), search_query))
+                .order_by("-rank", "user_id")
             )
-            try:
-                query = int(query)
-                or_lookup |= Q(grade=query)
-            except ValueError:
-                pass
-            qs = qs.filter(
-                or_lookup
-            ).distinct()  # distinct() is often necessary with Q lookups
         return qs
 
-
-class ParentManager(AccountManager):
-    def search(self, query=None, qs_initial=None):
-        if qs_initial is None or len(qs_initial) == 0:
+    def fuzzy_search(self, query=None, qs_initial=None):
+        """
+        Typo tolerant search using pg_trgm similarity, every token has to
+        resemble at least one field and results are ranked by similarity
+        """
+        if qs_initial is None:
             qs = self.get_queryset()
         else:
             qs = qs_initial
 
         if query is not None:
-            or_lookup = (
-                Q(user__first_name__icontains=query)
-                | Q(user__last_name__icontains=query)
-                | Q(user__email__icontains=query)
-                | Q(address__icontains=query)
-                | Q(city__icontains=query)
-                | Q(phone_number__icontains=query)
-                | Q(state__icontains=query)
-                | Q(zipcode__icontains=query)
-            )
-            qs = qs.filter(or_lookup).distinct()
+            tokens = query.split()
+            if not tokens:
+                return qs.none()
+
+            similarity = Value(0.0, output_field=FloatField())
+            for token in tokens:
+                # match users and profiles separately so each side is an
+                # index scan, then rank the union of both
+                user_lookup = Q()
+                profile_lookup = Q()
+                for field, lookup in self.fuzzy_fields:
+                    if field.startswith("user__"):
+                        user_field = field[len("user__") :]
+                        user_lookup |= Q(**{f"{user_field}__{lookup}": token})
+                    else:
+                        profile_lookup |= Q(**{f"{field}__{lookup}": token})
+                user_matches = get_user_model().objects.filter(user_lookup)
+                profile_matches = self.get_queryset().filter(profile_lookup)
+                qs = qs.filter(
+                    pk__in=user_matches.values("id").union(profile_matches.values("pk"))
+                )
+
+                similarity += Greatest(
+                    *[
+                        TrigramSimilarity(field, token)
+                        if lookup == "trigram_similar"
+                        else TrigramWordSimilarity(field, token)
+                        for field, lookup in self.fuzzy_fields
+                    ]
+                )
+            qs = qs.annotate(similarity=similarity).order_by("-similarity", "user_id")
         return qs
 
 
-class InstructorManager(AccountManager):
-    def search(self, query=None, qs_initial=None):
-        if qs_initial is None or len(qs_initial) == 0:
-            qs = self.get_queryset()
-        else:
-            qs = qs_initial
+class StudentManager(AccountManager):
+    search_fields = AccountManager.search_fields + (
+        ("user_uuid", "B"),
+        ("school__name", "C"),
+        (F("grade"), "C"),
+        ("primary_parent__user__first_name", "D"),
+        ("primary_parent__user__last_name", "D"),
+        ("secondary_parent__user__first_name", "D"),
+        ("secondary_parent__user__last_name", "D"),
+    )
 
-        if query is not None:
-            or_lookup = (
-                Q(user__first_name__icontains=query)
-                | Q(user__last_name__icontains=query)
-                | Q(user__email__icontains=query)
-                | Q(address__icontains=query)
-                | Q(city__icontains=query)
-                | Q(phone_number__icontains=query)
-                | Q(state__icontains=query)
-                | Q(zipcode__icontains=query)
-            )
-            qs = qs.filter(or_lookup).distinct()
-        return qs
 
+class ParentManager(AccountManager):
+    pass
 
-class AdminManager(AccountManager):
-    def search(self, query=None, qs_initial=None):
-        if qs_initial is None or len(qs_initial) == 0:
-            qs = self.get_queryset()
-        else:
-            qs = qs_initial
 
-        if query is not None:
-            or_lookup = (
-                Q(user__first_name__icontains=query)
-                | Q(user__last_name__icontains=query)
-                | Q(user__email__icontains=query)
-                | Q(address__icontains=query)
-                | Q(city__icontains=query)
-                | Q(phone_number__icontains=query)
-                | Q(state__icontains=query)
-                | Q(zipcode__icontains=query)
-                | Q(admin_type__icontains=query)
-            )
-            qs = qs.filter(or_lookup).distinct()
-        return qs
+class InstructorManager(AccountManager):
+    pass
+
+
+class AdminManager(AccountManager):
+    search_fields = AccountManager.search_fields + (("admin_type", "B"),)
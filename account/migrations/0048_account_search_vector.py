@@ -0,0 +1,82 @@
+# Generated by Django 2.2.28 on 2026-10-18 17:28
+
+import account.managers
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+def populate_search_vectors(apps, schema_editor):
+    for model_name in ("Student", "Parent", "Instructor", "Admin"):
+        apps.get_model("account", model_name).objects.update_search_vector()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0047_merge_20210508_1931'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='admin',
+            managers=[
+                ('objects', account.managers.AdminManager()),
+            ],
+        ),
+        migrations.AlterModelManagers(
+            name='instructor',
+            managers=[
+                ('objects', account.managers.InstructorManager()),
+            ],
+        ),
+        migrations.AlterModelManagers(
+            name='parent',
+            managers=[
+                ('objects', account.managers.ParentManager()),
+            ],
+        ),
+        migrations.AlterModelManagers(
+            name='student',
+            managers=[
+                ('objects', account.managers.StudentManager()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='admin',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='instructor',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='parent',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='admin',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='account_adm_search__c454b0_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='instructor',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='account_ins_search__6d2d5f_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='parent',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='account_par_search__716049_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='account_stu_search__bb1db6_gin'),
+        ),
+        migrations.RunPython(populate_search_vectors, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 2.2.28 on 2026-10-18 17:30
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+# auth_user belongs to django.contrib.auth so its indexes are created here
+USER_TRIGRAM_FIELDS = ("first_name", "last_name", "email")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0048_account_search_vector'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        *[
+            migrations.RunSQL(
+                f"CREATE INDEX account_user_{field}_trgm "
+                f"ON auth_user USING gin ({field} gin_trgm_ops);",
+                f"DROP INDEX account_user_{field}_trgm;",
+            )
+            for field in USER_TRIGRAM_FIELDS
+        ],
+        migrations.AddIndex(
+            model_name='admin',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['address'], name='account_adm_address_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='admin',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['phone_number'], name='account_adm_phone_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='instructor',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['address'], name='account_ins_address_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='instructor',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['phone_number'], name='account_ins_phone_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='parent',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['address'], name='account_par_address_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='parent',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['phone_number'], name='account_par_phone_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['address'], name='account_stu_address_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['phone_number'], name='account_stu_phone_trgm', opclasses=['gin_trgm_ops']),
+        ),
+    ]
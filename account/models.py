@@ -1,6 +1,9 @@
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models import Q
 from django_localflavor_us.us_states import US_STATES
 from django.conf import settings
 
@@ -61,6 +64,9 @@ class UserInfo(models.Model):
     )
     zipcode = models.CharField(max_length=10, blank=True, null=True)
 
+    # Search, maintained by update_account_search_vector
+    search_vector = SearchVectorField(null=True, editable=False)
+
     # Timestamps
     updated_at = models.DateTimeField(auto_now=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -125,6 +131,21 @@ class Student(UserInfo):
 
     objects = StudentManager()
 
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"]),
+            GinIndex(
+                fields=["address"],
+                name="account_stu_address_trgm",
+                opclasses=["gin_trgm_ops"],
+            ),
+            GinIndex(
+                fields=["phone_number"],
+                name="account_stu_phone_trgm",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ]
+
     @property
     def enrollment_id_list(self):
         return [enrollment.id for enrollment in self.enrollment_set.all()]
@@ -163,10 +184,42 @@ class Parent(UserInfo):
     secondary_phone_number = models.CharField(max_length=50, blank=True, null=True)
     objects = ParentManager()
 
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"]),
+            GinIndex(
+                fields=["address"],
+                name="account_par_address_trgm",
+                opclasses=["gin_trgm_ops"],
+            ),
+            GinIndex(
+                fields=["phone_number"],
+                name="account_par_phone_trgm",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ]
+
+    def _prefetched_students(self):
+        prefetched = getattr(self, "_prefetched_objects_cache", {})
+        if (
+            "student_primary_parent" not in prefetched
+            or "student_secondary_parent" not in prefetched
+        ):
+            return None
+        students = {
+            student.pk: student
+            for student in list(self.student_primary_parent.all())
+            + list(self.student_secondary_parent.all())
+        }
+        return sorted(students.values(), key=lambda student: student.pk)
+
     @property
     def student_id_list(self):
+        students = self._prefetched_students()
+        if students is not None:
+            return [student.user_id for student in students]
         return [
-            student.user.id
+            student.user_id
             for student in self.student_primary_parent.all().union(
                 self.student_secondary_parent.all()
             )
@@ -174,8 +227,11 @@ class Parent(UserInfo):
 
     @property
     def student_list(self):
+        students = self._prefetched_students()
+        if students is not None:
+            return students
         student_ids = [
-            student.user.id
+            student.user_id
             for student in self.student_primary_parent.all().union(
                 self.student_secondary_parent.all()
             )
@@ -186,6 +242,21 @@ class Parent(UserInfo):
 class Instructor(UserInfo):
     objects = InstructorManager()
 
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"]),
+            GinIndex(
+                fields=["address"],
+                name="account_ins_address_trgm",
+                opclasses=["gin_trgm_ops"],
+            ),
+            GinIndex(
+                fields=["phone_number"],
+                name="account_ins_phone_trgm",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ]
+
     biography = models.CharField(max_length=2000, null=True, blank=True)
     experience = models.CharField(max_length=2000, null=True, blank=True)
     language = models.CharField(max_length=2000, null=True, blank=True)
@@ -246,3 +317,61 @@ class Admin(UserInfo):
     google_auth_email = models.CharField(max_length=100, null=True)
 
     objects = AdminManager()
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"]),
+            GinIndex(
+                fields=["address"],
+                name="account_adm_address_trgm",
+                opclasses=["gin_trgm_ops"],
+            ),
+            GinIndex(
+                fields=["phone_number"],
+                name="account_adm_phone_trgm",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ]
+
+
+def update_account_search_vector(sender, instance, raw, **kwargs):
+    if raw:
+        return
+
+    sender.objects.update_search_vector(pk=instance.pk)
+
+    # students are searchable by their parents' names
+    if sender is Parent:
+        Student.objects.update_search_vector(
+            Q(primary_parent=instance) | Q(secondary_parent=instance)
+        )
+
+
+def update_user_search_vector(sender, instance, raw, update_fields, **kwargs):
+    if raw:
+        return
+
+    # skip saves that cannot change searchable fields, e.g. last_login
+    searchable_fields = {"first_name", "last_name", "email"}
+    if update_fields is not None and searchable_fields.isdisjoint(update_fields):
+        return
+
+    for model in (Student, Parent, Instructor, Admin):
+        model.objects.update_search_vector(pk=instance.pk)
+    Student.objects.update_search_vector(
+        Q(primary_parent=instance.pk) | Q(secondary_parent=instance.pk)
+    )
+
+
+for account_model in (Student, Parent, Instructor, Admin):
+    models.signals.post_save.connect(
+        update_account_search_vector,
+        sender=account_model,
+        dispatch_uid=f"update_{account_model.__name__.lower()}_search_vector",
+    )
+
+models.signals.post_save.connect(
+    update_user_search_vector,
+    sender=get_user_model(),
+    dispatch_uid="update_user_search_vector",
+)
@@ -356,9 +356,9 @@ class CreateInstructor(graphene.Mutation):
                 if "subjects" in validated_data:
                     subjects = validated_data.pop("subjects")
                     instructor.subjects.set(subjects)
-                    instructor.save()
                 Instructor.objects.filter(user__id=user_id).update(**validated_data)
                 instructor.refresh_from_db()
+                instructor.save()
 
                 LogEntry.objects.log_action(
                     user_id=info.context.user.id,
@@ -0,0 +1,61 @@
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ObjectDoesNotExist
+
+from account.models import Student, Instructor, Parent, Admin
+
+
+# a user with several profiles is treated as the first one
+PROFILE_MODELS = (Student, Instructor, Parent, Admin)
+
+
+def _first_profile(user):
+    for model in PROFILE_MODELS:
+        try:
+            return getattr(user, model._meta.model_name)
+        except ObjectDoesNotExist:
+            continue
+    return None
+
+
+def find_profiles(**user_lookup):
+    """
+    Maps the id of every user matching user_lookup, e.g. id__in=user_ids,
+    to their Student, Instructor, Parent or Admin, or None. One query joins
+    every profile table instead of trying each in turn
+    """
+    users = (
+        get_user_model()
+        .objects.select_related(*(model._meta.model_name for model in PROFILE_MODELS))
+        .filter(**user_lookup)
+        .order_by("id")
+    )
+    return {user.id: _first_profile(user) for user in users}
+
+
+def find_profile(**user_lookup):
+    """
+    Profile of the first user matching user_lookup, e.g. email=email
+    """
+    return next(iter(find_profiles(**user_lookup).values()), None)
+
+
+def get_profile(user_id):
+    """
+    Profile of the user with user_id, looked up on every call so a changed
+    role applies at once. get_request_profile shares one lookup per request
+    """
+    return find_profile(id=user_id)
+
+
+def get_request_profile(context):
+    """
+    Profile of the requesting user, memoized on the request so every
+    permission check and resolver of an operation shares one lookup
+    """
+    if not hasattr(context, "user_profile"):
+        user = getattr(context, "user", None)
+        if user is None or not user.is_authenticated:
+            context.user_profile = None
+        else:
+            context.user_profile = get_profile(user.id)
+    return context.user_profile
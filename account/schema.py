@@ -1,6 +1,16 @@
 import jwt
 from datetime import datetime, date, timedelta
-from graphene import Field, ID, List, String, Boolean, Union, DateTime, ObjectType
+from graphene import (
+    Field,
+    ID,
+    Int,
+    List,
+    String,
+    Boolean,
+    Union,
+    DateTime,
+    ObjectType,
+)
 from graphene_django.types import DjangoObjectType
 from graphql_jwt.decorators import login_required
 from django.conf import settings
@@ -17,6 +27,10 @@ from account.models import (
     InstructorOutOfOffice,
     Admin,
 )
+from account.profiles import find_profile, find_profiles, get_profile
+from mainframe.field_cache import cached_field
+from mainframe.optimizer import optimize_queryset
+from mainframe.pagination import bounded_list, connection_results
 
 User = get_user_model()
 
@@ -49,6 +63,7 @@ class SchoolType(DjangoObjectType):
 class StudentType(DjangoObjectType):
     class Meta:
         model = Student
+        exclude_fields = ("search_vector",)
 
 
 class StudentSchoolInfoType(DjangoObjectType):
@@ -60,13 +75,27 @@ class ParentType(DjangoObjectType):
     student_id_list = List(ID, source="student_id_list")
     student_list = List(StudentType, source="student_list")
 
+    cost_weights = {"student_id_list": 2, "student_list": 2}
+    optimizer_hints = {
+        "student_id_list": {
+            "prefetch_related": ("student_primary_parent", "student_secondary_parent"),
+            "only": (),
+        },
+        "student_list": {
+            "prefetch_related": ("student_primary_parent", "student_secondary_parent"),
+            "only": (),
+        },
+    }
+
     class Meta:
         model = Parent
+        exclude_fields = ("search_vector",)
 
 
 class InstructorType(DjangoObjectType):
     class Meta:
         model = Instructor
+        exclude_fields = ("search_vector",)
 
 
 class InstructorAvailabilityType(DjangoObjectType):
@@ -91,6 +120,7 @@ class InstructorOutOfOfficeType(DjangoObjectType):
 class AdminType(DjangoObjectType):
     class Meta:
         model = Admin
+        exclude_fields = ("search_vector",)
 
 
 class UserInfoType(Union):
@@ -98,6 +128,65 @@ class UserInfoType(Union):
         types = (StudentType, ParentType, InstructorType, AdminType)
 
 
+class StudentResults(ObjectType):
+    results = List(StudentType, required=True)
+    total = Int()
+    end_cursor = String()
+    has_next_page = Boolean()
+
+
+class ParentResults(ObjectType):
+    results = List(ParentType, required=True)
+    total = Int()
+    end_cursor = String()
+    has_next_page = Boolean()
+
+
+class InstructorResults(ObjectType):
+    results = List(InstructorType, required=True)
+    total = Int()
+    end_cursor = String()
+    has_next_page = Boolean()
+
+
+class AdminResults(ObjectType):
+    results = List(AdminType, required=True)
+    total = Int()
+    end_cursor = String()
+    has_next_page = Boolean()
+
+
+def filter_students(grade=None):
+    if grade:
+        return Student.objects.filter(grade=grade)
+    return Student.objects.all()
+
+
+def filter_admins(admin_type=None):
+    if admin_type:
+        return Admin.objects.filter(admin_type=admin_type)
+    return Admin.objects.all()
+
+
+def filter_instructors(subject=None):
+    queryset = Instructor.objects.all()
+    if subject:
+        # a subquery, joining the subjects would repeat instructors
+        queryset = queryset.filter(
+            pk__in=Instructor.objects.filter(subjects__name=subject).values("pk")
+        )
+    return queryset
+
+
+def resolve_profile(user_id, user_name):
+    profile = None
+    if user_name:
+        profile = find_profile(email=user_name)
+    if profile is None and user_id:
+        profile = get_profile(user_id)
+    return profile
+
+
 class Query(object):
     account_note = Field(AccountNoteType, note_id=ID())
     student = Field(StudentType, user_id=ID(), email=String())
@@ -124,6 +213,16 @@ class Query(object):
     admins = List(AdminType, admin_type=String())
     user_infos = List(UserInfoType, user_ids=List(ID))
 
+    # keyset paginated variants of the lists above
+    students_connection = Field(StudentResults, grade=ID(), first=Int(), after=String())
+    parents_connection = Field(ParentResults, first=Int(), after=String())
+    instructors_connection = Field(
+        InstructorResults, subject=String(), first=Int(), after=String()
+    )
+    admins_connection = Field(
+        AdminResults, admin_type=String(), first=Int(), after=String()
+    )
+
     instructor_ooo = List(InstructorOutOfOfficeType, instructor_id=ID(required=True))
     instructor_availability = List(
         InstructorAvailabilityType, instructor_id=ID(required=True)
@@ -208,67 +307,25 @@ class Query(object):
         user_name = kwargs.get("user_name")
         admin_types = kwargs.get("admin_types")
 
-        if user_name:
-            if Student.objects.filter(user__email=user_name).exists():
-                return UserTypeAuth(user_type="STUDENT", google_auth_enabled=False)
-            if Instructor.objects.filter(user__email=user_name).exists():
-                return UserTypeAuth(user_type="INSTRUCTOR", google_auth_enabled=False)
-            if Parent.objects.filter(user__email=user_name).exists():
-                return UserTypeAuth(user_type="PARENT", google_auth_enabled=False)
-            if Admin.objects.filter(user__email=user_name).exists():
-                admin = Admin.objects.get(user__email=user_name)
-                if admin_types:
-                    return Admin.objects.get(user__email=user_name).admin_type.upper()
-                return UserTypeAuth(
-                    user_type="ADMIN", google_auth_enabled=admin.google_auth_enabled
-                )
-
-        if user_id:
-            if Student.objects.filter(user=user_id).exists():
-                return UserTypeAuth(user_type="STUDENT", google_auth_enabled=False)
-            if Instructor.objects.filter(user=user_id).exists():
-                return UserTypeAuth(user_type="INSTRUCTOR", google_auth_enabled=False)
-            if Parent.objects.filter(user=user_id).exists():
-                return UserTypeAuth(user_type="PARENT", google_auth_enabled=False)
-            if Admin.objects.filter(user=user_id).exists():
-                admin = Admin.objects.get(user__email=user_name)
-                if admin_types:
-                    return UserTypeAuth(
-                        user_type=admin.admin_type.upper(),
-                        google_auth_enabled=admin.google_auth_enabled,
-                    )
-                return UserTypeAuth(
-                    user_type="ADMIN", google_auth_enabled=admin.google_auth_enabled
-                )
+        profile = resolve_profile(user_id, user_name)
+        if profile is None:
+            return None
 
-        return None
+        if isinstance(profile, Admin):
+            user_type = profile.admin_type.upper() if admin_types else "ADMIN"
+            return UserTypeAuth(
+                user_type=user_type, google_auth_enabled=profile.google_auth_enabled
+            )
+        return UserTypeAuth(
+            user_type=profile.account_type.upper(), google_auth_enabled=False
+        )
 
     @login_required
     def resolve_user_info(self, info, **kwargs):
         user_id = kwargs.get("user_id")
         user_name = kwargs.get("user_name")
 
-        if user_name:
-            if Student.objects.filter(user__email=user_name).exists():
-                return Student.objects.get(user__email=user_name)
-            if Instructor.objects.filter(user__email=user_name).exists():
-                return Instructor.objects.get(user__email=user_name)
-            if Parent.objects.filter(user__email=user_name).exists():
-                return Parent.objects.get(user__email=user_name)
-            if Admin.objects.filter(user__email=user_name).exists():
-                return Admin.objects.get(user__email=user_name)
-
-        if user_id:
-            if Student.objects.filter(user=user_id).exists():
-                return Student.objects.get(user=user_id)
-            if Instructor.objects.filter(user=user_id).exists():
-                return Instructor.objects.get(user=user_id)
-            if Parent.objects.filter(user=user_id).exists():
-                return Parent.objects.get(user=user_id)
-            if Admin.objects.filter(user=user_id).exists():
-                return Admin.objects.get(user=user_id)
-
-        return None
+        return resolve_profile(user_id, user_name)
 
     @login_required
     def resolve_account_notes(self, info, **kwargs):
@@ -276,14 +333,18 @@ class Query(object):
 
         return AccountNote.objects.filter(user=user_id)
 
+    @login_required
     def resolve_students(self, info, **kwargs):
-        grade = kwargs.get("grade")
+        return bounded_list(filter_students(kwargs.get("grade")), info)
 
-        if grade:
-            return Student.objects.filter(grade=grade)
-        return Student.objects.all()
+    @login_required
+    def resolve_students_connection(self, info, first=None, after=None, **kwargs):
+        return connection_results(
+            StudentResults, filter_students(kwargs.get("grade")), info, first, after
+        )
 
     @login_required
+    @cached_field()
     def resolve_schools(self, info, **kwargs):
         district = kwargs.get("district")
         queryset = School.objects
@@ -291,23 +352,39 @@ class Query(object):
         if district:
             queryset = queryset.filter(district=district)
 
-        return queryset.all()
+        return optimize_queryset(queryset.all(), info)
 
     @login_required
     def resolve_admins(self, info, **kwargs):
-        admin_type = kwargs.get("admin_type")
+        return bounded_list(filter_admins(kwargs.get("admin_type")), info)
 
-        if admin_type:
-            return Admin.objects.filter(admin_type=admin_type)
-        return Admin.objects.all()
+    @login_required
+    def resolve_admins_connection(self, info, first=None, after=None, **kwargs):
+        return connection_results(
+            AdminResults, filter_admins(kwargs.get("admin_type")), info, first, after
+        )
 
     @login_required
     def resolve_parents(self, info, **kwargs):
-        return Parent.objects.all()
+        return bounded_list(Parent.objects.all(), info)
+
+    @login_required
+    def resolve_parents_connection(self, info, first=None, after=None, **kwargs):
+        return connection_results(
+            ParentResults, Parent.objects.all(), info, first, after
+        )
+
+    @login_required
+    def resolve_instructors(self, info, subject=None):
+        return bounded_list(filter_instructors(subject), info)
 
     @login_required
-    def resolve_instructors(self, info, **kwargs):
-        return Instructor.objects.all()
+    def resolve_instructors_connection(
+        self, info, subject=None, first=None, after=None
+    ):
+        return connection_results(
+            InstructorResults, filter_instructors(subject), info, first, after
+        )
 
     @login_required
     def resolve_instructor_ooo(self, info, **kwargs):
@@ -321,19 +398,12 @@ class Query(object):
         return InstructorAvailability.objects.filter(instructor=instructor_id)
 
     def resolve_user_infos(self, info, user_ids):
-        user_list = []
-
-        for user_id in user_ids:
-            if Student.objects.filter(user=user_id).exists():
-                user_list.append(Student.objects.get(user=user_id))
-            if Instructor.objects.filter(user=user_id).exists():
-                user_list.append(Instructor.objects.get(user=user_id))
-            if Parent.objects.filter(user=user_id).exists():
-                user_list.append(Parent.objects.get(user=user_id))
-            if Admin.objects.filter(user=user_id).exists():
-                user_list.append(Admin.objects.get(user=user_id))
-
-        return user_list
+        profiles = find_profiles(id__in=user_ids)
+        return [
+            profiles[int(user_id)]
+            for user_id in user_ids
+            if profiles.get(int(user_id)) is not None
+        ]
 
     def resolve_email_from_token(self, info, token):
         return jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])["email"]
@@ -1,3 +1,150 @@
-from django.test import TestCase
+import json
 
-# Create your tests here.
+from django.test import override_settings
+from graphql_jwt.shortcuts import get_token
+
+from account.models import Admin, Instructor, Student
+from course.models import CourseCategory
+from mainframe.testing import QueryBudgetTestCase
+from search.benchmark import seed_tenants
+
+STUDENTS = """
+query {
+    students {
+        user { id firstName lastName email }
+        grade
+        school { id name }
+        primaryParent { user { id firstName lastName } }
+    }
+}
+"""
+PARENTS = """
+query {
+    parents {
+        user { id firstName lastName }
+        phoneNumber
+        studentIdList
+        studentList { user { id firstName } }
+    }
+}
+"""
+STUDENTS_CONNECTION = """
+query ($after: String) {
+    studentsConnection(first: 10, after: $after) {
+        endCursor
+        hasNextPage
+        results { user { id } primaryParent { user { id } } }
+    }
+}
+"""
+USER_INFOS = """
+query ($userIds: [ID]) {
+    userInfos(userIds: $userIds) {
+        ... on StudentType { user { id } accountType }
+        ... on ParentType { user { id } accountType }
+        ... on InstructorType { user { id } accountType }
+        ... on AdminType { user { id } accountType }
+    }
+}
+"""
+INSTRUCTORS_BY_SUBJECT = """
+query ($subject: String) {
+    instructors(subject: $subject) { user { id } }
+    instructorsConnection(subject: $subject) { total results { user { id } } }
+}
+"""
+
+
+class AccountQueryBudgetTest(QueryBudgetTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        business_id = seed_tenants(
+            students=20, parents=10, instructors=2, courses=2, sessions_per_course=1
+        )[0]
+        cls.owner = Admin.objects.get(business=business_id).user
+
+    def grow(self):
+        seed_tenants(
+            students=80, parents=40, instructors=2, courses=2, sessions_per_course=1
+        )
+
+    def test_students(self):
+        self.assertOperationBudget(self.owner, STUDENTS, 2)
+        self.grow()
+        data = self.assertOperationBudget(self.owner, STUDENTS, 2)
+        self.assertEqual(len(data["students"]), 100)
+
+    def test_parents(self):
+        self.assertOperationBudget(self.owner, PARENTS, 5)
+        self.grow()
+        data = self.assertOperationBudget(self.owner, PARENTS, 5)
+        self.assertEqual(len(data["parents"]), 50)
+
+    def test_students_connection(self):
+        self.grow()
+        pages = 0
+        after = None
+        while True:
+            data = self.assertOperationBudget(
+                self.owner, STUDENTS_CONNECTION, 2, {"after": after}
+            )["studentsConnection"]
+            pages += 1
+            if not data["hasNextPage"]:
+                break
+            after = data["endCursor"]
+        self.assertEqual(pages, 10)
+
+    def test_user_infos(self):
+        user_ids = [self.owner.id] + list(
+            Student.objects.values_list("user", flat=True)[:5]
+        )
+        data = self.assertOperationBudget(
+            self.owner, USER_INFOS, 2, {"userIds": user_ids}
+        )
+        self.assertEqual(
+            [
+                (int(info["user"]["id"]), info["accountType"])
+                for info in data["userInfos"]
+            ],
+            [(self.owner.id, "ADMIN")]
+            + [(user_id, "STUDENT") for user_id in user_ids[1:]],
+        )
+
+    def test_instructors_by_subject(self):
+        instructor = Instructor.objects.filter(business=self.owner.admin.business)[0]
+        instructor.subjects.set(
+            [
+                CourseCategory.objects.create(name="Calculus"),
+                CourseCategory.objects.create(name="Calculus"),
+            ]
+        )
+        data = self.graphql(self.owner, INSTRUCTORS_BY_SUBJECT, {"subject": "Calculus"})
+        expected = [{"user": {"id": str(instructor.pk)}}]
+        self.assertEqual(data["instructors"], expected)
+        self.assertEqual(data["instructorsConnection"]["results"], expected)
+
+    def test_students_require_login(self):
+        for query in (STUDENTS, STUDENTS_CONNECTION):
+            response = self.client.post(
+                "/graphql",
+                json.dumps({"query": query}),
+                content_type="application/json",
+            )
+            self.assertEqual(
+                response.json()["errors"][0]["message"],
+                "You do not have permission to perform this action",
+            )
+
+    @override_settings(GRAPHQL_MAX_LIST_SIZE=10)
+    def test_list_past_the_limit_fails(self):
+        response = self.client.post(
+            "/graphql",
+            json.dumps({"query": STUDENTS}),
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"JWT {get_token(self.owner)}",
+        )
+        self.assertEqual(
+            response.json()["errors"][0]["message"],
+            "Failed query. More than 10 results, "
+            "use the connection field to page through them.",
+        )
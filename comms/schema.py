@@ -1,6 +1,6 @@
 import jwt
 
-from graphene import Field, ID, List, String, Union
+from graphene import Boolean, Field, ID, Int, List, ObjectType, String, Union
 from graphene_django.types import DjangoObjectType
 from graphql_jwt.decorators import login_required
 
@@ -9,6 +9,7 @@ from comms.models import (
     InstructorNotificationSettings,
     Announcement,
 )
+from mainframe.pagination import bounded_list, connection_results
 
 
 class AnnouncementType(DjangoObjectType):
@@ -16,6 +17,13 @@ class AnnouncementType(DjangoObjectType):
         model = Announcement
 
 
+class AnnouncementResults(ObjectType):
+    results = List(AnnouncementType, required=True)
+    total = Int()
+    end_cursor = String()
+    has_next_page = Boolean()
+
+
 class ParentNotificationSettingsType(DjangoObjectType):
     class Meta:
         model = ParentNotificationSettings
@@ -36,6 +44,9 @@ class Query(object):
     )
 
     announcements = List(AnnouncementType, course_id=ID(required=True))
+    announcements_connection = Field(
+        AnnouncementResults, course_id=ID(required=True), first=Int(), after=String()
+    )
 
     @login_required
     def resolve_announcement(self, info, **kwargs):
@@ -50,7 +61,17 @@ class Query(object):
     def resolve_announcements(self, info, **kwargs):
         course_id = kwargs.get("course_id")
 
-        return Announcement.objects.filter(course_id=course_id)
+        return bounded_list(Announcement.objects.filter(course_id=course_id), info)
+
+    @login_required
+    def resolve_announcements_connection(self, info, course_id, first=None, after=None):
+        return connection_results(
+            AnnouncementResults,
+            Announcement.objects.filter(course_id=course_id),
+            info,
+            first,
+            after,
+        )
 
     def resolve_parent_notification_settings(self, info, parent_id):
         return ParentNotificationSettings.objects.get(parent=parent_id)
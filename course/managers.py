@@ -1,5 +1,5 @@
 from django.db import models
-from django.db.models import Q
+from django.db.models import Count, F, Q
 
 
 class CourseManager(models.Manager):
@@ -34,6 +34,29 @@ class CourseManager(models.Manager):
             qs = qs.filter(or_lookup).distinct()
         return qs
 
+    def enrollment_filter(self, size=None, availability=None, qs_initial=None):
+        """
+        Filters by number of enrolled students in a single query, size is
+        the maximum enrollment and availability is "open" or "filled"
+        compared to max_capacity
+        """
+        if qs_initial is None:
+            qs = self.get_queryset()
+        else:
+            qs = qs_initial
+
+        if size is None and availability not in ("open", "filled"):
+            return qs
+
+        qs = qs.annotate(enrollment_count=Count("enrollment"))
+        if size is not None:
+            qs = qs.filter(enrollment_count__lte=size)
+        if availability == "open":
+            qs = qs.filter(enrollment_count__lt=F("max_capacity"))
+        elif availability == "filled":
+            qs = qs.filter(enrollment_count__gte=F("max_capacity"))
+        return qs
+
 
 class EnrollmentManager(models.Manager):
     def business(self, business_id):
@@ -0,0 +1,23 @@
+# Generated by Django 2.2.28 on 2026-10-18 18:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('course', '0035_course_business'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='courseavailability',
+            name='materialized_until',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='courseavailability',
+            name='recurrence',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+    ]
@@ -10,6 +10,7 @@ from account.models import Instructor, Parent, Student
 from onboarding.models import Business
 
 from course.managers import CourseManager, EnrollmentManager
+from scheduler.recurrence import unmaterialized_occurrences
 
 
 class CourseCategory(models.Model):
@@ -25,6 +26,9 @@ class CourseCategory(models.Model):
 
     @property
     def active_tuition_rule_count(self):
+        # annotated by the course categories query
+        if hasattr(self, "active_rule_count"):
+            return self.active_rule_count
         return self.tuitionrule_set.filter(retired=False).count()
 
 
@@ -106,15 +110,24 @@ class Course(models.Model):
 
     @property
     def active_availability_list(self):
+        if "courseavailability_set" in getattr(self, "_prefetched_objects_cache", {}):
+            return [
+                availability
+                for availability in self.courseavailability_set.all()
+                if availability.active
+            ]
         return CourseAvailability.objects.filter(Q(course=self.id) & Q(active=True))
 
     @property
     def availability_list(self):
+        if "courseavailability_set" in getattr(self, "_prefetched_objects_cache", {}):
+            return list(self.courseavailability_set.all())
         return CourseAvailability.objects.filter(course=self.id)
 
     @property
     def enrollment_list(self):
-        return [enrollment.student.user.id for enrollment in self.enrollment_set.all()]
+        # students are keyed by their user
+        return [enrollment.student_id for enrollment in self.enrollment_set.all()]
 
     @property
     def enrollment_id_list(self):
@@ -139,6 +152,11 @@ class CourseAvailability(models.Model):
     )
     start_time = models.TimeField()
     end_time = models.TimeField()
+    # RFC 5545 RRULE, e.g. FREQ=WEEKLY;INTERVAL=2, weekly when blank
+    recurrence = models.CharField(max_length=255, blank=True, default="")
+    # sessions exist for occurrences through this day, null when they
+    # were all created up front
+    materialized_until = models.DateField(null=True, blank=True)
 
     active = models.BooleanField(default=True)
 
@@ -222,11 +240,25 @@ class Enrollment(models.Model):
                 return None
             return past_sessions[abs(self.sessions_left)].start_datetime
 
-        future_sessions = self.course.session_set.filter(
-            start_datetime__gt=datetime.now(timezone.utc)
-        ).order_by("start_datetime")
+        future_sessions = list(
+            self.course.session_set.filter(
+                start_datetime__gt=datetime.now(timezone.utc)
+            )
+            .order_by("start_datetime")
+            .values_list("start_datetime", flat=True)
+        )
+        if self.sessions_left > len(future_sessions):
+            # sessions past the materialization horizon are not created yet
+            future_sessions += [
+                start_datetime
+                for _, start_datetime, _ in unmaterialized_occurrences(
+                    self.course, self.course.availability_list
+                )
+            ]
+        if not future_sessions:
+            return None
         last_index = min(self.sessions_left, len(future_sessions)) - 1
-        return future_sessions[last_index].start_datetime
+        return future_sessions[last_index]
 
     @property
     def enrollment_status(self):
@@ -1,8 +1,6 @@
-import arrow
-import calendar
+import copy
 import decimal
-import pytz
-from datetime import date, datetime, timedelta
+from datetime import date, datetime
 
 import graphene
 from graphene import Boolean, DateTime, Decimal, Field, ID, Int, List, String, Time
@@ -36,7 +34,12 @@ from course.schema import (
     EnrollmentNoteType,
     InterestType,
 )
-from scheduler.models import Session
+from scheduler.generation import (
+    generate_course_sessions,
+    regenerate_course_sessions,
+)
+from scheduler.conflicts import instructor_overlap_errors
+from scheduler.recurrence import validate_recurrence
 from pricing.models import TuitionRule
 
 
@@ -64,83 +67,8 @@ class CourseAvailabilityInput(graphene.InputObjectType):
     day_of_week = DayOfWeekEnum()
     start_time = Time()
     end_time = Time()
-
-
-def create_availabilities_and_sessions(course, availabilities):
-    course.num_sessions = 0
-
-    # create first week days and course availability models
-    course_availabilities = []
-    days_of_week = []
-    start_times = []
-    end_times = []
-
-    start_date = arrow.get(course.start_date)
-    start_week = start_date - timedelta(days=start_date.weekday())
-    weekday_to_shift = {
-        name.lower(): i for i, name in enumerate(list(calendar.day_name))
-    }
-
-    for availability in availabilities:
-        course_availabilities.append(
-            CourseAvailability.objects.create(course=course, **availability)
-        )
-        days_of_week.append(
-            start_week.shift(days=weekday_to_shift[availability["day_of_week"]])
-        )
-        start_times.append(availability["start_time"])
-        end_times.append(availability["end_time"])
-
-    # create sessions for each week till last date passes
-    if course.start_date and course.end_date:
-        end_date = arrow.get(course.end_date)
-        confirmed_end_date = end_date
-
-        end_not_reached = True
-        while end_not_reached:
-            # for each week iterate over all availabilities
-            for i in range(len(days_of_week)):
-                current_date = days_of_week[i]
-
-                # stop iterating once any current_date exceeds end_date
-                if current_date > end_date:
-                    end_not_reached = False
-
-                if start_date <= current_date <= end_date:
-                    start_datetime = datetime.combine(
-                        current_date.date(), start_times[i]
-                    )
-                    end_datetime = datetime.combine(current_date.date(), end_times[i])
-                    start_datetime = (
-                        pytz.timezone("America/Los_Angeles")
-                        .localize(start_datetime)
-                        .astimezone(pytz.utc)
-                    )
-                    end_datetime = (
-                        pytz.timezone("America/Los_Angeles")
-                        .localize(end_datetime)
-                        .astimezone(pytz.utc)
-                    )
-
-                    Session.objects.create(
-                        course=course,
-                        availability=course_availabilities[i],
-                        start_datetime=start_datetime,
-                        end_datetime=end_datetime,
-                        instructor=course.instructor,
-                        is_confirmed=course.is_confirmed
-                        and current_date <= confirmed_end_date,
-                        title=course.title,
-                    )
-                    course_availabilities[i].num_sessions += 1
-                    course.num_sessions += 1
-                days_of_week[i] = current_date.shift(weeks=+1)
-
-    # save updated availability num_sessions
-    for availability in course_availabilities:
-        availability.save()
-
-    return course_availabilities
+    # RFC 5545 RRULE such as FREQ=WEEKLY;INTERVAL=2, weekly by default
+    recurrence = String()
 
 
 class CreateCourse(graphene.Mutation):
@@ -179,140 +107,34 @@ class CreateCourse(graphene.Mutation):
                 "Failed course mutation. Cannot specify both hourly_tuition and total_tuition"
             )
 
+        for availability in validated_data.get("availabilities") or []:
+            availability["recurrence"] = availability.get("recurrence") or ""
+            try:
+                validate_recurrence(availability["recurrence"])
+            except ValueError as error:
+                raise GraphQLError(f"Failed course mutation. {error}")
+
         # update course
         if validated_data.get("course_id"):
             availabilities = validated_data.pop("availabilities", None)
 
             course = Course.objects.get(id=validated_data.get("course_id"))
-            Course.objects.filter(id=course.id).update(**validated_data)
-            course.refresh_from_db()
-
-            now = datetime.now()
-
-            if availabilities:
-                # erase future to be replaced
-                Session.objects.filter(
-                    Q(course__id=course.id) & Q(start_datetime__date__gte=now)
-                ).delete()
-
-                # set old availabilities to false and delete those with no functions
-                for availability in CourseAvailability.objects.filter(
-                    course__id=course.id
-                ):
-                    availability.active = False
-                    availability.num_sessions = Session.objects.filter(
-                        availability_id=availability
-                    ).count()
-                    if availability.num_sessions == 0:
-                        availability.delete()
-                    else:
-                        availability.save()
-
-                # create first week days and course availability models
-                course_availabilities = []
-                days_of_week = []
-                start_dates = []
-                start_times = []
-                end_times = []
-                weekday_to_shift = {
-                    name.lower(): i for i, name in enumerate(list(calendar.day_name))
-                }
-                for availability in availabilities:
-                    # set active if already exists
-                    isAvailable = CourseAvailability.objects.filter(
-                        Q(course__id=course.id)
-                        & Q(day_of_week=availability["day_of_week"])
-                        & Q(start_time=availability["start_time"])
-                        & Q(end_time=availability["end_time"])
+            previous = copy.copy(course)
+            with instructor_overlap_errors("Failed course mutation"):
+                Course.objects.filter(id=course.id).update(**validated_data)
+                course.refresh_from_db()
+
+                if availabilities:
+                    course_availabilities = regenerate_course_sessions(
+                        course, availabilities, previous
                     )
-                    if isAvailable.exists():
-                        availability = isAvailable[0]
-                        availability.active = True
-                        availability.save()
-                    else:
-                        availability = CourseAvailability.objects.create(
-                            course=course, **availability
-                        )
-
-                    # if old availability, start from where last session left off
-                    start_date = max(arrow.get(now), arrow.get(course.start_date))
-                    old_sessions = Session.objects.filter(availability=availability)
-                    if old_sessions:
-                        start_date = min(
-                            start_date,
-                            arrow.get(
-                                old_sessions.latest("start_datetime").start_datetime
-                            ),
-                        )
-                    start_week = start_date - timedelta(days=start_date.weekday())
-
-                    course_availabilities.append(availability)
-                    days_of_week.append(
-                        start_week.shift(
-                            days=weekday_to_shift[availability.day_of_week]
-                        )
+                else:
+                    # if no availabilities specified, use old active ones
+                    course_availabilities = CourseAvailability.objects.filter(
+                        Q(course__id=course.id) & Q(active=True)
                     )
-                    start_dates.append(start_date)
-                    start_times.append(availability.start_time)
-                    end_times.append(availability.end_time)
-
-                # create sessions for each week till last date passes
-                end_date = arrow.get(course.end_date)
-
-                end_reached_count = 0
-                while end_reached_count < len(days_of_week):
-                    end_reached_count = 0
-                    # for each week iterate over all availabilities
-                    for i in range(len(days_of_week)):
-                        current_date = days_of_week[i]
-
-                        # stop iterating once any current_date exceeds end_date
-                        if current_date > end_date:
-                            end_reached_count += 1
-
-                        if start_dates[i] <= current_date and current_date <= end_date:
-                            start_datetime = datetime.combine(
-                                current_date.date(), start_times[i]
-                            )
-                            end_datetime = datetime.combine(
-                                current_date.date(), end_times[i]
-                            )
-                            start_datetime = (
-                                pytz.timezone("America/Los_Angeles")
-                                .localize(start_datetime)
-                                .astimezone(pytz.utc)
-                            )
-                            end_datetime = (
-                                pytz.timezone("America/Los_Angeles")
-                                .localize(end_datetime)
-                                .astimezone(pytz.utc)
-                            )
-
-                            Session.objects.create(
-                                course=course,
-                                availability=course_availabilities[i],
-                                start_datetime=start_datetime,
-                                end_datetime=end_datetime,
-                                instructor=course.instructor,
-                                is_confirmed=course.is_confirmed
-                                and current_date <= end_date,
-                                title=course.title,
-                            )
-                        days_of_week[i] = current_date.shift(weeks=+1)
-
-                # save updated availability num_sessions
-                for availability in course_availabilities:
-                    availability.num_sessions = Session.objects.filter(
-                        availability=availability
-                    ).count()
-                    availability.save()
-                course.num_sessions = Session.objects.filter(course=course.id).count()
-
-            else:
-                # if no availabilities specified, use old active ones
-                course_availabilities = CourseAvailability.objects.filter(
-                    Q(course__id=course.id) & Q(active=True)
-                )
+
+            now = datetime.now()
 
             # course link updates
             if validated_data.get("course_link") or validated_data.get(
@@ -359,24 +181,25 @@ class CreateCourse(graphene.Mutation):
                 "Failed course creation mutation. Availabilities unprovided."
             )
 
-        course = Course.objects.create(**validated_data)
-        if validated_data.get("course_link") or validated_data.get(
-            "course_link_description"
-        ):
-            course.course_link_updated_at = datetime.now()
-            course.course_link_user = info.context.user
-
         availabilities_dicts = [
             {
                 "day_of_week": availability.day_of_week,
                 "start_time": availability.start_time,
                 "end_time": availability.end_time,
+                "recurrence": availability["recurrence"],
             }
             for availability in availabilities
         ]
-        course_availabilities = create_availabilities_and_sessions(
-            course, availabilities_dicts
-        )
+        with instructor_overlap_errors("Failed course creation mutation"):
+            course = Course.objects.create(**validated_data)
+            course_availabilities = generate_course_sessions(
+                course, availabilities_dicts
+            )
+        if validated_data.get("course_link") or validated_data.get(
+            "course_link_description"
+        ):
+            course.course_link_updated_at = datetime.now()
+            course.course_link_user = info.context.user
 
         if course.course_type == "class" and course.num_sessions:
             # calculate total hours across all sessions
@@ -1,10 +1,13 @@
 import arrow
 
-from graphene import Enum, Field, Int, List, ID, Decimal, DateTime, String
+from django.db.models import Count, Q
+
+from graphene import Boolean, Enum, Field, Int, List, ID, Decimal, DateTime, String
 from graphene_django.types import ObjectType, DjangoObjectType
 from graphql_jwt.decorators import login_required
 
-from account.models import Parent, Instructor
+from account.models import Parent, Instructor, Student
+from account.profiles import get_profile
 
 from course.models import (
     Course,
@@ -15,6 +18,9 @@ from course.models import (
     EnrollmentNote,
     Interest,
 )
+from mainframe.field_cache import cached_field
+from mainframe.pagination import bounded_list, connection_results
+from pricing.models import TuitionRule
 from scheduler.models import Session
 
 
@@ -31,6 +37,18 @@ class CourseType(DjangoObjectType):
 
     academic_level_pretty = String()
 
+    optimizer_hints = {
+        "active_availability_list": {
+            "prefetch_related": ("courseavailability_set",),
+            "only": (),
+        },
+        "availability_list": {
+            "prefetch_related": ("courseavailability_set",),
+            "only": (),
+        },
+        "academic_level_pretty": {"only": ("academic_level",)},
+    }
+
     class Meta:
         model = Course
 
@@ -48,6 +66,8 @@ class CourseType(DjangoObjectType):
 class CourseCategoryType(DjangoObjectType):
     active_tuition_rule_count = Int(source="active_tuition_rule_count")
 
+    cost_weights = {"active_tuition_rule_count": 1}
+
     class Meta:
         model = CourseCategory
 
@@ -62,6 +82,23 @@ class EnrollmentType(DjangoObjectType):
     sessions_left = Int(source="sessions_left")
     last_paid_session_datetime = DateTime(source="last_paid_session_datetime")
 
+    # enrollment_balance walks the course's sessions
+    cost_weights = {
+        "enrollment_balance": 20,
+        "sessions_left": 5,
+        "last_paid_session_datetime": 25,
+    }
+    optimizer_hints = {
+        "sessions_left": {
+            "select_related": ("course",),
+            "prefetch_related": ("registration_set__invoice",),
+        },
+        "last_paid_session_datetime": {
+            "select_related": ("course",),
+            "prefetch_related": ("registration_set__invoice",),
+        },
+    }
+
     class Meta:
         model = Enrollment
 
@@ -88,6 +125,57 @@ class PopularCategoryType(ObjectType):
     num_sessions = Int()
 
 
+class CourseResults(ObjectType):
+    results = List(CourseType, required=True)
+    total = Int()
+    end_cursor = String()
+    has_next_page = Boolean()
+
+
+class EnrollmentResults(ObjectType):
+    results = List(EnrollmentType, required=True)
+    total = Int()
+    end_cursor = String()
+    has_next_page = Boolean()
+
+
+def filter_courses(category_id=None, course_ids=None, user_id=None):
+    courses = Course.objects.all()
+    if category_id:
+        courses = Course.objects.filter(course_category=category_id)
+    elif course_ids:
+        course_ids = [
+            course_id
+            for course_id in course_ids
+            if Course.objects.filter(id=course_id).exists()
+        ]
+        courses = Course.objects.filter(id__in=course_ids)
+    elif user_id:
+        profile = get_profile(user_id)
+        if isinstance(profile, Instructor):
+            courses = Course.objects.filter(instructor_id=user_id)
+        elif isinstance(profile, Parent):
+            courses = Course.objects.filter(
+                id__in=Enrollment.objects.filter(
+                    Q(student__primary_parent=user_id)
+                    | Q(student__secondary_parent=user_id)
+                ).values("course")
+            )
+    return courses
+
+
+def filter_enrollments(student_id=None, course_id=None, student_ids=None):
+    if student_ids:
+        return Enrollment.objects.filter(student_id__in=student_ids)
+
+    queryset = Enrollment.objects.all()
+    if student_id:
+        queryset = queryset.filter(student=student_id)
+    if course_id:
+        queryset = queryset.filter(course=course_id)
+    return queryset
+
+
 class Query(object):
     course = Field(CourseType, course_id=ID())
     course_availability = Field(CourseAvailabilityType, availability_id=ID())
@@ -109,6 +197,24 @@ class Query(object):
     enrollment_notes = List(EnrollmentNoteType, enrollment_id=ID(required=True))
     interests = List(InterestType, parent_id=ID(), course_id=ID())
 
+    # keyset paginated variants of the lists above
+    courses_connection = Field(
+        CourseResults,
+        category_id=ID(),
+        course_ids=List(ID),
+        user_id=ID(),
+        first=Int(),
+        after=String(),
+    )
+    enrollments_connection = Field(
+        EnrollmentResults,
+        student_id=ID(),
+        course_id=ID(),
+        student_ids=List(ID),
+        first=Int(),
+        after=String(),
+    )
+
     # custom methods
     num_recent_sessions = Int(timeframe=LookbackTimeframe(required=True))
     popular_categories = List(
@@ -192,39 +298,22 @@ class Query(object):
         return None
 
     @login_required
+    @cached_field(Enrollment, Student)
     def resolve_courses(self, info, **kwargs):
-        category_id = kwargs.get("category_id")
-        course_ids = kwargs.get("course_ids")
-        user_id = kwargs.get("user_id")
+        return bounded_list(filter_courses(**kwargs), info)
 
-        if category_id:
-            return Course.objects.filter(course_category=category_id)
-        if course_ids:
-            course_ids = [
-                course_id
-                for course_id in course_ids
-                if Course.objects.filter(id=course_id).exists()
-            ]
-            return Course.objects.filter(id__in=course_ids)
-        if user_id:
-            if Instructor.objects.filter(user_id=user_id).exists():
-                return Course.objects.filter(instructor_id=user_id)
-            if Parent.objects.filter(user_id=user_id).exists():
-                parent = Parent.objects.get(user_id=user_id)
-                student_course_ids = set()
-                for student_id in parent.student_list:
-                    for enrollment in Enrollment.objects.filter(student=student_id):
-                        student_course_ids.add(enrollment.course.id)
-                return Course.objects.filter(id__in=student_course_ids)
-        return Course.objects.all()
+    @login_required
+    def resolve_courses_connection(self, info, first=None, after=None, **kwargs):
+        return connection_results(
+            CourseResults, filter_courses(**kwargs), info, first, after
+        )
 
     @login_required
+    @cached_field(TuitionRule)
     def resolve_course_categories(self, info, **kwargs):
-        categories = CourseCategory.objects.all()
-        sorted_categories = sorted(
-            categories, key=lambda t: -t.active_tuition_rule_count
-        )
-        return sorted_categories
+        return CourseCategory.objects.annotate(
+            active_rule_count=Count("tuitionrule", filter=Q(tuitionrule__retired=False))
+        ).order_by("-active_rule_count", "id")
 
     @login_required
     def resolve_course_notes(self, info, **kwargs):
@@ -234,20 +323,13 @@ class Query(object):
 
     @login_required
     def resolve_enrollments(self, info, **kwargs):
-        student_id = kwargs.get("student_id")
-        course_id = kwargs.get("course_id")
-        student_ids = kwargs.get("student_ids")
-        enrollment_list = []
-
-        queryset = Enrollment.objects
+        return bounded_list(filter_enrollments(**kwargs), info)
 
-        if student_id:
-            queryset = queryset.filter(student=student_id)
-        if course_id:
-            queryset = queryset.filter(course=course_id)
-        if student_ids:
-            enrollment_list = Enrollment.objects.filter(student_id__in=student_ids)
-        return enrollment_list or queryset.all()
+    @login_required
+    def resolve_enrollments_connection(self, info, first=None, after=None, **kwargs):
+        return connection_results(
+            EnrollmentResults, filter_enrollments(**kwargs), info, first, after
+        )
 
     @login_required
     def resolve_enrollment_notes(self, info, **kwargs):
@@ -1,3 +1,247 @@
-from django.test import TestCase
+import json
+from datetime import datetime, time, timedelta
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from graphql_jwt.shortcuts import get_token
+
+from account.models import Admin
+from course.models import Course
+from mainframe.field_cache import invalidate_written_models
+from mainframe.testing import QueryBudgetTestCase
+from scheduler.generation import generate_course_sessions
+from scheduler.models import Session
+from scheduler.tests import monday, seed_course, unscheduled_course
+from search.benchmark import seed_tenants
+
+COURSES = """
+query {
+    courses {
+        id
+        title
+        instructor { user { id firstName lastName } }
+        courseCategory { id name }
+        activeAvailabilityList { dayOfWeek startTime endTime }
+        enrollmentSet { id student { user { id firstName } } }
+    }
+}
+"""
+ENROLLMENTS = """
+query {
+    enrollments {
+        id
+        sessionsLeft
+        student { user { id firstName lastName } primaryParent { user { id } } }
+        course { id title instructor { user { id } } }
+    }
+}
+"""
+COURSES_CONNECTION = """
+query ($after: String) {
+    coursesConnection(first: 5, after: $after) {
+        total
+        endCursor
+        hasNextPage
+        results { id title instructor { user { id } } }
+    }
+}
+"""
+
+CREATE_COURSE = """
+mutation createCourse(
+    $id: ID
+    $title: String
+    $instructor: ID
+    $courseCategory: ID
+    $startDate: DateTime
+    $endDate: DateTime
+    $availabilities: [CourseAvailabilityInput]
+) {
+    createCourse(
+        id: $id
+        title: $title
+        courseType: CLASS
+        instructor: $instructor
+        courseCategory: $courseCategory
+        startDate: $startDate
+        endDate: $endDate
+        totalTuition: "400"
+        maxCapacity: 10
+        availabilities: $availabilities
+    ) {
+        created
+        course { id }
+    }
+}
+"""
+
+
+class CourseQueryBudgetTest(QueryBudgetTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        business_id = seed_tenants(
+            students=20, parents=10, instructors=3, courses=4, sessions_per_course=2
+        )[0]
+        cls.owner = Admin.objects.get(business=business_id).user
+
+    def grow(self):
+        seed_tenants(
+            students=60, parents=30, instructors=6, courses=12, sessions_per_course=2
+        )
+
+    def test_courses(self):
+        self.assertOperationBudget(self.owner, COURSES, 6)
+        self.grow()
+        data = self.assertOperationBudget(self.owner, COURSES, 6)
+        self.assertEqual(len(data["courses"]), 16)
+
+    def test_enrollments(self):
+        self.assertOperationBudget(self.owner, ENROLLMENTS, 4)
+        self.grow()
+        data = self.assertOperationBudget(self.owner, ENROLLMENTS, 4)
+        self.assertEqual(len(data["enrollments"]), 16 * 8)
+
+    def test_courses_connection(self):
+        self.grow()
+        course_ids = []
+        after = None
+        while True:
+            data = self.assertOperationBudget(
+                self.owner, COURSES_CONNECTION, 3, {"after": after}
+            )["coursesConnection"]
+            course_ids += [course["id"] for course in data["results"]]
+            if not data["hasNextPage"]:
+                break
+            after = data["endCursor"]
+        self.assertEqual(data["total"], 16)
+        self.assertEqual(len(set(course_ids)), 16)
+
+
+@override_settings(FIELD_CACHE=True)
+class CourseFieldCacheTest(QueryBudgetTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        business_id = seed_tenants(
+            students=20, parents=10, instructors=3, courses=4, sessions_per_course=2
+        )[0]
+        cls.business_id = business_id
+        cls.owner = Admin.objects.get(business=business_id).user
+
+    def test_hit_serves_the_cached_response(self):
+        data = self.graphql(self.owner, COURSES)
+        # authentication and the profile lookup for the cache scope
+        cached = self.assertOperationBudget(self.owner, COURSES, 3)
+        self.assertEqual(cached, data)
+
+    def test_writes_invalidate(self):
+        self.graphql(self.owner, COURSES)
+        course = Course.objects.filter(business=self.business_id).first()
+        course.title = "Renamed"
+        course.save()
+        titles = [
+            course["title"] for course in self.graphql(self.owner, COURSES)["courses"]
+        ]
+        self.assertIn("Renamed", titles)
+
+        # queryset updates send no signal
+        Course.objects.filter(pk=course.pk).update(title="Updated")
+        titles = [
+            course["title"] for course in self.graphql(self.owner, COURSES)["courses"]
+        ]
+        self.assertIn("Updated", titles)
+
+        # models reached through the selection
+        get_user_model().objects.filter(pk=course.instructor_id).update(
+            first_name="Zebulon"
+        )
+        names = [
+            course["instructor"]["user"]["firstName"]
+            for course in self.graphql(self.owner, COURSES)["courses"]
+            if course["instructor"]
+        ]
+        self.assertIn("Zebulon", names)
+
+    def test_writes_are_only_watched_while_on(self):
+        self.assertIn(invalidate_written_models, connection.execute_wrappers)
+        with override_settings(FIELD_CACHE=False):
+            self.assertNotIn(invalidate_written_models, connection.execute_wrappers)
+
+
+class CourseInstructorOverlapTest(QueryBudgetTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # the instructor teaches mondays from 9 to 10
+        cls.course = seed_course(weeks=4)
+        cls.owner = Admin.objects.get(business=cls.course.business).user
+
+    def create_course(self, start_time, end_time, **variables):
+        start = datetime.combine(self.course.start_date, time.min)
+        response = self.client.post(
+            "/graphql",
+            json.dumps(
+                {
+                    "query": CREATE_COURSE,
+                    "variables": {
+                        "title": "Calculus",
+                        "instructor": self.course.instructor_id,
+                        "courseCategory": self.course.course_category_id,
+                        "startDate": start.isoformat(),
+                        "endDate": (start + timedelta(weeks=2)).isoformat(),
+                        "availabilities": [
+                            {
+                                "dayOfWeek": "MONDAY",
+                                "startTime": start_time.isoformat(),
+                                "endTime": end_time.isoformat(),
+                            }
+                        ],
+                        **variables,
+                    },
+                }
+            ),
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"JWT {get_token(self.owner)}",
+        )
+        return response.json()
+
+    def test_create_double_booking_is_rolled_back(self):
+        content = self.create_course(time(9, 30), time(10, 30))
+        self.assertEqual(
+            content["errors"][0]["message"],
+            "Failed course creation mutation. "
+            "The instructor is already teaching a session at that time.",
+        )
+        self.assertFalse(Course.objects.filter(title="Calculus").exists())
+
+        content = self.create_course(time(10), time(11))
+        self.assertNotIn("errors", content)
+        self.assertEqual(
+            Session.objects.filter(
+                course=content["data"]["createCourse"]["course"]["id"]
+            ).count(),
+            3,
+        )
+
+    def test_update_double_booking_keeps_the_schedule(self):
+        other = unscheduled_course(weeks=4)
+        other.instructor_id = self.course.instructor_id
+        other.save()
+        generate_course_sessions(other, [monday(time(11), time(12))])
+        other.save()
+
+        content = self.create_course(
+            time(9, 30), time(10, 30), id=other.pk, title=other.title
+        )
+        self.assertEqual(
+            content["errors"][0]["message"],
+            "Failed course mutation. "
+            "The instructor is already teaching a session at that time.",
+        )
+        self.assertEqual(
+            set(
+                Session.objects.filter(course=other).values_list(
+                    "availability__start_time", flat=True
+                )
+            ),
+            {time(11)},
+        )
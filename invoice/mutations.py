@@ -9,6 +9,7 @@ from graphene import Field, ID, Int, List, String, Float, Boolean
 from graphql import GraphQLError
 
 from account.models import Admin, Parent
+from account.profiles import get_request_profile
 from invoice.models import Invoice, RegistrationCart
 from invoice.serializers import InvoiceSerializer
 from invoice.schema import PaymentChoiceEnum, InvoiceType, CartType
@@ -46,7 +47,7 @@ class CreateInvoice(graphene.Mutation):
 
         if data.get("pay_now", False) and data["method"] != "credit_card":
             # only admins may create a cash/check invoice to be paid now
-            if not Admin.objects.filter(user__id=info.context.user.id).exists():
+            if not isinstance(get_request_profile(info.context), Admin):
                 raise GraphQLError(
                     "Failed Mutation. Only Admins may create cash/check invoices to be paid now."
                 )
@@ -54,7 +55,7 @@ class CreateInvoice(graphene.Mutation):
         # update invoice
         if data.get("invoice_id"):
             # only admins may update an invoice
-            if not Admin.objects.filter(user__id=info.context.user.id).exists():
+            if not isinstance(get_request_profile(info.context), Admin):
                 raise GraphQLError("Failed Mutation. Only Admins may update Invoices.")
 
             # can only update method or payment_status
@@ -1,4 +1,4 @@
-from graphene import Enum, Field, Int, ID, List, ObjectType, String
+from graphene import Boolean, Enum, Field, Int, ID, List, ObjectType, String
 from graphene_django.types import DjangoObjectType
 from graphql_jwt.decorators import login_required
 
@@ -9,10 +9,12 @@ from datetime import datetime
 import arrow
 
 from account.models import Parent
+from account.profiles import get_request_profile
 from course.schema import EnrollmentType
 from course.models import Course, Enrollment
 from invoice.models import Invoice, Deduction, Registration, RegistrationCart
-from search.schema import paginate
+from mainframe.optimizer import optimize_queryset
+from mainframe.pagination import keyset_paginate, paginate, selects_field
 
 
 class PaymentChoiceEnum(Enum):
@@ -44,6 +46,8 @@ class CartType(DjangoObjectType):
 class InvoiceResults(ObjectType):
     results = List(InvoiceType, required=True)
     total = Int()
+    end_cursor = String()
+    has_next_page = Boolean()
 
 
 class Query(object):
@@ -60,6 +64,8 @@ class Query(object):
         payment_status=PaymentChoiceEnum(),
         page=Int(),
         page_size=Int(),
+        first=Int(),
+        after=String(),
     )
 
     deductions = List(DeductionType, invoice_id=ID())
@@ -111,7 +117,7 @@ class Query(object):
         payment_status = kwargs.get("payment_status")
 
         user_id = info.context.user.id
-        if Parent.objects.filter(user__id=user_id).exists():
+        if isinstance(get_request_profile(info.context), Parent):
             invoices = Invoice.objects.filter(parent__user__id=user_id)
         else:  # admin
             invoices = Invoice.objects.all()
@@ -138,9 +144,28 @@ class Query(object):
         if payment_status:
             invoices = invoices.filter(payment_status=payment_status)
 
-        invoices = invoices.order_by("-id")
-        paginated = paginate(invoices, kwargs.get("page"), kwargs.get("page_size"))
-        return InvoiceResults(results=paginated, total=invoices.count())
+        total = None
+        if selects_field(info, "total"):
+            total = invoices.count()
+
+        invoices = optimize_queryset(invoices, info, ("results",))
+
+        end_cursor = None
+        has_next_page = None
+        first = kwargs.get("first")
+        if first is not None:
+            paginated, end_cursor, has_next_page = keyset_paginate(
+                invoices, ("-id",), first, kwargs.get("after")
+            )
+        else:
+            invoices = invoices.order_by("-id")
+            paginated = paginate(invoices, kwargs.get("page"), kwargs.get("page_size"))
+        return InvoiceResults(
+            results=paginated,
+            total=total,
+            end_cursor=end_cursor,
+            has_next_page=has_next_page,
+        )
 
     def resolve_deductions(self, info, **kwargs):
         invoice_id = kwargs.get("invoice_id")
@@ -1,16 +1,18 @@
 import arrow
 import graphene
 from graphql import GraphQLError
-from graphene import DateTime, Field, ID, Int, List, String
+from graphene import Boolean, DateTime, Field, ID, Int, List, String
 from graphene_django.types import DjangoObjectType
 from django.contrib.admin.models import LogEntry
 from django.contrib.contenttypes.models import ContentType
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
 
 from graphql_jwt.decorators import login_required
 
 from account.models import Admin
 from account.mutations import AdminTypeEnum
-from search.schema import paginate
+from mainframe.pagination import keyset_paginate, paginate, selects_field
 
 
 class LogType(graphene.ObjectType):
@@ -25,6 +27,8 @@ class LogType(graphene.ObjectType):
 class LogTypeResults(graphene.ObjectType):
     results = List(LogType, required=True)
     total = Int()
+    end_cursor = String()
+    has_next_page = Boolean()
 
 
 class Query(object):
@@ -38,6 +42,8 @@ class Query(object):
         object_type=String(),
         page=Int(),
         page_size=Int(),
+        first=Int(),
+        after=String(),
         sort=String(),
     )
 
@@ -114,48 +120,51 @@ class Query(object):
                 raise GraphQLError("Failed query. Invalid sort type.")
 
             obj, order = sort.split("_")
-            # filter for obj
-            if obj == "date":
-                queryset = queryset.order_by("action_time")
-            elif obj == "user":
-
-                def get_admin_firstlast_name(log):
-                    obj = Admin.objects.get(user__id=log.user_id)
-                    return obj.user.first_name + " " + obj.user.last_name
-
-                queryset = sorted(queryset, key=get_admin_firstlast_name)
-            elif obj == "admin":
-
-                def get_admin_type(log):
-                    obj = Admin.objects.get(user__id=log.user_id)
-                    return obj.admin_type
-
-                queryset = sorted(queryset, key=get_admin_type)
-            elif obj == "action":
-                queryset = queryset.order_by("action_flag")
-            elif obj == "object":
-
-                def get_object_name(log):
-                    obj = ContentType.objects.get(id=log.content_type_id)
-                    return str(obj)
-
-                queryset = sorted(queryset, key=get_object_name)
+            # sort keys for obj
+            sort_fields = {
+                "date": ("action_time",),
+                "user": ("user__first_name", "user__last_name"),
+                "admin": ("admin_type",),
+                "action": ("action_flag",),
+                "object": ("content_type__model",),
+            }
+            if obj == "admin":
+                queryset = queryset.annotate(
+                    admin_type=Coalesce(
+                        Subquery(
+                            Admin.objects.filter(user=OuterRef("user")).values(
+                                "admin_type"
+                            )
+                        ),
+                        Value(""),
+                    )
+                )
 
-            # sort by order
+            # id breaks ties so the order is stable across pages
+            ordering = sort_fields[obj] + ("id",)
             if order == "desc":
-                # reverse list
-                if isinstance(queryset, list):
-                    queryset.reverse()
-                # reverse queryset
-                else:
-                    queryset = queryset.reverse()
+                ordering = tuple("-" + field for field in ordering)
+        else:
+            ordering = ("-action_time", "-id")
+
+        total_size = None
+        if selects_field(info, "total"):
+            total_size = queryset.count()
 
         # pagination
-        total_size = len(queryset)
-        page = kwargs.get("page")
-        page_size = kwargs.get("page_size")
-        if page and page_size:
-            queryset = paginate(queryset, page, page_size)
+        end_cursor = None
+        has_next_page = None
+        first = kwargs.get("first")
+        if first is not None:
+            queryset, end_cursor, has_next_page = keyset_paginate(
+                queryset, ordering, first, kwargs.get("after")
+            )
+        else:
+            queryset = queryset.order_by(*ordering)
+            page = kwargs.get("page")
+            page_size = kwargs.get("page_size")
+            if page and page_size:
+                queryset = paginate(queryset, page, page_size)
 
         # convert EntryLog to LogType
         flag_to_action = {1: "Add", 2: "Edit", 3: "Delete"}
@@ -172,4 +181,9 @@ class Query(object):
                 )
             )
 
-        return LogTypeResults(results=formatted_logs, total=total_size)
+        return LogTypeResults(
+            results=formatted_logs,
+            total=total_size,
+            end_cursor=end_cursor,
+            has_next_page=has_next_page,
+        )
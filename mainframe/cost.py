@@ -0,0 +1,173 @@
+from django.conf import settings
+from graphql import GraphQLError
+from graphql.language.ast import (
+    Field,
+    FragmentDefinition,
+    FragmentSpread,
+    IntValue,
+    OperationDefinition,
+    Variable,
+)
+from graphql.type import GraphQLList
+
+from mainframe.dataloaders import get_field_map
+
+
+# rows assumed for a list field without a page size argument
+DEFAULT_LIST_SIZE = 20
+PAGE_SIZE_ARGUMENTS = ("pageSize", "first", "limit", "size")
+
+
+def _field_weight(object_type, field_name):
+    """
+    Extra cost declared in the cost_weights of the graphene type, for
+    computed fields that run their own queries
+    """
+    graphene_type = getattr(object_type, "graphene_type", None)
+    weights = getattr(graphene_type, "cost_weights", None)
+    if not weights:
+        return 0
+    name, _ = get_field_map(graphene_type).get(field_name, (None, None))
+    return weights.get(name, 0)
+
+
+def _page_size(field, variables):
+    for argument in field.arguments or ():
+        if argument.name.value not in PAGE_SIZE_ARGUMENTS:
+            continue
+        value = argument.value
+        if isinstance(value, Variable):
+            size = (variables or {}).get(value.name.value)
+        elif isinstance(value, IntValue):
+            size = int(value.value)
+        else:
+            size = None
+        if isinstance(size, int) and size > 0:
+            return size
+    return None
+
+
+def _unwrap(field_type):
+    is_list = False
+    while hasattr(field_type, "of_type"):
+        is_list = is_list or isinstance(field_type, GraphQLList)
+        field_type = field_type.of_type
+    return field_type, is_list
+
+
+class QueryCostAnalysis:
+    """
+    Static estimate of how much work an operation asks for: one unit per
+    object resolved, list fields multiply the cost of their items by their
+    page size and computed fields add their declared weights. A page size
+    given to a paginated results object applies to the lists inside it
+    """
+
+    def __init__(self, schema, document_ast, variables=None):
+        self.schema = schema
+        self.variables = variables
+        self.fragments = {
+            definition.name.value: definition
+            for definition in document_ast.definitions
+            if isinstance(definition, FragmentDefinition)
+        }
+
+    def operation_cost(self, operation):
+        root_type = {
+            "query": self.schema.get_query_type,
+            "mutation": self.schema.get_mutation_type,
+            "subscription": self.schema.get_subscription_type,
+        }[operation.operation]()
+        return self.selection_cost(root_type, operation.selection_set)
+
+    def selection_cost(self, parent_type, selection_set, page_size=None):
+        """
+        Returns (cost, depth) of a selection set on parent_type
+        """
+        cost = 0
+        depth = 0
+        for selection in selection_set.selections:
+            if isinstance(selection, Field):
+                field_cost, field_depth = self.field_cost(
+                    parent_type, selection, page_size
+                )
+            else:
+                if isinstance(selection, FragmentSpread):
+                    selection = self.fragments[selection.name.value]
+                fragment_type = parent_type
+                if selection.type_condition is not None:
+                    fragment_type = self.schema.get_type(
+                        selection.type_condition.name.value
+                    )
+                field_cost, field_depth = self.selection_cost(
+                    fragment_type, selection.selection_set, page_size
+                )
+            cost += field_cost
+            depth = max(depth, field_depth)
+        return cost, depth
+
+    def field_cost(self, parent_type, field, page_size=None):
+        field_name = field.name.value
+        # introspection is answered from the schema
+        if field_name.startswith("__"):
+            return 0, 0
+        field_def = getattr(parent_type, "fields", {}).get(field_name)
+        if field_def is None:
+            return 0, 1
+
+        named_type, is_list = _unwrap(field_def.type)
+        cost = _field_weight(parent_type, field_name)
+        depth = 1
+        if field.selection_set is not None:
+            field_page_size = _page_size(field, self.variables)
+            child_cost, child_depth = self.selection_cost(
+                named_type,
+                field.selection_set,
+                None if is_list else field_page_size,
+            )
+            item_cost = 1 + child_cost
+            if is_list:
+                item_cost *= field_page_size or page_size or DEFAULT_LIST_SIZE
+            cost += item_cost
+            depth += child_depth
+        return cost, depth
+
+
+def analyze_query(schema, document_ast, operation_name=None, variables=None):
+    """
+    Returns the (cost, depth) of the operation that would be executed
+    """
+    operations = [
+        definition
+        for definition in document_ast.definitions
+        if isinstance(definition, OperationDefinition)
+    ]
+    if operation_name:
+        operations = [
+            operation
+            for operation in operations
+            if operation.name and operation.name.value == operation_name
+        ]
+    if len(operations) != 1:
+        # execution reports the missing or ambiguous operation
+        return 0, 0
+    return QueryCostAnalysis(schema, document_ast, variables).operation_cost(
+        operations[0]
+    )
+
+
+def check_query_cost(schema, document_ast, operation_name=None, variables=None):
+    """
+    Returns a GraphQLError if the operation is deeper or more expensive
+    than the configured limits
+    """
+    cost, depth = analyze_query(schema, document_ast, operation_name, variables)
+    max_depth = settings.GRAPHQL_MAX_QUERY_DEPTH
+    if max_depth is not None and depth > max_depth:
+        return GraphQLError(
+            f"Query depth {depth} exceeds the maximum depth of {max_depth}."
+        )
+    max_cost = settings.GRAPHQL_MAX_QUERY_COST
+    if max_cost is not None and cost > max_cost:
+        return GraphQLError(f"Query cost {cost} exceeds the budget of {max_cost}.")
+    return None
@@ -0,0 +1,179 @@
+from collections import defaultdict
+
+from django.db import models
+from graphene import Dynamic
+from graphene.utils.str_converters import to_camel_case
+from graphene_django.types import DjangoObjectType
+from promise import Promise
+from promise.dataloader import DataLoader
+
+
+class PrimaryKeyLoader(DataLoader):
+    """
+    Loads instances of a model by primary key, one query per batch
+    """
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def batch_load_fn(self, keys):
+        instances = self.model._base_manager.in_bulk(set(keys))
+        return Promise.resolve([instances.get(key) for key in keys])
+
+
+class ReverseForeignKeyLoader(DataLoader):
+    """
+    Loads the rows pointing to each key through a foreign key, grouped by
+    key in the related model's default ordering
+    """
+
+    def __init__(self, foreign_key):
+        super().__init__()
+        self.foreign_key = foreign_key
+
+    def batch_load_fn(self, keys):
+        related_model = self.foreign_key.model
+        groups = defaultdict(list)
+        for instance in related_model._default_manager.filter(
+            **{f"{self.foreign_key.name}__in": set(keys)}
+        ):
+            groups[getattr(instance, self.foreign_key.attname)].append(instance)
+        return Promise.resolve([groups.get(key, []) for key in keys])
+
+
+def get_loader(context, key, factory):
+    """
+    Loaders live on the request so batches and their caches span every
+    operation of the request and never leak across requests
+    """
+    loaders = getattr(context, "dataloaders", None)
+    if loaders is None:
+        loaders = {}
+        context.dataloaders = loaders
+    if key not in loaders:
+        loaders[key] = factory()
+    return loaders[key]
+
+
+def clear_loaders(context):
+    """
+    Drops the cached rows, e.g. after a mutation
+    """
+    context.dataloaders = {}
+
+
+_field_map_cache = {}
+_relation_cache = {}
+
+
+def get_field_map(graphene_type):
+    """
+    Maps the GraphQL names of a type's fields to their attribute name and
+    graphene field, relation fields are converted lazily so they are
+    resolved here
+    """
+    if graphene_type not in _field_map_cache:
+        field_map = {}
+        for name, field in graphene_type._meta.fields.items():
+            if isinstance(field, Dynamic):
+                field = field.get_type()
+            if field is not None:
+                field_map[field.name or to_camel_case(name)] = (name, field)
+        _field_map_cache[graphene_type] = field_map
+    return _field_map_cache[graphene_type]
+
+
+def has_default_resolver(graphene_type, name, field):
+    """
+    Explicit resolvers and sources keep their own behaviour, the resolve_id
+    every DjangoObjectType inherits just reads the primary key
+    """
+    resolver = getattr(graphene_type, f"resolve_{name}", None)
+    return field.resolver is None and (
+        resolver is None
+        or resolver == getattr(DjangoObjectType, f"resolve_{name}", None)
+    )
+
+
+def get_model_relation(model, name):
+    """
+    Returns ("forward", field) for foreign keys and one to one fields to a
+    primary key, ("reverse", foreign key) for reverse foreign keys and None
+    for anything else
+    """
+    for model_field in model._meta.get_fields():
+        if model_field.concrete and (model_field.many_to_one or model_field.one_to_one):
+            if model_field.name == name and model_field.target_field.primary_key:
+                return ("forward", model_field)
+        elif model_field.one_to_many and model_field.get_accessor_name() == name:
+            return ("reverse", model_field.field)
+    return None
+
+
+def get_batched_relation(graphene_type, field_name):
+    """
+    Returns the model relation behind a field that graphene-django resolves
+    with its default resolver, or None for every other field
+    """
+    cache_key = (graphene_type, field_name)
+    if cache_key not in _relation_cache:
+        relation = None
+        name, field = get_field_map(graphene_type).get(field_name, (None, None))
+        if field is not None and has_default_resolver(graphene_type, name, field):
+            relation = get_model_relation(graphene_type._meta.model, name)
+        _relation_cache[cache_key] = relation
+    return _relation_cache[cache_key]
+
+
+class DataLoaderMiddleware:
+    """
+    Batches foreign key and reverse foreign key fields of DjangoObjectTypes
+    across the whole execution instead of querying once per row
+    """
+
+    def resolve(self, next, root, info, **args):
+        graphene_type = getattr(info.parent_type, "graphene_type", None)
+        # mutations may change rows that a loader has already cached
+        if (
+            args
+            or info.context is None
+            or info.operation.operation == "mutation"
+            or not isinstance(root, models.Model)
+            or graphene_type is None
+            or not issubclass(graphene_type, DjangoObjectType)
+        ):
+            return next(root, info, **args)
+
+        relation = get_batched_relation(graphene_type, info.field_name)
+        if relation is None:
+            return next(root, info, **args)
+
+        kind, field = relation
+        if kind == "forward":
+            # already loaded through select_related or an earlier access
+            if field.is_cached(root):
+                return next(root, info, **args)
+            key = getattr(root, field.attname)
+            if key is None:
+                return None
+            loader = get_loader(
+                info.context,
+                ("pk", field.related_model),
+                lambda: PrimaryKeyLoader(field.related_model),
+            )
+        else:
+            # prefetch_related already filled the cache
+            prefetched = getattr(root, "_prefetched_objects_cache", {})
+            if field.remote_field.get_cache_name() in prefetched:
+                return next(root, info, **args)
+            key = getattr(root, field.target_field.attname)
+            # unsaved rows have nothing pointing at them yet
+            if key is None:
+                return []
+            loader = get_loader(
+                info.context,
+                ("reverse", field),
+                lambda: ReverseForeignKeyLoader(field),
+            )
+        return loader.load(key)
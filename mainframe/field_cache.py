@@ -0,0 +1,298 @@
+import hashlib
+import json
+import re
+import time
+from functools import lru_cache, wraps
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import setting_changed
+from django.db import connections, transaction
+from django.db.backends.signals import connection_created
+from graphene_django.types import DjangoObjectType
+from graphql.language.ast import FragmentSpread, InlineFragment
+from graphql.language.printer import print_ast
+from graphql.type.definition import (
+    GraphQLInterfaceType,
+    GraphQLList,
+    GraphQLNonNull,
+    GraphQLObjectType,
+    GraphQLUnionType,
+    get_named_type,
+)
+
+from account.profiles import get_request_profile
+from mainframe.dataloaders import get_field_map
+from mainframe.optimizer import get_selected_fields
+
+
+FIELD_CACHE_KEY = "field_cache:{digest}"
+FIELD_CACHE_TIMEOUT = 5 * 60
+MODEL_VERSION_KEY = "field_cache_version:{model}"
+WRITE_STATEMENT = re.compile(
+    r'\s*(?:INSERT\s+INTO|UPDATE|DELETE\s+FROM)\s+"?(\w+)"?', re.IGNORECASE
+)
+
+
+def _model_label(model):
+    return model._meta.label_lower
+
+
+@lru_cache(maxsize=None)
+def _table_models():
+    """
+    Maps each table to the labels of the models whose cached fields it
+    changes, many to many tables change the model declaring them
+    """
+    tables = {}
+    for model in apps.get_models(include_auto_created=True):
+        labels = tables.setdefault(model._meta.db_table, set())
+        labels.add(_model_label(model))
+        if model._meta.auto_created:
+            labels.add(_model_label(model._meta.auto_created))
+    return tables
+
+
+def bump_model_versions(labels):
+    version = time.time_ns()
+    cache.set_many(
+        {MODEL_VERSION_KEY.format(model=label): version for label in labels}, None
+    )
+
+
+def invalidate_written_models(execute, sql, params, many, context):
+    """
+    Execute wrapper moving the version of every model a statement writes,
+    so saves, queryset updates, bulk writes and raw SQL all invalidate the
+    cached fields built from them. Cached fields built from an older
+    version are never read again and expire
+    """
+    result = execute(sql, params, many, context)
+    match = WRITE_STATEMENT.match(sql)
+    labels = match and _table_models().get(match.group(1))
+    if labels:
+        bump_model_versions(labels)
+        # again once readers can see the write, a field cached in between
+        # holds the old rows
+        connection = context["connection"]
+        if connection.in_atomic_block:
+            transaction.on_commit(
+                lambda: bump_model_versions(labels), using=connection.alias
+            )
+    return result
+
+
+def _watch_writes(connection, enabled=True):
+    wrappers = connection.execute_wrappers
+    if enabled and invalidate_written_models not in wrappers:
+        wrappers.append(invalidate_written_models)
+    elif not enabled and invalidate_written_models in wrappers:
+        wrappers.remove(invalidate_written_models)
+
+
+def watch_connection_writes(sender, connection, **kwargs):
+    _watch_writes(connection, settings.FIELD_CACHE)
+
+
+def toggle_field_cache(setting, value, **kwargs):
+    if setting == "FIELD_CACHE":
+        for connection in connections.all():
+            _watch_writes(connection, value)
+
+
+# writes are only watched while the field cache is on
+connection_created.connect(
+    watch_connection_writes, dispatch_uid="field_cache_watch_connection_writes"
+)
+setting_changed.connect(toggle_field_cache, dispatch_uid="field_cache_toggle")
+if settings.FIELD_CACHE:
+    for connection in connections.all():
+        _watch_writes(connection)
+
+
+def _selected_models(graphene_type, selection_sets, info, models):
+    """
+    Collects the models of every DjangoObjectType the selection reaches
+    """
+    if issubclass(graphene_type, DjangoObjectType):
+        models.add(graphene_type._meta.model)
+    field_map = get_field_map(graphene_type)
+    for field_name, sub_selections in get_selected_fields(selection_sets, info).items():
+        if field_name not in field_map:
+            continue
+        field_type = field_map[field_name][1].type
+        while hasattr(field_type, "of_type"):
+            field_type = field_type.of_type
+        if isinstance(field_type, type) and issubclass(field_type, DjangoObjectType):
+            _selected_models(field_type, sub_selections, info, models)
+    return models
+
+
+def _is_replayable(graphql_type, selection_set, info):
+    """
+    Whether the selection only reaches object types, a cached interface or
+    union value cannot tell which object type it was
+    """
+    named_type = get_named_type(graphql_type)
+    if isinstance(named_type, (GraphQLInterfaceType, GraphQLUnionType)):
+        return False
+    if selection_set is None or not isinstance(named_type, GraphQLObjectType):
+        return True
+    for selection in selection_set.selections:
+        if isinstance(selection, FragmentSpread):
+            fragment = info.fragments[selection.name.value]
+            replayable = _is_replayable(named_type, fragment.selection_set, info)
+        elif isinstance(selection, InlineFragment):
+            replayable = _is_replayable(named_type, selection.selection_set, info)
+        else:
+            field = named_type.fields.get(selection.name.value)
+            # __typename is answered by the executor
+            replayable = field is None or _is_replayable(
+                field.type, selection.selection_set, info
+            )
+        if not replayable:
+            return False
+    return True
+
+
+def _replay(value, graphql_type):
+    """
+    Turns a cached response value back into what a resolver returns.
+    Objects become instances of their graphene type carrying their cached
+    fields for FieldCacheMiddleware, leaves are parsed so the executor
+    serializes them to the cached value again
+    """
+    if isinstance(graphql_type, GraphQLNonNull):
+        graphql_type = graphql_type.of_type
+    if value is None:
+        return None
+    if isinstance(graphql_type, GraphQLList):
+        return [_replay(item, graphql_type.of_type) for item in value]
+    if isinstance(graphql_type, GraphQLObjectType):
+        replayed = object.__new__(graphql_type.graphene_type)
+        replayed._field_cache_data = value
+        return replayed
+    return graphql_type.parse_value(value)
+
+
+class FieldCacheMiddleware:
+    """
+    Resolves the fields of objects replayed from the field cache to their
+    cached values, so a cache hit runs no resolver below the cached field
+    """
+
+    def resolve(self, next, root, info, **args):
+        data = getattr(root, "_field_cache_data", None)
+        if data is None:
+            return next(root, info, **args)
+        field_ast = info.field_asts[0]
+        response_key = (field_ast.alias or field_ast.name).value
+        return _replay(data.get(response_key), info.return_type)
+
+
+def _request_scope(context):
+    """
+    Business and role of the requesting user, memoized on the request
+    """
+    scope = getattr(context, "field_cache_scope", None)
+    if scope is None:
+        profile = get_request_profile(context)
+        if profile is None:
+            scope = (None, None)
+        else:
+            role = profile.account_type
+            if hasattr(profile, "admin_type"):
+                role = f"{role}:{profile.admin_type}"
+            scope = (profile.business_id, role)
+        context.field_cache_scope = scope
+    return scope
+
+
+def _cache_key(info, kwargs, models):
+    labels = sorted(_model_label(model) for model in models)
+    versions = cache.get_many(
+        [MODEL_VERSION_KEY.format(model=label) for label in labels]
+    )
+    document = [print_ast(field_ast) for field_ast in info.field_asts]
+    document += sorted(print_ast(fragment) for fragment in info.fragments.values())
+    key_data = {
+        "field": f"{info.parent_type}.{info.field_name}",
+        "document": document,
+        "arguments": kwargs,
+        # nested fields may take arguments from variables too
+        "variables": info.variable_values,
+        "scope": _request_scope(info.context),
+        "versions": [
+            versions.get(MODEL_VERSION_KEY.format(model=label)) for label in labels
+        ],
+    }
+    digest = hashlib.sha256(
+        json.dumps(key_data, sort_keys=True, default=str).encode()
+    ).hexdigest()
+    return FIELD_CACHE_KEY.format(digest=digest)
+
+
+def cached_field(*models, timeout=FIELD_CACHE_TIMEOUT):
+    """
+    Caches a root field's serialized response per business and role for
+    timeout seconds when settings.FIELD_CACHE is on. Entries depend on the
+    given models and on every model the selection reaches, a write to any
+    of them invalidates them. A hit is answered from the cache without
+    running the resolver or any resolver below it
+    """
+
+    def decorator(resolver):
+        @wraps(resolver)
+        def wrapper(root, info, **kwargs):
+            if not settings.FIELD_CACHE or not all(
+                _is_replayable(info.return_type, field_ast.selection_set, info)
+                for field_ast in info.field_asts
+            ):
+                return resolver(root, info, **kwargs)
+
+            dependencies = _selected_models(
+                get_named_type(info.return_type).graphene_type,
+                [field_ast.selection_set for field_ast in info.field_asts],
+                info,
+                set(models),
+            )
+            key = _cache_key(info, kwargs, dependencies)
+            cached = cache.get(key)
+            if cached is not None:
+                return _replay(cached[0], info.return_type)
+
+            # the serialized value only exists once the operation completes
+            if not hasattr(info.context, "field_cache_misses"):
+                info.context.field_cache_misses = []
+            info.context.field_cache_misses.append((key, list(info.path), timeout))
+            return resolver(root, info, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def store_cached_fields(context, result):
+    """
+    Caches the serialized values of the fields that missed the cache in the
+    operation that produced result, except those with errors
+    """
+    misses = getattr(context, "field_cache_misses", None)
+    if not misses:
+        return
+    context.field_cache_misses = []
+    if result is None or result.data is None:
+        return
+
+    error_paths = [getattr(error, "path", None) for error in result.errors or ()]
+    for key, path, timeout in misses:
+        if any(
+            error_path is None or error_path[: len(path)] == path
+            for error_path in error_paths
+        ):
+            continue
+        value = result.data
+        for response_key in path:
+            value = value[response_key]
+        cache.set(key, (value,), timeout)
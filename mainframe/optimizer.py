@@ -0,0 +1,171 @@
+from django.db.models import Prefetch
+from graphene_django.types import DjangoObjectType
+from graphql.language.ast import Field, FragmentSpread, InlineFragment
+
+from mainframe.dataloaders import get_field_map, has_default_resolver
+
+
+def get_selected_fields(selection_sets, info):
+    """
+    Groups the sub selections of the given selection sets by field name,
+    following fragments
+    """
+    fields = {}
+    pending = [selection_set for selection_set in selection_sets if selection_set]
+    while pending:
+        for selection in pending.pop().selections:
+            if isinstance(selection, Field):
+                fields.setdefault(selection.name.value, []).append(
+                    selection.selection_set
+                )
+            elif isinstance(selection, FragmentSpread):
+                pending.append(info.fragments[selection.name.value].selection_set)
+            elif isinstance(selection, InlineFragment):
+                pending.append(selection.selection_set)
+    return fields
+
+
+def _object_type(field):
+    field_type = field.type
+    while hasattr(field_type, "of_type"):
+        field_type = field_type.of_type
+    return field_type
+
+
+class QueryPlan:
+    """
+    Relations to join or prefetch and columns to load for one model, built
+    from the fields a query selects on its DjangoObjectType
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.select_related = set()
+        self.prefetch_related = {}
+        self.hinted_prefetches = set()
+        self.only = {model._meta.pk.name}
+        self.restricted = True
+
+    def load_all(self):
+        self.only.update(field.name for field in self.model._meta.concrete_fields)
+        self.restricted = False
+
+    def add_hint(self, hint):
+        self.select_related.update(hint.get("select_related", ()))
+        # computed fields read whole rows from their prefetches
+        self.hinted_prefetches.update(hint.get("prefetch_related", ()))
+        if "only" in hint:
+            self.only.update(hint["only"])
+        else:
+            self.load_all()
+
+    def add_selection(self, graphene_type, selection_sets, info):
+        field_map = get_field_map(graphene_type)
+        hints = getattr(graphene_type, "optimizer_hints", {})
+        for field_name, sub_selections in get_selected_fields(
+            selection_sets, info
+        ).items():
+            if field_name not in field_map:
+                continue
+            name, field = field_map[field_name]
+            if name in hints:
+                self.add_hint(hints[name])
+            elif not has_default_resolver(graphene_type, name, field):
+                # custom resolvers may read any column
+                self.load_all()
+            else:
+                self.add_model_field(name, field, sub_selections, info)
+
+    def add_model_field(self, name, field, sub_selections, info):
+        model_field = None
+        for candidate in self.model._meta.get_fields():
+            if candidate.name == name or (
+                candidate.auto_created
+                and not candidate.concrete
+                and candidate.get_accessor_name() == name
+            ):
+                model_field = candidate
+                break
+        if model_field is None:
+            self.load_all()
+            return
+        if not model_field.is_relation:
+            self.only.add(model_field.name)
+            return
+
+        child = QueryPlan(model_field.related_model)
+        object_type = _object_type(field)
+        if (
+            isinstance(object_type, type)
+            and issubclass(object_type, DjangoObjectType)
+            and object_type._meta.model is model_field.related_model
+        ):
+            child.add_selection(object_type, sub_selections, info)
+        else:
+            child.load_all()
+
+        if model_field.many_to_one or model_field.one_to_one:
+            # joins cover forward and reverse one to one relations alike
+            self.select_related.add(name)
+            if model_field.concrete:
+                self.only.add(model_field.name)
+            self.select_related.update(
+                f"{name}__{lookup}" for lookup in child.select_related
+            )
+            self.only.update(f"{name}__{column}" for column in child.only)
+            self.hinted_prefetches.update(
+                f"{name}__{lookup}" for lookup in child.hinted_prefetches
+            )
+            for lookup, queryset in child.prefetch_related.items():
+                self.prefetch_related[f"{name}__{lookup}"] = queryset
+        else:
+            if model_field.one_to_many:
+                # prefetching matches rows on the foreign key
+                child.only.add(model_field.field.name)
+            self.prefetch_related[name] = child.apply(
+                model_field.related_model._default_manager.all()
+            )
+
+    def apply(self, queryset):
+        if self.select_related:
+            queryset = queryset.select_related(*sorted(self.select_related))
+        prefetches = sorted(self.hinted_prefetches)
+        prefetches += [
+            Prefetch(lookup, queryset=related_queryset)
+            for lookup, related_queryset in sorted(self.prefetch_related.items())
+            if lookup not in self.hinted_prefetches
+        ]
+        if prefetches:
+            queryset = queryset.prefetch_related(*prefetches)
+        if self.restricted:
+            queryset = queryset.only(*sorted(self.only))
+        return queryset
+
+
+def optimize_queryset(queryset, info, path=()):
+    """
+    Joins, prefetches and restricts the columns of a list resolver's
+    queryset to match the selection set, path leads from the resolved field
+    to the list of model instances, e.g. ("results",) for paginated results
+    """
+    selection_sets = [field_ast.selection_set for field_ast in info.field_asts]
+    graphql_type = info.return_type
+    for field_name in path:
+        while hasattr(graphql_type, "of_type"):
+            graphql_type = graphql_type.of_type
+        graphql_type = graphql_type.fields[field_name].type
+        selection_sets = get_selected_fields(selection_sets, info).get(field_name, [])
+    while hasattr(graphql_type, "of_type"):
+        graphql_type = graphql_type.of_type
+
+    graphene_type = getattr(graphql_type, "graphene_type", None)
+    if (
+        graphene_type is None
+        or not issubclass(graphene_type, DjangoObjectType)
+        or graphene_type._meta.model is not queryset.model
+    ):
+        return queryset
+
+    plan = QueryPlan(queryset.model)
+    plan.add_selection(graphene_type, selection_sets, info)
+    return plan.apply(queryset)
@@ -0,0 +1,177 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+from graphql import GraphQLError
+from graphql.language import ast
+
+from mainframe.optimizer import optimize_queryset
+
+
+# rows of a connection page when the client does not ask for a size
+DEFAULT_PAGE_SIZE = 20
+
+
+def paginate(results, page, size):
+    # slicing keeps querysets lazy, so only the page is read as LIMIT/OFFSET
+    if page and size:
+        try:
+            size = int(size)
+            page = int(page)
+            if page > 0:
+                results = results[size * (page - 1) : size * page]
+            else:
+                return []
+        except ValueError:
+            pass
+    return results
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    def default(self, o):
+        # keep microseconds, DjangoJSONEncoder rounds to milliseconds
+        if isinstance(o, datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(
+        json.dumps(values, cls=CursorEncoder).encode()
+    ).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeError, ValueError):
+        raise GraphQLError("Failed query. Invalid cursor.")
+    if not isinstance(values, list):
+        raise GraphQLError("Failed query. Invalid cursor.")
+    return values
+
+
+def keyset_paginate(queryset, ordering, first, after=None):
+    """
+    Reads the `first` rows following the `after` cursor, seeking on the
+    ordering columns instead of skipping rows with an offset. The last
+    ordering field has to be unique and none of them may be null.
+
+    Returns the rows, the cursor of the last row and whether more follow
+    """
+    if first < 0:
+        raise GraphQLError("Failed query. first must not be negative.")
+
+    keys = [f"keyset_{i}" for i in range(len(ordering))]
+    descending = [field.startswith("-") for field in ordering]
+    queryset = queryset.annotate(
+        **{key: F(field.lstrip("-")) for key, field in zip(keys, ordering)}
+    ).order_by(*[("-" if desc else "") + key for key, desc in zip(keys, descending)])
+
+    if after:
+        values = decode_cursor(after)
+        if len(values) != len(keys):
+            raise GraphQLError("Failed query. Invalid cursor.")
+
+        # rows strictly after the cursor in (k1, k2, ...) order
+        seek = Q()
+        equal = Q()
+        for key, desc, value in zip(keys, descending, values):
+            lookup = "lt" if desc else "gt"
+            seek |= equal & Q(**{f"{key}__{lookup}": value})
+            equal &= Q(**{key: value})
+        queryset = queryset.filter(seek)
+
+    rows = list(queryset[: first + 1])
+    has_next_page = len(rows) > first
+    rows = rows[:first]
+
+    end_cursor = None
+    if rows:
+        end_cursor = encode_cursor([getattr(rows[-1], key) for key in keys])
+    return rows, end_cursor, has_next_page
+
+
+def selects_field(info, name):
+    """
+    True if the resolved field's selection set asks for `name`, used to
+    skip counting totals nobody reads
+    """
+
+    def search(selection_set):
+        for selection in selection_set.selections:
+            if isinstance(selection, ast.Field):
+                if selection.name.value == name:
+                    return True
+            elif isinstance(selection, ast.FragmentSpread):
+                fragment = info.fragments[selection.name.value]
+                if search(fragment.selection_set):
+                    return True
+            elif isinstance(selection, ast.InlineFragment):
+                if search(selection.selection_set):
+                    return True
+        return False
+
+    return any(
+        field_ast.selection_set is not None and search(field_ast.selection_set)
+        for field_ast in info.field_asts
+    )
+
+
+def connection_results(
+    results_type, queryset, info, first=None, after=None, ordering=("pk",)
+):
+    """
+    One keyset page of queryset for a connection field, ordered on indexed
+    columns so every page is an index range scan. results_type is the
+    field's results object with results, total, end_cursor and
+    has_next_page
+    """
+    if first is None:
+        first = DEFAULT_PAGE_SIZE
+    max_size = settings.GRAPHQL_MAX_LIST_SIZE
+    if max_size is not None and first > max_size:
+        raise GraphQLError(f"Failed query. first must not exceed {max_size}.")
+
+    total = None
+    if selects_field(info, "total"):
+        total = queryset.count()
+
+    queryset = optimize_queryset(queryset, info, ("results",))
+    results, end_cursor, has_next_page = keyset_paginate(
+        queryset, ordering, first, after
+    )
+    return results_type(
+        results=results,
+        total=total,
+        end_cursor=end_cursor,
+        has_next_page=has_next_page,
+    )
+
+
+def bounded_list(queryset, info, ordering=("pk",)):
+    """
+    Unpaginated list fields kept for older clients. Unordered querysets are
+    read in their connection's ordering. Lists longer than
+    GRAPHQL_MAX_LIST_SIZE fail instead of being cut off, clients page
+    through those with the connection field
+    """
+    queryset = optimize_queryset(queryset, info)
+    if not queryset.ordered:
+        queryset = queryset.order_by(*ordering)
+    max_size = settings.GRAPHQL_MAX_LIST_SIZE
+    if max_size is None:
+        return queryset
+
+    # one row past the limit tells a full list from a longer one
+    results = list(queryset[: max_size + 1])
+    if len(results) > max_size:
+        raise GraphQLError(
+            f"Failed query. More than {max_size} results, "
+            "use the connection field to page through them."
+        )
+    return results
@@ -4,12 +4,8 @@ from django_graphene_permissions.permissions import (
 )
 from rest_framework.permissions import BasePermission, SAFE_METHODS
 
-from account.models import (
-    Student,
-    Parent,
-    Instructor,
-    Admin,
-)
+from account.models import Instructor, Admin
+from account.profiles import get_profile, get_request_profile
 
 
 class ReadOnly(BasePermission):
@@ -25,30 +21,18 @@ class IsDev(BasePermission):
 class IsEmployee(GrapheneBasePermission):
     @staticmethod
     def has_permission(context):
-        user_id = context.user.id
-        return (
-            Admin.objects.filter(user_id=user_id).exists()
-            or Instructor.objects.filter(user_id=user_id).exists()
-        )
+        return isinstance(get_request_profile(context), (Admin, Instructor))
 
 
 class IsOwner(GrapheneBasePermission):
     @staticmethod
     def has_permission(context):
-        user_id = context.user.id
-        admin = Admin.objects.filter(user_id=user_id)
-        return admin.exists() and admin[0].admin_type == "owner"
+        profile = get_request_profile(context)
+        return isinstance(profile, Admin) and profile.admin_type == Admin.OWNER_TYPE
 
 
 def get_user_type_object(user_id):
-    if Student.objects.filter(user=user_id).exists():
-        return Student.objects.get(user=user_id)
-    if Instructor.objects.filter(user=user_id).exists():
-        return Instructor.objects.get(user=user_id)
-    if Parent.objects.filter(user=user_id).exists():
-        return Parent.objects.get(user=user_id)
-    if Admin.objects.filter(user=user_id).exists():
-        return Admin.objects.get(user=user_id)
+    return get_profile(user_id)
 
 
 def has_org_permission(user_id, resource_user_id):
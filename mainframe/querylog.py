@@ -0,0 +1,125 @@
+import json
+import logging
+import re
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+
+logger = logging.getLogger(__name__)
+
+# a query shape run this often by one operation is reported as an N+1
+REPEATED_QUERY_THRESHOLD = 3
+# transaction bookkeeping repeats by design
+IGNORED_STATEMENTS = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
+
+
+def query_shape(sql):
+    """
+    The query with its parameters and literals replaced, queries that only
+    differ in the rows they read have the same shape
+    """
+    shape = re.sub(r"'(?:[^']|'')*'", "?", sql)
+    shape = re.sub(r"%s|\b\d+(?:\.\d+)?\b", "?", shape)
+    # IN lists of any length
+    shape = re.sub(r"\(\s*\?(?:\s*,\s*\?)*\s*\)", "(?)", shape)
+    return " ".join(shape.split())
+
+
+class QueryLog:
+    """
+    SQL run inside a block, records queries as a database execute wrapper
+    """
+
+    def __init__(self, label=None):
+        self.label = label
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append(sql)
+        return execute(sql, params, many, context)
+
+    def __len__(self):
+        return len(self.queries)
+
+    def repeated(self, threshold=REPEATED_QUERY_THRESHOLD):
+        """
+        Maps each query shape run at least threshold times to its count
+        """
+        counts = Counter(
+            query_shape(sql)
+            for sql in self.queries
+            if not sql.lstrip().upper().startswith(IGNORED_STATEMENTS)
+        )
+        return {shape: count for shape, count in counts.items() if count >= threshold}
+
+    def report(self):
+        repeated = self.repeated()
+        message = json.dumps(
+            {
+                "label": self.label,
+                "queries": len(self.queries),
+                "repeated": [
+                    {"shape": shape, "count": count}
+                    for shape, count in sorted(
+                        repeated.items(), key=lambda item: -item[1]
+                    )
+                ],
+            }
+        )
+        if repeated:
+            logger.warning(message)
+        else:
+            logger.info(message)
+
+
+@contextmanager
+def record_queries(label=None):
+    log = QueryLog(label)
+    with connection.execute_wrapper(log):
+        yield log
+
+
+@contextmanager
+def log_operation(request, operation_name):
+    """
+    Logs the queries of one GraphQL operation when QueryLogMiddleware
+    handles the request
+    """
+    if getattr(request, "query_logs", None) is None:
+        yield None
+        return
+
+    with record_queries(f"graphql {operation_name or 'anonymous'}") as log:
+        try:
+            yield log
+        finally:
+            request.query_logs.append(log)
+            log.report()
+
+
+class QueryLogMiddleware:
+    """
+    Dev mode middleware enabled by QUERY_LOG, logs the query count of every
+    REST view and GraphQL operation and flags repeated query shapes
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "QUERY_LOG", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.query_logs = []
+        with record_queries() as log:
+            response = self.get_response(request)
+        # GraphQL views log each of their operations instead
+        if not request.query_logs:
+            resolver_match = getattr(request, "resolver_match", None)
+            view_name = resolver_match.view_name if resolver_match else request.path
+            log.label = f"{request.method} {view_name}"
+            log.report()
+        return response
@@ -68,6 +68,7 @@ COMMON_APPS = (
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "django_crontab",
     "django_filters",
     "graphene_django",
@@ -88,6 +89,7 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "django.middleware.common.BrokenLinkEmailsMiddleware",
     "django.middleware.common.CommonMiddleware",
+    "mainframe.querylog.QueryLogMiddleware",
 ]
 
 TEMPLATES = [
@@ -178,8 +180,44 @@ GRAPHENE = {
     "DJANGO_CHOICE_FIELD_ENUM_V3_NAMING": True,
     "MIDDLEWARE": [
         "graphql_jwt.middleware.JSONWebTokenMiddleware",
+        "mainframe.tracing.TracingMiddleware",
+        "mainframe.dataloaders.DataLoaderMiddleware",
+        "mainframe.field_cache.FieldCacheMiddleware",
     ],
 }
+# operations deeper or more expensive than this are rejected before execution
+GRAPHQL_MAX_QUERY_DEPTH = getattr(env, "GRAPHQL_MAX_QUERY_DEPTH", 10)
+GRAPHQL_MAX_QUERY_COST = getattr(env, "GRAPHQL_MAX_QUERY_COST", 10000)
+# largest page a connection serves, unpaginated list fields stop there too
+GRAPHQL_MAX_LIST_SIZE = getattr(env, "GRAPHQL_MAX_LIST_SIZE", 1000)
+# per resolver timings and query counts in responses and logs
+GRAPHQL_TRACING = getattr(env, "GRAPHQL_TRACING", False)
+# dev mode query counts and N+1 warnings for every view and operation
+QUERY_LOG = getattr(env, "QUERY_LOG", False)
+# course sessions are created this far ahead, later ones on demand
+SESSION_HORIZON_WEEKS = getattr(env, "SESSION_HORIZON_WEEKS", 12)
+# the default cache is local to each process, envs running several workers
+# point it at a shared backend such as redis or memcached
+CACHES = getattr(
+    env,
+    "CACHES",
+    {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+)
+# cached root fields are only invalidated in every worker when the cache is
+# shared, leave this off with the per process default
+FIELD_CACHE = getattr(env, "FIELD_CACHE", False)
+# seconds a registered persisted query is kept, clients register it again
+# once it is gone
+PERSISTED_QUERY_TIMEOUT = getattr(env, "PERSISTED_QUERY_TIMEOUT", 24 * 60 * 60)
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "mainframe.tracing": {"handlers": ["console"], "level": "INFO"},
+        "mainframe.querylog": {"handlers": ["console"], "level": "INFO"},
+    },
+}
 AUTHENTICATION_BACKENDS = [
     "graphql_jwt.backends.JSONWebTokenBackend",
     "social_core.backends.google.GoogleOAuth2",
@@ -210,6 +248,11 @@ CRONJOBS = [
         "comms.cronjobs.send_session_reminders.run",
         ">> /tmp/mainframe/comms/send_session_reminders.log",
     ),  # every day at 8 AM
+    (
+        "0 3 * * *",
+        "scheduler.cronjobs.materialize_sessions.run",
+        ">> /tmp/mainframe/scheduler/materialize_sessions.log",
+    ),  # every day at 3 AM
 ]
 CRONTAB_COMMAND_PREFIX = "DJANGO_ENV_MODULE=mainframe.settings.local"
 CRONTAB_COMMAND_SUFFIX = "2>&1"
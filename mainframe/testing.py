@@ -0,0 +1,62 @@
+import json
+from contextlib import contextmanager
+
+from django.core.cache import cache
+from django.test import TestCase
+from graphql_jwt.shortcuts import get_token
+
+from mainframe.querylog import record_queries
+
+
+class QueryBudgetTestCase(TestCase):
+    """
+    Runs GraphQL operations and REST views the way clients do and asserts
+    how many queries they may run, budgets hold regardless of row count
+    when no query shape repeats per row
+    """
+
+    def setUp(self):
+        super().setUp()
+        # cached fields would hide the queries under test
+        cache.clear()
+
+    @contextmanager
+    def assertQueryBudget(self, budget, allow_repeated=False):
+        """
+        Fails if the block runs more than budget queries or, unless
+        allow_repeated, runs any query shape per row
+        """
+        with record_queries() as log:
+            yield log
+
+        queries = "\n".join(log.queries)
+        self.assertLessEqual(
+            len(log),
+            budget,
+            f"{len(log)} queries exceed the budget of {budget}:\n{queries}",
+        )
+        if not allow_repeated:
+            repeated = log.repeated()
+            self.assertFalse(
+                repeated,
+                "Repeated queries:\n"
+                + "\n".join(f"{count}x {shape}" for shape, count in repeated.items()),
+            )
+
+    def graphql(self, user, query, variables=None):
+        """
+        Posts an operation to the GraphQL endpoint as user, returns its data
+        """
+        response = self.client.post(
+            "/graphql",
+            json.dumps({"query": query, "variables": variables}),
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"JWT {get_token(user)}",
+        )
+        content = response.json()
+        self.assertNotIn("errors", content, content.get("errors"))
+        return content["data"]
+
+    def assertOperationBudget(self, user, query, budget, variables=None):
+        with self.assertQueryBudget(budget):
+            return self.graphql(user, query, variables)
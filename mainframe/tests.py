@@ -0,0 +1,88 @@
+import hashlib
+import json
+import time
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, override_settings
+from graphql_jwt.shortcuts import get_token
+from promise import Promise
+
+from mainframe.testing import QueryBudgetTestCase
+from mainframe.tracing import Trace, TracingMiddleware
+
+
+class TracingMiddlewareTest(SimpleTestCase):
+    def setUp(self):
+        self.trace = Trace()
+        self.info = SimpleNamespace(
+            context=SimpleNamespace(graphql_trace=self.trace),
+            path=["courses", 0, "instructor"],
+            parent_type="CourseType",
+            field_name="instructor",
+            return_type="InstructorType",
+        )
+
+    def test_promise_ends_when_it_resolves(self):
+        pending = Promise()
+        result = TracingMiddleware().resolve(
+            lambda root, info: pending, None, self.info
+        )
+        (record,) = self.trace.resolvers
+        self.assertEqual(record["duration"], 0)
+
+        time.sleep(0.01)
+        pending.do_resolve("instructor")
+        self.assertEqual(result.get(), "instructor")
+        self.assertGreaterEqual(record["duration"], 10**7)
+
+    def test_rejected_promise_ends_too(self):
+        pending = Promise()
+        result = TracingMiddleware().resolve(
+            lambda root, info: pending, None, self.info
+        )
+        pending.do_reject(ValueError("Failed query."))
+        with self.assertRaises(ValueError):
+            result.get()
+        self.assertGreater(self.trace.resolvers[0]["duration"], 0)
+
+    def test_value_ends_on_return(self):
+        TracingMiddleware().resolve(lambda root, info: "instructor", None, self.info)
+        self.assertGreater(self.trace.resolvers[0]["duration"], 0)
+
+
+TYPENAME = "{ __typename }"
+TYPENAME_HASH = hashlib.sha256(TYPENAME.encode()).hexdigest()
+
+
+class PersistedQueryTest(QueryBudgetTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="registrar")
+
+    def post(self, query=None, user=None):
+        headers = {}
+        if user is not None:
+            headers["HTTP_AUTHORIZATION"] = f"JWT {get_token(user)}"
+        extensions = {"persistedQuery": {"version": 1, "sha256Hash": TYPENAME_HASH}}
+        return self.client.post(
+            "/graphql",
+            json.dumps({"query": query, "extensions": extensions}),
+            content_type="application/json",
+            **headers,
+        ).json()
+
+    def test_signed_in_users_register_queries(self):
+        self.assertEqual(
+            self.post(TYPENAME, self.user)["data"], {"__typename": "Query"}
+        )
+        self.assertEqual(self.post()["data"], {"__typename": "Query"})
+
+    def test_anonymous_queries_run_without_registering(self):
+        self.assertEqual(self.post(TYPENAME)["data"], {"__typename": "Query"})
+        self.assertEqual(self.post()["errors"][0]["message"], "PersistedQueryNotFound")
+
+    @override_settings(PERSISTED_QUERY_TIMEOUT=0)
+    def test_registered_queries_expire(self):
+        self.post(TYPENAME, self.user)
+        self.assertEqual(self.post()["errors"][0]["message"], "PersistedQueryNotFound")
@@ -0,0 +1,141 @@
+import json
+import logging
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from promise import Promise, is_thenable
+
+
+logger = logging.getLogger(__name__)
+
+
+class Trace:
+    """
+    Wall time and SQL query count of every resolver in one execution,
+    counts queries as a database execute wrapper
+    """
+
+    def __init__(self):
+        self.start_time = timezone.now()
+        self.start = time.perf_counter_ns()
+        self.end_time = None
+        self.duration = None
+        self.queries = 0
+        self.resolvers = []
+        self.current = None
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries += 1
+        if self.current is not None:
+            self.current["queries"] += 1
+        return execute(sql, params, many, context)
+
+    def finish(self):
+        self.end_time = timezone.now()
+        self.duration = time.perf_counter_ns() - self.start
+
+    def as_extension(self):
+        """
+        Apollo tracing format with the query count of each resolver added
+        """
+        return {
+            "version": 1,
+            "startTime": self.start_time.isoformat(),
+            "endTime": self.end_time.isoformat(),
+            "duration": self.duration,
+            "queries": self.queries,
+            "execution": {"resolvers": self.resolvers},
+        }
+
+    def log(self, operation_name):
+        logger.info(
+            json.dumps(
+                {
+                    "operation": operation_name,
+                    "duration_ms": round(self.duration / 1e6, 3),
+                    "queries": self.queries,
+                    # resolvers that ran sql are the ones worth looking at
+                    "resolvers": [
+                        {
+                            "path": ".".join(str(key) for key in resolver["path"]),
+                            "duration_ms": round(resolver["duration"] / 1e6, 3),
+                            "queries": resolver["queries"],
+                        }
+                        for resolver in self.resolvers
+                        if resolver["queries"]
+                    ],
+                }
+            )
+        )
+
+
+@contextmanager
+def trace_request(request, operation_name=None):
+    """
+    Traces the execution inside the block when GRAPHQL_TRACING is on and
+    leaves the finished trace on the request
+    """
+    if not getattr(settings, "GRAPHQL_TRACING", False):
+        yield None
+        return
+
+    trace = Trace()
+    request.graphql_trace = trace
+    try:
+        with connection.execute_wrapper(trace):
+            yield trace
+    finally:
+        trace.finish()
+        trace.log(operation_name)
+
+
+class TracingMiddleware:
+    """
+    Records each resolver's path, wall time and query count on the trace
+    of the request, a resolver returning a promise ends when it settles.
+    Does nothing for untraced requests
+    """
+
+    def resolve(self, next, root, info, **args):
+        trace = getattr(info.context, "graphql_trace", None)
+        if trace is None:
+            return next(root, info, **args)
+
+        record = {
+            "path": list(info.path),
+            "parentType": str(info.parent_type),
+            "fieldName": info.field_name,
+            "returnType": str(info.return_type),
+            "startOffset": time.perf_counter_ns() - trace.start,
+            "duration": 0,
+            "queries": 0,
+        }
+
+        def finish(value):
+            record["duration"] = (
+                time.perf_counter_ns() - trace.start - record["startOffset"]
+            )
+            return value
+
+        def fail(error):
+            finish(None)
+            raise error
+
+        parent = trace.current
+        trace.current = record
+        try:
+            result = next(root, info, **args)
+        except Exception:
+            finish(None)
+            raise
+        finally:
+            trace.current = parent
+            trace.resolvers.append(record)
+        # dataloader fields return a promise that resolves once their batch
+        # has loaded, they end then
+        if is_thenable(result):
+            return Promise.resolve(result).then(finish, fail)
+        return finish(result)
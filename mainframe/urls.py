@@ -5,9 +5,9 @@ from django.urls import include, path
 
 from graphene_django.views import GraphQLView
 from rest_framework.authtoken import views as auth_views
-from graphene_file_upload.django import FileUploadGraphQLView
 
 from mainframe.api_root import views
+from mainframe.views import CachedDocumentBackend, CachedDocumentGraphQLView
 
 
 GraphQLView.graphiql_template = "graphene_graphiql_explorer/graphiql.html"
@@ -21,7 +21,12 @@ urlpatterns = [
     path("payment/", include("invoice.urls")),
     path("onboarding/", include("onboarding.urls")),
     path("admin/", admin.site.urls),
-    path("graphql", FileUploadGraphQLView.as_view(graphiql=True)),
+    path(
+        "graphql",
+        CachedDocumentGraphQLView.as_view(
+            graphiql=True, backend=CachedDocumentBackend()
+        ),
+    ),
     url(r"^$", views.api_root, name="api_root"),
     url(r"^auth_token/", auth_views.obtain_auth_token),
 ]
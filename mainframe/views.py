@@ -0,0 +1,204 @@
+import hashlib
+import json
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponseBadRequest
+from graphene_django.views import HttpError
+from graphene_file_upload.django import FileUploadGraphQLView
+from graphql import GraphQLError
+from graphql.backend.base import GraphQLDocument
+from graphql.backend.core import GraphQLCoreBackend
+from graphql.execution import ExecutionResult, execute
+from graphql.language.base import parse
+from graphql.validation import validate
+from graphql_jwt.exceptions import JSONWebTokenError
+from graphql_jwt.shortcuts import get_user_by_token
+from graphql_jwt.utils import get_credentials
+
+from mainframe.cache import LRUCache
+from mainframe.cost import check_query_cost
+from mainframe.dataloaders import clear_loaders
+from mainframe.field_cache import store_cached_fields
+from mainframe.querylog import log_operation
+from mainframe.tracing import trace_request
+
+
+# parsed documents kept per process, the frontend sends a few dozen
+DOCUMENT_CACHE_SIZE = 256
+PERSISTED_QUERY_CACHE_KEY = "persisted_query:{query_hash}"
+MAX_BATCH_SIZE = 20
+
+
+def _invalid_result(errors, *args, **kwargs):
+    return ExecutionResult(errors=errors, invalid=True)
+
+
+def _execute_within_budget(schema, document_ast, *args, **kwargs):
+    error = check_query_cost(
+        schema,
+        document_ast,
+        kwargs.get("operation_name"),
+        kwargs.get("variable_values"),
+    )
+    if error is not None:
+        return ExecutionResult(errors=[error], invalid=True)
+    return execute(schema, document_ast, *args, **kwargs)
+
+
+class CachedDocumentBackend(GraphQLCoreBackend):
+    """
+    Parses and validates each distinct query string once and keeps the
+    resulting documents in an LRU cache keyed by the query's sha256, valid
+    documents are checked against the query cost budget on every execution
+    """
+
+    def __init__(self, executor=None, maxsize=DOCUMENT_CACHE_SIZE):
+        super().__init__(executor=executor)
+        self.documents = LRUCache(maxsize)
+
+    def document_from_string(self, schema, document_string):
+        if not isinstance(document_string, str):
+            return super().document_from_string(schema, document_string)
+
+        key = (id(schema), hashlib.sha256(document_string.encode()).hexdigest())
+        document = self.documents.get(key)
+        if document is None:
+            document_ast = parse(document_string)
+            validation_errors = validate(schema, document_ast)
+            if validation_errors:
+                execute_document = partial(_invalid_result, validation_errors)
+            else:
+                execute_document = partial(
+                    _execute_within_budget,
+                    schema,
+                    document_ast,
+                    **self.execute_params,
+                )
+            document = GraphQLDocument(
+                schema=schema,
+                document_string=document_string,
+                document_ast=document_ast,
+                execute=execute_document,
+            )
+            self.documents.set(key, document)
+        return document
+
+
+def get_persisted_query_hash(request, data, batch=False):
+    """
+    Reads the sha256 of a persisted query from the id parameter or from the
+    persistedQuery extension Apollo clients send, in a batch the id names
+    the operation instead
+    """
+    if not batch:
+        query_hash = request.GET.get("id") or data.get("id")
+        if query_hash:
+            return query_hash
+
+    extensions = request.GET.get("extensions") or data.get("extensions")
+    if isinstance(extensions, str):
+        try:
+            extensions = json.loads(extensions)
+        except ValueError:
+            return None
+    if isinstance(extensions, dict):
+        persisted_query = extensions.get("persistedQuery")
+        if isinstance(persisted_query, dict):
+            return persisted_query.get("sha256Hash")
+    return None
+
+
+def can_register_persisted_query(request):
+    """
+    Only signed in users register persisted queries so anonymous clients
+    cannot fill the cache with documents of their own
+    """
+    if request.user.is_authenticated:
+        return True
+    token = get_credentials(request)
+    if token is None:
+        return False
+    try:
+        return get_user_by_token(token, request) is not None
+    except JSONWebTokenError:
+        return False
+
+
+class CachedDocumentGraphQLView(FileUploadGraphQLView):
+    """
+    Accepts persisted queries, a signed in request carrying a query and its
+    sha256 registers the query and later requests only need to send the
+    hash until it expires.
+    A JSON array body is a batch of operations executed in order on the
+    same request, so they share authentication and DataLoaders. Traced
+    executions get their trace in the response's extensions
+    """
+
+    def parse_body(self, request):
+        if (
+            self.get_content_type(request) == "application/json"
+            and request.body.lstrip()[:1] == b"["
+        ):
+            self.batch = True
+        data = super().parse_body(request)
+        if self.batch and len(data) > MAX_BATCH_SIZE:
+            raise HttpError(
+                HttpResponseBadRequest(
+                    f"Batches are limited to {MAX_BATCH_SIZE} operations."
+                )
+            )
+        return data
+
+    def execute_graphql_request(
+        self, request, data, query, variables, operation_name, show_graphiql=False
+    ):
+        query_hash = get_persisted_query_hash(request, data, self.batch)
+        if query_hash:
+            key = PERSISTED_QUERY_CACHE_KEY.format(query_hash=query_hash)
+            if query:
+                if hashlib.sha256(query.encode()).hexdigest() != query_hash:
+                    return ExecutionResult(
+                        errors=[GraphQLError("Provided sha does not match query")],
+                        invalid=True,
+                    )
+                if can_register_persisted_query(request):
+                    cache.set(key, query, settings.PERSISTED_QUERY_TIMEOUT)
+            else:
+                query = cache.get(key)
+                if query is None:
+                    return ExecutionResult(
+                        errors=[GraphQLError("PersistedQueryNotFound")], invalid=True
+                    )
+
+        with trace_request(request, operation_name), log_operation(
+            request, operation_name
+        ):
+            result = super().execute_graphql_request(
+                request, data, query, variables, operation_name, show_graphiql
+            )
+        store_cached_fields(request, result)
+        # later operations of a batch must not read rows a mutation changed
+        if (
+            self.batch
+            and query
+            and self.get_operation_type(query, operation_name) == "mutation"
+        ):
+            clear_loaders(request)
+        return result
+
+    def get_operation_type(self, query, operation_name):
+        try:
+            document = self.backend.document_from_string(self.schema, query)
+        except Exception:
+            return None
+        return document.get_operation_type(operation_name)
+
+    def json_encode(self, request, d, pretty=False):
+        trace = getattr(request, "graphql_trace", None)
+        if trace is not None:
+            # each trace belongs to the response of its own operation
+            del request.graphql_trace
+            d = dict(d, extensions={"tracing": trace.as_extension()})
+        return super().json_encode(request, d, pretty)
@@ -33,7 +33,6 @@ from course.models import (
     Course,
     Enrollment,
 )
-from course.mutations import create_availabilities_and_sessions
 from comms.models import Email, ParentNotificationSettings
 from comms.templates import WELCOME_PARENT_TEMPLATE
 from onboarding.models import Business, BusinessAvailability
@@ -45,6 +44,8 @@ from onboarding.schema import (
     create_enrollment_templates,
     workbook_to_base64,
 )
+from scheduler.conflicts import instructor_overlap_errors
+from scheduler.generation import generate_course_sessions
 
 COURSE_SHEET_NAME_PATTERN = re.compile("^(.+) - (\d+)$")
 EMAIL_PATTERN = re.compile("[^@]+@[^@]+\.[^@]+")
@@ -294,6 +295,13 @@ def check_account_sheet_row(row, account_type, business_id=None):
 
 
 # preliminary course spreadsheet row checks
+def parse_tuition(value):
+    # cells are read as floats, going through str keeps the cents as typed
+    if value is None:
+        return None
+    return decimal.Decimal(str(value))
+
+
 def check_course_sheet_row(
     row, model_type, business_id=None, dropdown_subject_names=set()
 ):
@@ -325,6 +333,11 @@ def check_course_sheet_row(
         ]:
             return "There's been an invalid academic subject found in column F. Please change it to one of the academic levels in the dropdown menu."
 
+        try:
+            parse_tuition(row.get("Total Tuition"))
+        except decimal.InvalidOperation:
+            return "There's an invalid Total Tuition. Please change it to a number."
+
         if (
             not str(row.get("Enrollment Capacity (>=4)")).isdigit()
             or int(row.get("Enrollment Capacity (>=4)")) < 4
@@ -362,7 +375,7 @@ class UploadAccountsMutation(graphene.Mutation):
         business_id = owner.business.id
         business = Business.objects.get(id=business_id)
 
-        xls = pd.ExcelFile(accounts.read())
+        xls = pd.ExcelFile(accounts)
 
         # check all spreadsheets exist
         account_names = ["Parents", "Students", "Instructors"]
@@ -404,7 +417,7 @@ class UploadAccountsMutation(graphene.Mutation):
 
         # create parents
         parents_df = parents_df.dropna(how="all")
-        parents_df = parents_df.where(
+        parents_df = parents_df.astype(object).where(
             pd.notnull(parents_df), None
         )  # cast np.Nan to None
         parents_error_df = []
@@ -465,7 +478,7 @@ class UploadAccountsMutation(graphene.Mutation):
 
         # create students
         students_df = students_df.dropna(how="all")
-        students_df = students_df.where(
+        students_df = students_df.astype(object).where(
             pd.notnull(students_df), None
         )  # cast np.Nan to None
         students_error_df = []
@@ -515,7 +528,7 @@ class UploadAccountsMutation(graphene.Mutation):
 
         # create instructors
         instructors_df = instructors_df.dropna(how="all")
-        instructors_df = instructors_df.where(
+        instructors_df = instructors_df.astype(object).where(
             pd.notnull(instructors_df), None
         )  # cast np.Nan to None
         instructors_error_df = []
@@ -628,7 +641,7 @@ class UploadCoursesMutation(graphene.Mutation):
         business_id = owner.business.id
         business = Business.objects.get(id=business_id)
 
-        xls = pd.ExcelFile(courses.read())
+        xls = pd.ExcelFile(courses)
 
         # check all spreadsheets exist
         spreadsheet_names = ["Step 1 - Subject Categories", "Step 2 - Classes"]
@@ -664,7 +677,7 @@ class UploadCoursesMutation(graphene.Mutation):
 
         # create subjects
         subjects_df = subjects_df.dropna(how="all")
-        subjects_df = subjects_df.where(
+        subjects_df = subjects_df.astype(object).where(
             pd.notnull(subjects_df), None
         )  # cast np.Nan to None
         subjects_error_df = []
@@ -714,7 +727,7 @@ class UploadCoursesMutation(graphene.Mutation):
         }
 
         courses_df = courses_df.dropna(how="all")
-        courses_df = courses_df.where(
+        courses_df = courses_df.astype(object).where(
             pd.notnull(courses_df), None
         )  # cast np.Nan to None
 
@@ -738,7 +751,7 @@ class UploadCoursesMutation(graphene.Mutation):
                     title=row.get("Course Name"),
                     course_category=CourseCategory.objects.get(name=row.get("Subject")),
                     description=row.get("Course Description"),
-                    total_tuition=row.get("Total Tuition"),
+                    total_tuition=parse_tuition(row.get("Total Tuition")),
                     instructor=Instructor.objects.get(
                         user__email=row.get("Instructor")
                     ),
@@ -770,9 +783,17 @@ class UploadCoursesMutation(graphene.Mutation):
                 if row.get(f"Session Day {i+1}")
             ]
             # populate sessions and availabilities
-            course_availabilities = create_availabilities_and_sessions(
-                course, availabilities
-            )
+            try:
+                with instructor_overlap_errors("Failed course upload"):
+                    course_availabilities = generate_course_sessions(
+                        course, availabilities
+                    )
+            except GraphQLError as e:
+                course.delete()
+                courses_error_df.append(row.to_dict())
+                courses_error_df[-1]["Instructor"] = orig_instructor_field
+                courses_error_df[-1]["Error Message"] = str(e)
+                continue
 
             # calculate total hours across all sessions
             total_hours = decimal.Decimal("0.0")
@@ -852,7 +873,7 @@ class UploadEnrollmentsMutation(graphene.Mutation):
         overall_total = 0
         total_errors = 0
 
-        xls = pd.ExcelFile(enrollments.read())
+        xls = pd.ExcelFile(enrollments)
 
         # check all course spreadsheets reflect courses that exist
         def isValidCourseSheetName(sheet_name):
@@ -11,6 +11,8 @@ from openpyxl.worksheet.datavalidation import DataValidation
 from tempfile import NamedTemporaryFile
 import base64
 
+from account.profiles import get_request_profile
+from mainframe.field_cache import cached_field
 from mainframe.permissions import IsOwner
 from django.conf import settings
 from django_graphene_permissions import permissions_checker
@@ -554,18 +556,11 @@ class Query(object):
     stripe_onboarding_status = Boolean()
 
     @login_required
+    @cached_field(Student, Instructor, Parent, Admin)
     def resolve_business(self, info, **kwargs):
-        user_id = info.context.user.id
-
-        account_queries = [
-            Student.objects.filter(user__id=user_id),
-            Instructor.objects.filter(user__id=user_id),
-            Parent.objects.filter(user__id=user_id),
-            Admin.objects.filter(user__id=user_id),
-        ]
-        account = next(query.first() for query in account_queries if query.exists())
+        account = get_request_profile(info.context)
 
-        return Business.objects.get(id=account.business.id)
+        return Business.objects.get(id=account.business_id)
 
     @login_required
     @permissions_checker([IsOwner])
@@ -1,3 +1,108 @@
-from django.test import TestCase
+import json
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from io import BytesIO
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from graphql_jwt.shortcuts import get_token
+
+from account.models import Admin
+from course.models import Course
+from mainframe.testing import QueryBudgetTestCase
+from onboarding.schema import create_course_templates
+from scheduler.models import Session
+from scheduler.tests import seed_course
+
+UPLOAD_COURSES = """
+mutation uploadCourses($courses: Upload!) {
+    uploadCourses(courses: $courses) {
+        totalSuccess
+        totalFailure
+    }
+}
+"""
+
+
+class UploadCoursesTest(QueryBudgetTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # the instructor teaches mondays from 9 to 10
+        cls.course = seed_course(weeks=4)
+        cls.owner = Admin.objects.get(business=cls.course.business).user
+
+    def workbook(self, *courses):
+        """
+        The course upload template with one subject and a course row of
+        (title, start_time, end_time) or (title, start_time, end_time,
+        tuition) for each course, all on mondays
+        """
+        wb = create_course_templates(self.course.business_id)
+        wb.get_sheet_by_name("Step 1 - Subject Categories").append(
+            ["Calculus", "Limits and derivatives"]
+        )
+        start = datetime.combine(self.course.start_date, time.min)
+        instructor = self.course.instructor.user
+        course_ws = wb.get_sheet_by_name("Step 2 - Classes")
+        for title, start_time, end_time, *tuition in courses:
+            course_ws.append(
+                [
+                    title,
+                    f"{instructor.first_name} ({instructor.email})",
+                    "Y",
+                    "Calculus",
+                    "Limits and derivatives",
+                    "High School",
+                    "Online",
+                    tuition[0] if tuition else 400,
+                    10,
+                    start,
+                    start + timedelta(weeks=2),
+                    "Monday",
+                    start_time,
+                    end_time,
+                ]
+            )
+        content = BytesIO()
+        wb.save(content)
+        return content.getvalue()
+
+    def upload(self, workbook):
+        response = self.client.post(
+            "/graphql",
+            {
+                "operations": json.dumps(
+                    {"query": UPLOAD_COURSES, "variables": {"courses": None}}
+                ),
+                "map": json.dumps({"0": ["variables.courses"]}),
+                "0": SimpleUploadedFile("courses.xlsx", workbook),
+            },
+            HTTP_AUTHORIZATION=f"JWT {get_token(self.owner)}",
+        )
+        content = response.json()
+        self.assertNotIn("errors", content, content.get("errors"))
+        return content["data"]["uploadCourses"]
+
+    def test_double_booked_course_is_reported(self):
+        data = self.upload(
+            self.workbook(
+                ("Calculus AB", time(9, 30), time(10, 30)),
+                ("Calculus BC", time(10), time(11)),
+            )
+        )
+        self.assertEqual(data, {"totalSuccess": 2, "totalFailure": 1})
+        self.assertFalse(Course.objects.filter(title="Calculus AB").exists())
+        self.assertEqual(Session.objects.filter(course__title="Calculus BC").count(), 3)
+
+    def test_invalid_tuition_is_reported(self):
+        data = self.upload(
+            self.workbook(
+                ("Calculus AB", time(10), time(11), None),
+                ("Calculus BC", time(11), time(12), "four hundred"),
+                ("Calculus III", time(12), time(13), 399.99),
+            )
+        )
+        self.assertEqual(data, {"totalSuccess": 2, "totalFailure": 2})
+        self.assertEqual(
+            Course.objects.get(title="Calculus III").total_tuition,
+            Decimal("399.99"),
+        )
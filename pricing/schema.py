@@ -18,6 +18,8 @@ from course.models import Course
 from account.models import Parent
 
 from course.mutations import AcademicLevelEnum
+from mainframe.field_cache import cached_field
+from mainframe.optimizer import optimize_queryset
 
 
 class AmountTypeEnum(graphene.Enum):
@@ -279,12 +281,14 @@ class Query(object):
     def resolve_tuitionRule(self, info, **kwargs):
         return TuitionRule.objects.get(id=kwargs.get("tuitionRule_id"))
 
+    @cached_field()
     def resolve_tuitionRules(self, info, **kwargs):
-        return TuitionRule.objects.all()
+        return optimize_queryset(TuitionRule.objects.all(), info)
 
     def resolve_discount(self, info, **kwargs):
         return Discount.objects.get(id=kwargs.get("discount_id"))
 
+    @cached_field()
     def resolve_discounts(self, info, **kwargs):
         startDate = kwargs.get("start_date")
         endDate = kwargs.get("end_date")
@@ -298,7 +302,7 @@ class Query(object):
             discounts = discounts.filter(
                 start_date__gte=startDate, end_date__lte=endDate
             )
-        return discounts
+        return optimize_queryset(discounts, info)
 
     # def resolve_multiCourseDiscount(self, info, **kwargs):
     #     return MultiCourseDiscount.objects.get(id=kwargs.get("multiCourseDiscount_id"))
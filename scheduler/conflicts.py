@@ -0,0 +1,313 @@
+from contextlib import contextmanager
+from datetime import time, timedelta
+
+from django.db import IntegrityError, connection, transaction
+from graphql import GraphQLError
+from psycopg2.errorcodes import EXCLUSION_VIOLATION
+
+from account.models import InstructorAvailability, InstructorOutOfOffice
+from course.models import Course, CourseAvailability
+from scheduler.models import INSTRUCTOR_OVERLAP_CONSTRAINT, Session, session_period
+from scheduler.recurrence import expand_occurrences, localize
+
+
+UNAVAILABLE = "unavailable"
+SESSION = "session"
+OUT_OF_OFFICE = "out_of_office"
+
+
+class IntervalTree:
+    """
+    Static interval tree over (start, end, value) half open intervals. The
+    intervals sorted by start form an implicit balanced search tree where
+    each node keeps the latest end in its subtree, so a lookup only visits
+    subtrees that can overlap and runs in O(log n + matches)
+    """
+
+    def __init__(self, intervals):
+        self.intervals = sorted(intervals, key=lambda interval: interval[0])
+        self.max_end = [None] * len(self.intervals)
+        self._build(0, len(self.intervals))
+
+    def __len__(self):
+        return len(self.intervals)
+
+    def _build(self, low, high):
+        if low >= high:
+            return None
+        middle = (low + high) // 2
+        ends = [
+            end
+            for end in (
+                self.intervals[middle][1],
+                self._build(low, middle),
+                self._build(middle + 1, high),
+            )
+            if end is not None
+        ]
+        self.max_end[middle] = max(ends)
+        return self.max_end[middle]
+
+    def overlapping(self, start, end):
+        """
+        Intervals overlapping start to end, ordered by their start
+        """
+        found = []
+        self._search(0, len(self.intervals), start, end, found)
+        return found
+
+    def _search(self, low, high, start, end, found):
+        if low >= high:
+            return
+        middle = (low + high) // 2
+        if self.max_end[middle] <= start:
+            return
+        self._search(low, middle, start, end, found)
+        interval = self.intervals[middle]
+        # later nodes start after this one
+        if interval[0] < end:
+            if interval[1] > start:
+                found.append(interval)
+            self._search(middle + 1, high, start, end, found)
+
+
+class InstructorSchedule:
+    """
+    An instructor's sessions, course occurrences that have no session yet,
+    out of office periods and weekly availability from start_date to
+    end_date, loaded once and indexed in interval trees so any number of
+    proposed occurrences can be checked without further queries. Sessions
+    of exclude_course_id are left out so a course can be validated against
+    everything but itself
+    """
+
+    def __init__(self, instructor_id, start_date, end_date, exclude_course_id=None):
+        window_start = localize(start_date, time.min)
+        window_end = localize(end_date + timedelta(days=1), time.min)
+
+        # a probe of the exclusion constraint's GiST index
+        sessions = Session.objects.filter(
+            instructor=instructor_id,
+            period__overlap=session_period(window_start, window_end),
+        ).select_related("course")
+        availabilities = CourseAvailability.objects.filter(
+            course__instructor=instructor_id,
+            course__start_date__lte=end_date,
+            course__end_date__gte=start_date,
+            active=True,
+            materialized_until__lt=end_date,
+        ).select_related("course")
+        if exclude_course_id is not None:
+            sessions = sessions.exclude(course=exclude_course_id)
+            availabilities = availabilities.exclude(course=exclude_course_id)
+
+        busy = [
+            (session.start_datetime, session.end_datetime, session)
+            for session in sessions
+        ]
+        for availability in availabilities:
+            busy += [
+                (start_datetime, end_datetime, availability)
+                for _, start_datetime, end_datetime in expand_occurrences(
+                    availability.course,
+                    [availability],
+                    max(
+                        availability.materialized_until + timedelta(days=1), start_date
+                    ),
+                    end_date,
+                )
+            ]
+        self.busy = IntervalTree(busy)
+
+        self.out_of_office = IntervalTree(
+            (period.start_datetime, period.end_datetime, period)
+            for period in InstructorOutOfOffice.objects.filter(
+                instructor=instructor_id,
+                start_datetime__lt=window_end,
+                end_datetime__gt=window_start,
+            )
+        )
+
+        # weekly slots laid out on every day of the window
+        weekly = {}
+        for slot in InstructorAvailability.objects.filter(instructor=instructor_id):
+            weekly.setdefault(slot.day_of_week, []).append(slot)
+        available = []
+        day = start_date
+        while day <= end_date:
+            for slot in weekly.get(day.strftime("%A").lower(), ()):
+                available.append(
+                    (
+                        localize(day, slot.start_time),
+                        localize(day, slot.end_time),
+                        slot,
+                    )
+                )
+            day += timedelta(days=1)
+        self.available = IntervalTree(available)
+
+    def conflicts(self, start_datetime, end_datetime):
+        """
+        Every conflict of one proposed occurrence, as dicts with its kind,
+        times and reason
+        """
+        conflicts = []
+
+        def conflict(kind, reason, **related):
+            conflicts.append(
+                dict(
+                    kind=kind,
+                    start_datetime=start_datetime,
+                    end_datetime=end_datetime,
+                    reason=reason,
+                    **related,
+                )
+            )
+
+        if not any(
+            slot_start <= start_datetime and end_datetime <= slot_end
+            for slot_start, slot_end, _ in self.available.overlapping(
+                start_datetime, end_datetime
+            )
+        ):
+            conflict(
+                UNAVAILABLE,
+                "The instructor is not marked for being "
+                "available at this day of week and time.",
+            )
+
+        for _, _, busy in self.busy.overlapping(start_datetime, end_datetime):
+            course = busy.course
+            conflict(
+                SESSION,
+                f"The instructor is teaching a session for the following "
+                f'course at the selected time: "{course.title}"',
+                course_id=course.id,
+                session_id=busy.id if isinstance(busy, Session) else None,
+            )
+
+        for _, _, period in self.out_of_office.overlapping(
+            start_datetime, end_datetime
+        ):
+            conflict(
+                OUT_OF_OFFICE,
+                "The instructor is marked out of office at that time.",
+                out_of_office_id=period.id,
+            )
+        return conflicts
+
+    def validate(self, occurrences):
+        """
+        Conflicts of every (start_datetime, end_datetime) occurrence, in the
+        order of the occurrences
+        """
+        return [
+            conflict
+            for start_datetime, end_datetime in occurrences
+            for conflict in self.conflicts(start_datetime, end_datetime)
+        ]
+
+
+def validate_session_schedule(instructor_id, day, start_time, end_time):
+    """
+    Conflicts of a single session on day from start_time to end_time
+    """
+    schedule = InstructorSchedule(instructor_id, day, day)
+    return schedule.conflicts(localize(day, start_time), localize(day, end_time))
+
+
+def validate_course_schedule(
+    instructor_id, start_date, end_date, availabilities, course_id=None
+):
+    """
+    Conflicts of every occurrence of a proposed course from start_date to
+    end_date with the given availabilities, dicts of day_of_week,
+    start_time, end_time and optionally recurrence. Passing the course_id
+    of an existing course validates a change to it
+    """
+    course = Course(start_date=start_date, end_date=end_date)
+    occurrences = expand_occurrences(
+        course,
+        [
+            CourseAvailability(
+                day_of_week=availability["day_of_week"],
+                start_time=availability["start_time"],
+                end_time=availability["end_time"],
+                recurrence=availability.get("recurrence") or "",
+            )
+            for availability in availabilities
+        ],
+    )
+    if not occurrences:
+        return []
+    schedule = InstructorSchedule(
+        instructor_id, start_date, end_date, exclude_course_id=course_id
+    )
+    return schedule.validate(
+        (start_datetime, end_datetime)
+        for _, start_datetime, end_datetime in occurrences
+    )
+
+
+def schedule_validation(conflicts):
+    """
+    Validation result of a list of conflicts, the reason is the first one's
+    """
+    return {
+        "status": not conflicts,
+        "reason": conflicts[0]["reason"] if conflicts else None,
+        "conflicts": conflicts,
+    }
+
+
+def is_instructor_overlap(error):
+    """
+    Whether an IntegrityError violates the instructor overlap constraint
+    """
+    cause = error.__cause__
+    return (
+        getattr(cause, "pgcode", None) == EXCLUSION_VIOLATION
+        and cause.diag.constraint_name == INSTRUCTOR_OVERLAP_CONSTRAINT
+    )
+
+
+def _set_overlap_check(mode):
+    with connection.cursor() as cursor:
+        cursor.execute(f"SET CONSTRAINTS {INSTRUCTOR_OVERLAP_CONSTRAINT} {mode}")
+
+
+@contextmanager
+def deferred_overlap_check():
+    """
+    Checks the instructor overlap constraint when the block ends instead of
+    per row, so sessions can move past each other in one bulk update
+    """
+    try:
+        with transaction.atomic():
+            _set_overlap_check("DEFERRED")
+            yield
+            # raises here, inside the savepoint, if the result overlaps
+            _set_overlap_check("IMMEDIATE")
+    except Exception:
+        # a rolled back savepoint does not restore the constraint's mode
+        if connection.in_atomic_block and not connection.needs_rollback:
+            _set_overlap_check("IMMEDIATE")
+        raise
+
+
+@contextmanager
+def instructor_overlap_errors(failure):
+    """
+    Runs the block in a savepoint and turns a violation of the instructor
+    overlap constraint into a GraphQLError starting with failure, the
+    constraint holds even when concurrent requests pass validation
+    """
+    try:
+        with transaction.atomic():
+            yield
+    except IntegrityError as error:
+        if not is_instructor_overlap(error):
+            raise
+        raise GraphQLError(
+            f"{failure}. The instructor is already teaching a session at that time."
+        )
@@ -0,0 +1,15 @@
+import logging
+
+logging.basicConfig(
+    format="[%(asctime)s] %(levelname)s: %(message)s", level=logging.INFO
+)
+
+from scheduler.generation import materialize_sessions
+from scheduler.recurrence import materialization_horizon
+
+
+def run():
+    """Creates the sessions of every course up to the materialization horizon."""
+    until = materialization_horizon()
+    sessions = materialize_sessions(until)
+    logging.info(f"Materialized {len(sessions)} sessions through {until}")
@@ -0,0 +1,469 @@
+import logging
+from datetime import datetime, time, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+from graphql import GraphQLError
+
+from course.models import CourseAvailability, Enrollment
+from scheduler.conflicts import deferred_overlap_check, is_instructor_overlap
+from scheduler.models import Attendance, Session, SessionNote, session_period
+from scheduler.recurrence import (
+    expand_occurrences,
+    local_date,
+    local_today,
+    localize,
+    materialization_horizon,
+    unmaterialized_occurrences,
+)
+from search.models import SearchDocument
+
+
+logger = logging.getLogger(__name__)
+
+# sessions past their availability's materialized_until are listed with
+# an ID naming the occurrence until something creates them
+OCCURRENCE_ID = "occurrence:{availability}:{day}"
+# fields sessions copy from their course, a session edited on its own
+# keeps its value when the course's changes
+COURSE_FIELDS = ("instructor_id", "title", "is_confirmed")
+# kept sessions are brought in line with their course on regeneration
+SYNCED_FIELDS = (
+    "availability",
+    "start_datetime",
+    "end_datetime",
+    "instructor",
+    "title",
+    "is_confirmed",
+    "period",
+)
+
+
+def build_sessions(course, occurrences):
+    return [
+        Session(
+            course=course,
+            availability=availability,
+            start_datetime=start_datetime,
+            end_datetime=end_datetime,
+            instructor_id=course.instructor_id,
+            is_confirmed=course.is_confirmed,
+            title=course.title,
+        )
+        for availability, start_datetime, end_datetime in occurrences
+    ]
+
+
+def create_sessions(sessions):
+    """
+    Inserts sessions and an attendance for each enrollment of their
+    courses in bulk. Bulk inserts skip post_save, so this does what
+    create_session_attendances and the search and field cache signals
+    would have done
+    """
+    if not sessions:
+        return sessions
+
+    Session.objects.bulk_create(sessions, batch_size=1000)
+
+    enrollments = {}
+    for course_id, enrollment_id in Enrollment.objects.filter(
+        course__in={session.course_id for session in sessions}
+    ).values_list("course", "id"):
+        enrollments.setdefault(course_id, []).append(enrollment_id)
+    Attendance.objects.bulk_create(
+        [
+            Attendance(enrollment_id=enrollment_id, session=session)
+            for session in sessions
+            for enrollment_id in enrollments.get(session.course_id, ())
+        ],
+        batch_size=1000,
+    )
+
+    SearchDocument.objects.rebuild(
+        SearchDocument.SESSION_TYPE,
+        Session.objects.filter(pk__in=[session.pk for session in sessions]),
+    )
+    return sessions
+
+
+@transaction.atomic
+def generate_course_sessions(course, availabilities):
+    """
+    Creates the course's availabilities and its sessions up to the
+    materialization horizon in one transaction, and sets the num_sessions
+    of the course and each availability from all of their occurrences.
+    The course is left unsaved
+    """
+    until = materialization_horizon()
+    availabilities = [
+        CourseAvailability(course=course, materialized_until=until, **availability)
+        for availability in availabilities
+    ]
+    occurrences = expand_occurrences(course, availabilities)
+
+    # counted before inserting, sessions can only point at saved rows
+    for availability in availabilities:
+        availability.num_sessions = sum(
+            1 for occurrence in occurrences if occurrence[0] is availability
+        )
+    CourseAvailability.objects.bulk_create(availabilities)
+
+    create_sessions(
+        build_sessions(
+            course,
+            [
+                occurrence
+                for occurrence in occurrences
+                if local_date(occurrence[1]) <= until
+            ],
+        )
+    )
+    course.num_sessions = len(occurrences)
+    return availabilities
+
+
+@transaction.atomic
+def materialize_sessions(until, availabilities=None):
+    """
+    Creates the sessions of active availabilities that occur after their
+    materialized_until and through until, then moves their horizon there.
+    Defaults to every availability, pass a queryset to limit it to some
+    courses
+    """
+    if availabilities is None:
+        availabilities = CourseAvailability.objects.all()
+    # locked so concurrent callers cannot create the same sessions
+    availabilities = list(
+        availabilities.filter(
+            active=True,
+            materialized_until__lt=until,
+            course__end_date__gt=F("materialized_until"),
+        )
+        .select_related("course")
+        .select_for_update(of=("self",))
+    )
+
+    def build(course_availabilities):
+        return [
+            session
+            for availability in course_availabilities
+            for session in build_sessions(
+                availability.course,
+                expand_occurrences(
+                    availability.course,
+                    [availability],
+                    availability.materialized_until + timedelta(days=1),
+                    until,
+                ),
+            )
+        ]
+
+    try:
+        with transaction.atomic():
+            sessions = create_sessions(build(availabilities))
+        materialized = availabilities
+    except IntegrityError as error:
+        if not is_instructor_overlap(error):
+            raise
+        # a double booked course must not hold back the others
+        sessions = []
+        materialized = []
+        by_course = {}
+        for availability in availabilities:
+            by_course.setdefault(availability.course_id, []).append(availability)
+        for course_id, course_availabilities in by_course.items():
+            try:
+                with transaction.atomic():
+                    sessions += create_sessions(build(course_availabilities))
+                materialized += course_availabilities
+            except IntegrityError as error:
+                if not is_instructor_overlap(error):
+                    raise
+                logger.warning(
+                    f"Course {course_id} double books its instructor by {until}"
+                )
+
+    for availability in materialized:
+        availability.materialized_until = until
+    if materialized:
+        CourseAvailability.objects.bulk_update(materialized, ["materialized_until"])
+    return sessions
+
+
+def occurrence_id(session):
+    return OCCURRENCE_ID.format(
+        availability=session.availability_id, day=local_date(session.start_datetime)
+    )
+
+
+def unmaterialized_sessions(availabilities, start_datetime, end_datetime):
+    """
+    Unsaved sessions of the occurrences starting at or after start_datetime
+    and ending before end_datetime that the active availabilities have not
+    created yet, in chronological order. Nothing is written
+    """
+    start_date = local_date(start_datetime)
+    end_date = local_date(end_datetime)
+    sessions = []
+    for availability in availabilities.filter(
+        active=True,
+        materialized_until__lt=end_date,
+        course__end_date__gte=start_date,
+    ).select_related("course"):
+        occurrences = expand_occurrences(
+            availability.course,
+            [availability],
+            max(availability.materialized_until + timedelta(days=1), start_date),
+            end_date,
+        )
+        sessions += build_sessions(
+            availability.course,
+            [
+                occurrence
+                for occurrence in occurrences
+                if start_datetime <= occurrence[1] and occurrence[2] < end_datetime
+            ],
+        )
+    sessions.sort(key=lambda session: session.start_datetime)
+    return sessions
+
+
+def get_session(session_id):
+    """
+    The session with session_id, or an unsaved one if session_id names an
+    occurrence that has no session yet. Raises Session.DoesNotExist
+    """
+    if not str(session_id).startswith("occurrence:"):
+        return Session.objects.get(id=session_id)
+    try:
+        _, availability_id, day = session_id.split(":")
+        availability_id = int(availability_id)
+        day = datetime.strptime(day, "%Y-%m-%d").date()
+    except ValueError:
+        raise Session.DoesNotExist(f"Invalid occurrence {session_id}")
+
+    start_datetime = localize(day, time.min)
+    end_datetime = localize(day + timedelta(days=1), time.min)
+    session = Session.objects.filter(
+        availability=availability_id,
+        start_datetime__gte=start_datetime,
+        start_datetime__lt=end_datetime,
+    ).first()
+    if session is None:
+        session = next(
+            iter(
+                unmaterialized_sessions(
+                    CourseAvailability.objects.filter(pk=availability_id),
+                    start_datetime,
+                    end_datetime,
+                )
+            ),
+            None,
+        )
+    if session is None:
+        raise Session.DoesNotExist(f"No session on occurrence {session_id}")
+    return session
+
+
+def materialized_session_id(session_id, failure):
+    """
+    Primary key of the session with session_id. An occurrence that has no
+    session yet is created first, along with the earlier sessions of its
+    availability, so attendance, notes and edits always have a row. Raises
+    a GraphQLError starting with failure if there is no such session
+    """
+    if session_id is None:
+        return None
+    try:
+        session = get_session(session_id)
+    except Session.DoesNotExist:
+        raise GraphQLError(f"{failure}. Session {session_id} does not exist.")
+    if session.pk is None:
+        materialize_sessions(
+            local_date(session.start_datetime),
+            CourseAvailability.objects.filter(pk=session.availability_id),
+        )
+        # still unsaved if the course double books its instructor
+        session = get_session(session_id)
+        if session.pk is None:
+            raise GraphQLError(
+                f"{failure}. The instructor is already teaching a session at that time."
+            )
+    return session.pk
+
+
+def _match_availabilities(course, availabilities):
+    """
+    Returns the course's existing availabilities and the ones matching the
+    requested slots, creating slots the course never had
+    """
+    existing = list(CourseAvailability.objects.filter(course=course))
+    by_slot = {
+        (
+            availability.day_of_week,
+            availability.start_time,
+            availability.end_time,
+            availability.recurrence,
+        ): availability
+        for availability in existing
+    }
+    requested = []
+    created = []
+    for availability in availabilities:
+        slot = (
+            availability["day_of_week"],
+            availability["start_time"],
+            availability["end_time"],
+            availability.get("recurrence", ""),
+        )
+        if slot not in by_slot:
+            # moved to the horizon once its sessions exist
+            by_slot[slot] = CourseAvailability(
+                course=course, materialized_until=local_today(), **availability
+            )
+            created.append(by_slot[slot])
+        if by_slot[slot] not in requested:
+            requested.append(by_slot[slot])
+    CourseAvailability.objects.bulk_create(created)
+    return existing + created, requested
+
+
+@transaction.atomic
+def regenerate_course_sessions(course, availabilities, previous=None):
+    """
+    Brings the course's sessions from today through the materialization
+    horizon in line with the requested availabilities by writing only the
+    difference. Sessions that still occur keep their attendance and notes,
+    sessions of a changed slot are moved to the new slot on the same day,
+    the rest are deleted or inserted. Sessions that had previous's
+    instructor, title or confirmation take the course's, previous being
+    the course before its update. Raises a GraphQLError if a session to
+    delete has notes. Updates the num_sessions of the course and its
+    availabilities and returns the requested ones
+    """
+    previous = previous or course
+    all_availabilities, requested = _match_availabilities(course, availabilities)
+
+    today = local_today()
+    # sessions already created past the horizon, e.g. for a calendar, are
+    # kept in sync too
+    until = max(
+        [materialization_horizon()]
+        + [
+            availability.materialized_until or course.end_date or today
+            for availability in all_availabilities
+        ]
+    )
+    desired = {}
+    for occurrence in expand_occurrences(course, requested, today, until):
+        availability, start_datetime, _ = occurrence
+        desired[(availability.pk, start_datetime)] = occurrence
+
+    kept = []
+    stale = []
+    for session in Session.objects.filter(
+        course=course, start_datetime__gte=localize(today, datetime.min.time())
+    ):
+        occurrence = desired.pop(
+            (session.availability_id, session.start_datetime), None
+        )
+        if occurrence is None:
+            stale.append(session)
+        else:
+            kept.append((session, occurrence))
+
+    added_by_day = {}
+    for occurrence in sorted(desired.values(), key=lambda occurrence: occurrence[1]):
+        added_by_day.setdefault(local_date(occurrence[1]), []).append(occurrence)
+    removed = []
+    for session in stale:
+        same_day = added_by_day.get(local_date(session.start_datetime))
+        if same_day:
+            kept.append((session, same_day.pop(0)))
+        else:
+            removed.append(session)
+    added = sorted(
+        (occurrence for day in added_by_day.values() for occurrence in day),
+        key=lambda occurrence: occurrence[1],
+    )
+
+    if removed:
+        noted = sorted(
+            SessionNote.objects.filter(session__in=removed)
+            .values_list("session__start_datetime", flat=True)
+            .distinct()
+        )
+        if noted:
+            days = ", ".join(str(local_date(moment)) for moment in noted)
+            raise GraphQLError(
+                f"Failed course mutation. The sessions on {days} have notes, "
+                f"move or delete their notes before removing the sessions."
+            )
+
+    now = timezone.now()
+    changed = []
+    for session, (availability, start_datetime, end_datetime) in kept:
+        values = {
+            "availability_id": availability.pk,
+            "start_datetime": start_datetime,
+            "end_datetime": end_datetime,
+            # bulk updates skip the field's pre_save
+            "period": session_period(start_datetime, end_datetime),
+        }
+        for field in COURSE_FIELDS:
+            if getattr(session, field) == getattr(previous, field):
+                values[field] = getattr(course, field)
+        if any(getattr(session, field) != value for field, value in values.items()):
+            for field, value in values.items():
+                setattr(session, field, value)
+            session.updated_at = now
+            changed.append(session)
+
+    if removed:
+        Session.objects.filter(pk__in=[session.pk for session in removed]).delete()
+    if changed:
+        with deferred_overlap_check():
+            Session.objects.bulk_update(
+                changed, SYNCED_FIELDS + ("updated_at",), batch_size=1000
+            )
+        SearchDocument.objects.rebuild(
+            SearchDocument.SESSION_TYPE,
+            Session.objects.filter(pk__in=[session.pk for session in changed]),
+        )
+    create_sessions(build_sessions(course, added))
+
+    counts = dict(
+        Session.objects.filter(course=course)
+        .values_list("availability")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+    for availability in requested:
+        availability.materialized_until = until
+    for availability, _, _ in unmaterialized_occurrences(course, requested):
+        counts[availability.pk] = counts.get(availability.pk, 0) + 1
+    unused = []
+    for availability in all_availabilities:
+        availability.active = availability in requested
+        availability.num_sessions = counts.get(availability.pk, 0)
+        if not availability.active and not availability.num_sessions:
+            unused.append(availability)
+    if unused:
+        CourseAvailability.objects.filter(
+            pk__in=[availability.pk for availability in unused]
+        ).delete()
+    CourseAvailability.objects.bulk_update(
+        [
+            availability
+            for availability in all_availabilities
+            if availability not in unused
+        ],
+        ["active", "num_sessions", "materialized_until"],
+    )
+
+    course.num_sessions = sum(
+        availability.num_sessions for availability in all_availabilities
+    )
+    return requested
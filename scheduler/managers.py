@@ -1,13 +1,13 @@
 from django.db import models
 from dateutil.parser import parse
 from account.models import Student
-from course.models import Course
-from django.db.models import Q
+from course.models import Course, Enrollment
+from django.db.models import Exists, OuterRef, Q
 
 
 class SessionManager(models.Manager):
     def search(self, query=None, qs_initial=None):
-        if qs_initial is None or len(qs_initial) == 0:
+        if qs_initial is None:
             qs = self.get_queryset()
         else:
             qs = qs_initial
@@ -22,20 +22,16 @@ class SessionManager(models.Manager):
             except ValueError:
 
                 # filter by course instructor, enrollments, title
-                course_qs = Course.objects.search(query)
-                student_qs = set(
-                    Student.objects.search(query).values_list("user", flat=True)
+                course_match = Course.objects.search(query).filter(
+                    id=OuterRef("course")
                 )
-
-                session_courseID = set(qs.values_list("course__id", flat=True))
-                valid_courseID = []
-                for course_id in session_courseID:
-                    course = Course.objects.get(id=course_id)
-                    if course in course_qs:
-                        valid_courseID.append(course_id)
-                    elif not student_qs.isdisjoint(course.enrollment_list):
-                        valid_courseID.append(course_id)
-
-                qs = qs.filter(course__id__in=valid_courseID)
+                student_match = Enrollment.objects.filter(
+                    course=OuterRef("course"),
+                    student__in=Student.objects.search(query).values("user"),
+                )
+                qs = qs.annotate(
+                    course_match=Exists(course_match),
+                    student_match=Exists(student_match),
+                ).filter(Q(course_match=True) | Q(student_match=True))
 
         return qs
@@ -0,0 +1,56 @@
+# Generated by Django 2.2.28 on 2026-10-18 21:10
+
+from django.contrib.postgres.operations import BtreeGistExtension
+from django.db import migrations, models
+import scheduler.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduler', '0012_tutoringrequest'),
+    ]
+
+    operations = [
+        BtreeGistExtension(),
+        migrations.AddField(
+            model_name='session',
+            name='allow_overlap',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='session',
+            name='period',
+            field=scheduler.models.SessionPeriodField(editable=False, null=True),
+        ),
+        migrations.RunSQL(
+            "UPDATE scheduler_session "
+            "SET period = tstzrange(start_datetime, end_datetime);",
+            migrations.RunSQL.noop,
+        ),
+        # existing double bookings would keep the constraint from being created
+        migrations.RunSQL(
+            "UPDATE scheduler_session AS session SET allow_overlap = true "
+            "WHERE EXISTS (SELECT 1 FROM scheduler_session AS other "
+            "WHERE other.id <> session.id "
+            "AND other.instructor_id = session.instructor_id "
+            "AND other.period && session.period);",
+            migrations.RunSQL.noop,
+        ),
+        # the table cannot be altered while the updates' foreign key checks
+        # are still deferred
+        migrations.RunSQL("SET CONSTRAINTS ALL IMMEDIATE;", migrations.RunSQL.noop),
+        migrations.AlterField(
+            model_name='session',
+            name='period',
+            field=scheduler.models.SessionPeriodField(editable=False),
+        ),
+        migrations.RunSQL(
+            "ALTER TABLE scheduler_session "
+            "ADD CONSTRAINT scheduler_session_instructor_overlap "
+            "EXCLUDE USING gist (instructor_id WITH =, period WITH &&) "
+            "WHERE (NOT allow_overlap);",
+            "ALTER TABLE scheduler_session "
+            "DROP CONSTRAINT scheduler_session_instructor_overlap;",
+        ),
+    ]
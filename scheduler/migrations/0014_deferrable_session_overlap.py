@@ -0,0 +1,27 @@
+# Generated by Django 2.2.28 on 2026-10-19 10:05
+
+from django.db import migrations
+
+
+def overlap_constraint(deferrable):
+    return (
+        "ALTER TABLE scheduler_session "
+        "DROP CONSTRAINT scheduler_session_instructor_overlap, "
+        "ADD CONSTRAINT scheduler_session_instructor_overlap "
+        "EXCLUDE USING gist (instructor_id WITH =, period WITH &&) "
+        "WHERE (NOT allow_overlap)"
+        + (" DEFERRABLE INITIALLY IMMEDIATE;" if deferrable else ";")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduler', '0013_session_period'),
+    ]
+
+    # regeneration moves sessions past each other and checks the constraint
+    # once every row is written
+    operations = [
+        migrations.RunSQL(overlap_constraint(True), overlap_constraint(False)),
+    ]
@@ -1,11 +1,36 @@
-from django.db import models
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.fields import DateTimeRangeField
+from django.db import models
+from psycopg2.extras import DateTimeTZRange
 
 from account.models import Instructor, Student
 from course.models import Course, CourseAvailability, CourseCategory, Enrollment
 from scheduler.managers import SessionManager
 
 
+# instructors cannot teach overlapping sessions, the exclusion constraint
+# is created in migration 0013 since Django 2.2 cannot declare it
+INSTRUCTOR_OVERLAP_CONSTRAINT = "scheduler_session_instructor_overlap"
+
+
+def session_period(start_datetime, end_datetime):
+    return DateTimeTZRange(start_datetime, end_datetime)
+
+
+class SessionPeriodField(DateTimeRangeField):
+    """
+    tstzrange of its session's start and end, computed whenever the row is
+    saved or bulk created. Bulk updates have to set it themselves
+    """
+
+    def pre_save(self, model_instance, add):
+        value = session_period(
+            model_instance.start_datetime, model_instance.end_datetime
+        )
+        setattr(model_instance, self.attname, value)
+        return value
+
+
 class Session(models.Model):
     title = models.TextField(blank=True)
 
@@ -27,6 +52,9 @@ class Session(models.Model):
     )
     start_datetime = models.DateTimeField()
     end_datetime = models.DateTimeField()
+    period = SessionPeriodField(editable=False)
+    # sessions that overlapped before the constraint existed are exempt
+    allow_overlap = models.BooleanField(default=False)
     is_confirmed = models.BooleanField(default=False)
     sent_upcoming_reminder = models.BooleanField(default=False)
     sent_payment_reminder = models.BooleanField(default=False)
@@ -10,8 +10,15 @@ from comms.templates import (
     SCHEDULE_UPDATE_INSTRUCTOR_TEMPLATE,
     SCHEDULE_UPDATE_PARENT_TEMPLATE,
 )
+from scheduler.conflicts import instructor_overlap_errors
+from scheduler.generation import materialized_session_id
 from scheduler.models import Session, SessionNote, Attendance, TutoringRequest
-from scheduler.schema import SessionType, SessionNoteType, AttendanceType, TutoringRequestType
+from scheduler.schema import (
+    SessionType,
+    SessionNoteType,
+    AttendanceType,
+    TutoringRequestType,
+)
 
 from graphene import Boolean, DateTime, ID, String, Enum, Date, Time, Int
 from graphql_jwt.decorators import staff_member_required
@@ -41,9 +48,13 @@ class CreateSession(graphene.Mutation):
     @staticmethod
     @staff_member_required
     def mutate(root, info, **validated_data):
-        session, created = Session.objects.update_or_create(
-            id=validated_data.pop("session_id", None), defaults=validated_data
+        session_id = materialized_session_id(
+            validated_data.pop("session_id", None), "Failed session mutation"
         )
+        with instructor_overlap_errors("Failed session mutation"):
+            session, created = Session.objects.update_or_create(
+                id=session_id, defaults=validated_data
+            )
 
         # send email for updated schedule
         if not created and "start_datetime" in validated_data:
@@ -101,6 +112,10 @@ class CreateSessionNote(graphene.Mutation):
 
     @staticmethod
     def mutate(root, info, **validated_data):
+        if "session_id" in validated_data:
+            validated_data["session_id"] = materialized_session_id(
+                validated_data["session_id"], "Failed session note mutation"
+            )
         session_note, created = SessionNote.objects.update_or_create(
             id=validated_data.pop("note_id", None), defaults=validated_data
         )
@@ -127,14 +142,29 @@ class UpdateAttendance(graphene.Mutation):
     class Arguments:
         attendance_id = ID(name="id")
         status = AttendanceStatusEnum()
+        # attendances of sessions listed before they exist
+        session_id = ID(name="sessionId")
+        enrollment_id = ID(name="enrollmentId")
 
     attendance = graphene.Field(AttendanceType)
 
     @staticmethod
     def mutate(root, info, **validated_data):
-        attendance, created = Attendance.objects.update_or_create(
-            id=validated_data.pop("attendance_id", None), defaults=validated_data
-        )
+        attendance_id = validated_data.pop("attendance_id", None)
+        session_id = validated_data.pop("session_id", None)
+        enrollment_id = validated_data.pop("enrollment_id", None)
+        if attendance_id is None and session_id is not None:
+            attendance, created = Attendance.objects.update_or_create(
+                session_id=materialized_session_id(
+                    session_id, "Failed attendance mutation"
+                ),
+                enrollment_id=enrollment_id,
+                defaults=validated_data,
+            )
+        else:
+            attendance, created = Attendance.objects.update_or_create(
+                id=attendance_id, defaults=validated_data
+            )
         return UpdateAttendance(attendance=attendance)
 
 
@@ -169,4 +199,3 @@ class Mutation(graphene.ObjectType):
     delete_session_note = DeleteSessionNote.Field()
     update_attendance = UpdateAttendance.Field()
     create_tutoring_request = CreateTutoringRequest.Field()
-
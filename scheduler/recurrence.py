@@ -0,0 +1,115 @@
+from datetime import datetime, time, timedelta
+
+import arrow
+import pytz
+from dateutil import rrule
+from django.conf import settings
+from django.utils import timezone
+
+
+LOCAL_TIMEZONE = pytz.timezone("America/Los_Angeles")
+RRULE_WEEKDAYS = {
+    "monday": "MO",
+    "tuesday": "TU",
+    "wednesday": "WE",
+    "thursday": "TH",
+    "friday": "FR",
+    "saturday": "SA",
+    "sunday": "SU",
+}
+
+
+def localize(day, time):
+    return LOCAL_TIMEZONE.localize(datetime.combine(day, time)).astimezone(pytz.utc)
+
+
+def local_date(moment):
+    return moment.astimezone(LOCAL_TIMEZONE).date()
+
+
+def local_today():
+    return local_date(timezone.now())
+
+
+def materialization_horizon():
+    """
+    Last day sessions are created for ahead of time, later occurrences
+    only exist as recurrences until the horizon reaches them
+    """
+    return local_today() + timedelta(weeks=settings.SESSION_HORIZON_WEEKS)
+
+
+def validate_recurrence(recurrence):
+    """
+    Raises ValueError unless recurrence is a single RFC 5545 RRULE such as
+    FREQ=WEEKLY;INTERVAL=2, its start is always the course's start date
+    """
+    if not recurrence:
+        return
+    if "\n" in recurrence or "DTSTART" in recurrence.upper():
+        raise ValueError("Recurrence must be a single RRULE without DTSTART.")
+    rrule.rrulestr(recurrence, dtstart=datetime.combine(datetime.min, time.min))
+
+
+def recurrence_rule(availability, start_date):
+    """
+    The availability's recurrence starting on start_date, weekly on its
+    day of the week unless it has a rule of its own. Rules without BYDAY
+    fall on the availability's day of the week as well
+    """
+    recurrence = availability.recurrence or "FREQ=WEEKLY"
+    if availability.day_of_week and "BYDAY" not in recurrence.upper():
+        recurrence = f"{recurrence};BYDAY={RRULE_WEEKDAYS[availability.day_of_week]}"
+    return rrule.rrulestr(recurrence, dtstart=datetime.combine(start_date, time.min))
+
+
+def expand_occurrences(course, availabilities, start_date=None, end_date=None):
+    """
+    Returns (availability, start_datetime, end_datetime) for every
+    occurrence of the availabilities from start_date to end_date, both
+    inclusive and bounded by the course's dates, in chronological order
+    """
+    if not course.start_date or not course.end_date:
+        return []
+    # unsaved courses may still hold the datetimes they were created with
+    course_start = arrow.get(course.start_date).date()
+    course_end = arrow.get(course.end_date).date()
+    first_day = max(start_date or course_start, course_start)
+    last_day = min(end_date or course_end, course_end)
+
+    occurrences = []
+    for availability in availabilities:
+        rule = recurrence_rule(availability, course_start)
+        for moment in rule.between(
+            datetime.combine(first_day, time.min),
+            datetime.combine(last_day, time.min),
+            inc=True,
+        ):
+            occurrences.append(
+                (
+                    availability,
+                    localize(moment.date(), availability.start_time),
+                    localize(moment.date(), availability.end_time),
+                )
+            )
+    # stable, so simultaneous occurrences stay in availability order
+    occurrences.sort(key=lambda occurrence: occurrence[1])
+    return occurrences
+
+
+def unmaterialized_occurrences(course, availabilities):
+    """
+    Occurrences of the active availabilities past the day their sessions
+    were created through
+    """
+    occurrences = []
+    for availability in availabilities:
+        # slots without a horizon had every session created up front
+        if availability.active and availability.materialized_until:
+            occurrences += expand_occurrences(
+                course,
+                [availability],
+                availability.materialized_until + timedelta(days=1),
+            )
+    occurrences.sort(key=lambda occurrence: occurrence[1])
+    return occurrences
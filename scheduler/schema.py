@@ -6,6 +6,7 @@ import pytz
 from django.db.models import Q
 from graphene import Boolean, Field, ID, Int, List, String, DateTime
 from graphene_django.types import DjangoObjectType, ObjectType
+from graphql import GraphQLError
 from graphql_jwt.decorators import login_required
 
 from account.models import (
@@ -13,27 +14,57 @@ from account.models import (
     Instructor,
     Parent,
     Student,
-    InstructorAvailability,
-    InstructorOutOfOffice,
 )
 
-from course.models import Course, Enrollment
+from account.profiles import get_profile
+from course.models import Course, CourseAvailability, Enrollment
+from course.mutations import CourseAvailabilityInput
+from mainframe.optimizer import optimize_queryset
+from mainframe.pagination import bounded_list, connection_results
+from scheduler.conflicts import (
+    schedule_validation,
+    validate_course_schedule,
+    validate_session_schedule,
+)
+from scheduler.generation import get_session, occurrence_id, unmaterialized_sessions
 from scheduler.models import Session, SessionNote, Attendance, TutoringRequest
+from scheduler.recurrence import (
+    local_date,
+    materialization_horizon,
+    validate_recurrence,
+)
 
 
 class SessionType(DjangoObjectType):
     class Meta:
         model = Session
 
+    def resolve_id(self, info):
+        # occurrences the calendar lists before their session exists
+        if self.pk is None:
+            return occurrence_id(self)
+        return self.pk
+
 
 class SessionNoteType(DjangoObjectType):
     class Meta:
         model = SessionNote
 
 
+class ScheduleConflictType(ObjectType):
+    kind = String()
+    start_datetime = DateTime()
+    end_datetime = DateTime()
+    reason = String()
+    course_id = ID()
+    session_id = ID()
+    out_of_office_id = ID()
+
+
 class ValidateScheduleType(ObjectType):
     status = Boolean()
     reason = String()
+    conflicts = List(ScheduleConflictType)
 
 
 class AttendanceType(DjangoObjectType):
@@ -46,6 +77,43 @@ class TutoringRequestType(DjangoObjectType):
         model = TutoringRequest
 
 
+class SessionNoteResults(ObjectType):
+    results = List(SessionNoteType, required=True)
+    total = Int()
+    end_cursor = String()
+    has_next_page = Boolean()
+
+
+class AttendanceResults(ObjectType):
+    results = List(AttendanceType, required=True)
+    total = Int()
+    end_cursor = String()
+    has_next_page = Boolean()
+
+
+class TutoringRequestResults(ObjectType):
+    results = List(TutoringRequestType, required=True)
+    total = Int()
+    end_cursor = String()
+    has_next_page = Boolean()
+
+
+def filter_attendances(course_id=None):
+    queryset = Attendance.objects.all()
+    if course_id is not None:
+        queryset = queryset.filter(session__course=course_id)
+    return queryset
+
+
+def filter_tutoring_requests(student_id=None, instructor_id=None):
+    queryset = TutoringRequest.objects.all()
+    if student_id is not None:
+        queryset = queryset.filter(student=student_id)
+    if instructor_id is not None:
+        queryset = queryset.filter(instructor=instructor_id)
+    return queryset
+
+
 class Query(object):
     session = Field(SessionType, session_id=ID(required=True))
     sessions = List(
@@ -65,6 +133,21 @@ class Query(object):
     tutoring_request = Field(TutoringRequestType, tutoring_request_id=ID(required=True))
     tutoring_requests = List(TutoringRequestType, student_id=ID(), instructor_id=ID())
 
+    # keyset paginated variants of the lists above
+    session_notes_connection = Field(
+        SessionNoteResults, session_id=ID(required=True), first=Int(), after=String()
+    )
+    attendances_connection = Field(
+        AttendanceResults, course_id=ID(), first=Int(), after=String()
+    )
+    tutoring_requests_connection = Field(
+        TutoringRequestResults,
+        student_id=ID(),
+        instructor_id=ID(),
+        first=Int(),
+        after=String(),
+    )
+
     # Schedule validators
     validate_session_schedule = Field(
         ValidateScheduleType,
@@ -76,15 +159,17 @@ class Query(object):
     validate_course_schedule = Field(
         ValidateScheduleType,
         instructor_id=ID(required=True),
-        start_time=String(required=True),
-        end_time=String(required=True),
+        start_time=String(),
+        end_time=String(),
         start_date=String(required=True),
         end_date=String(required=True),
+        availabilities=List(CourseAvailabilityInput),
+        course_id=ID(),
     )
 
     @login_required
     def resolve_session(self, info, session_id):
-        return Session.objects.get(id=session_id)
+        return get_session(session_id)
 
     @login_required
     def resolve_sessions(
@@ -99,48 +184,57 @@ class Query(object):
         end_date=None,
     ):
         queryset = Session.objects.all()
+        # courses whose sessions in the window may not exist yet
+        availabilities = CourseAvailability.objects.all()
 
         if course_id is not None:
             queryset = queryset.filter(course=course_id)
+            availabilities = availabilities.filter(course=course_id)
+
+        profile = get_profile(user_id) if user_id is not None else None
 
         # instructor
-        if Instructor.objects.filter(user__id=user_id).exists():
+        if isinstance(profile, Instructor):
             queryset = queryset.filter(instructor=user_id)
+            availabilities = availabilities.filter(course__instructor=user_id)
 
         # student
-        if Student.objects.filter(user__id=user_id).exists():
-            # get all courses student is enrolled in
-            courses = [
-                enrollment.course
-                for enrollment in Enrollment.objects.filter(student=user_id)
-            ]
+        if isinstance(profile, Student):
             # filter sessions to only those of courses student is enrolled in
+            courses = Enrollment.objects.filter(student=user_id).values("course")
             queryset = queryset.filter(course__in=courses)
+            availabilities = availabilities.filter(course__in=courses)
 
         # parent
-        if Parent.objects.filter(user__id=user_id).exists():
-            parent = Parent.objects.get(user_id=user_id)
-            # get all courses children are enrolled in
-            courses = set()
-            for student_id in parent.student_list:
-                for enrollment in Enrollment.objects.filter(student=student_id):
-                    courses.add(enrollment.course)
+        if isinstance(profile, Parent):
             # filter sessions to only those of courses children are enrolled in
+            courses = Enrollment.objects.filter(
+                Q(student__primary_parent=user_id)
+                | Q(student__secondary_parent=user_id)
+            ).values("course")
             queryset = queryset.filter(course__in=courses)
+            availabilities = availabilities.filter(course__in=courses)
 
         if view_option == "class":
             queryset = queryset.filter(course__course_type=Course.CLASS)
+            availabilities = availabilities.filter(course__course_type=Course.CLASS)
         elif view_option == "tutoring":
             queryset = queryset.filter(
                 Q(course__course_type=Course.TUTORING)
                 | Q(course__course_type=Course.SMALL_GROUP)
             )
+            availabilities = availabilities.filter(
+                course__course_type__in=[Course.TUTORING, Course.SMALL_GROUP]
+            )
+
+        window_start = window_end = None
 
         now = datetime.now(tz=pytz.timezone("America/Los_Angeles"))
         base = now.replace(hour=0, minute=0, second=0, microsecond=0)
         if time_frame == "day":
             start_of_day = base + timedelta(days=time_shift)
             end_of_day = start_of_day + timedelta(days=1)
+            window_start, window_end = start_of_day, end_of_day
             queryset = queryset.filter(
                 start_datetime__gte=start_of_day, end_datetime__lt=end_of_day
             )
@@ -148,6 +242,7 @@ class Query(object):
             start_of_week = base - timedelta(days=(base.weekday() + 1) % 7)
             start_of_week += timedelta(days=7 * time_shift)
             end_of_week = start_of_week + timedelta(days=7)
+            window_start, window_end = start_of_week, end_of_week
             queryset = queryset.filter(
                 start_datetime__gte=start_of_week, end_datetime__lt=end_of_week
             )
@@ -160,6 +255,7 @@ class Query(object):
                 )
             else:
                 end_of_month = start_of_month.replace(month=start_of_month.month + 1)
+            window_start, window_end = start_of_month, end_of_month
             queryset = queryset.filter(
                 start_datetime__gte=start_of_month, end_datetime__lt=end_of_month
             )
@@ -169,8 +265,25 @@ class Query(object):
                 start_datetime__gte=arrow.get(start_date).datetime,
                 end_datetime__lt=arrow.get(end_date).datetime,
             )
-
-        queryset = queryset.order_by("start_datetime")
+            window_start = arrow.get(start_date).datetime
+            window_end = arrow.get(end_date).datetime
+
+        queryset = optimize_queryset(queryset.order_by("start_datetime"), info)
+
+        # occurrences past the horizon are listed without creating their
+        # sessions, mutations on them create the session
+        if (
+            window_end is not None
+            and local_date(window_end) >= materialization_horizon()
+        ):
+            occurrences = unmaterialized_sessions(
+                availabilities, window_start, window_end
+            )
+            if occurrences:
+                return sorted(
+                    list(queryset) + occurrences,
+                    key=lambda session: session.start_datetime,
+                )
         return queryset
 
     @login_required
@@ -186,127 +299,69 @@ class Query(object):
     def resolve_session_notes(self, info, **kwargs):
         session_id = kwargs.get("session_id")
 
-        return SessionNote.objects.filter(session_id=session_id)
+        return bounded_list(SessionNote.objects.filter(session_id=session_id), info)
 
     @login_required
-    def resolve_validate_session_schedule(
-        self, info, instructor_id, start_time, end_time, date
+    def resolve_session_notes_connection(
+        self, info, session_id, first=None, after=None
     ):
-        datetime_obj = datetime.strptime(date, "%Y-%m-%d")
-        day_of_week = calendar.day_name[datetime_obj.weekday()].lower()
-        start_datetime = datetime.combine(
-            datetime_obj.date(), datetime.strptime(start_time, "%H:%M").time()
-        )
-        end_datetime = datetime.combine(
-            datetime_obj.date(), datetime.strptime(end_time, "%H:%M").time()
-        )
-        start_datetime = (
-            pytz.timezone("America/Los_Angeles")
-            .localize(start_datetime)
-            .astimezone(pytz.utc)
-        )
-        end_datetime = (
-            pytz.timezone("America/Los_Angeles")
-            .localize(end_datetime)
-            .astimezone(pytz.utc)
-        )
-
-        # Check availabilities
-        instructor_availabilities = InstructorAvailability.objects.filter(
-            instructor=instructor_id,
-            day_of_week=day_of_week,
-            start_time__lte=start_time,
-            end_time__gte=end_time,
-        )
-
-        if not instructor_availabilities:
-            return {
-                "status": False,
-                "reason": "The instructor is not marked for being "
-                "available at this day of week and time.",
-            }
-
-        # Check conflicting sessions
-        sessions = Session.objects.filter(
-            Q(course__instructor=instructor_id),
-            (Q(start_datetime__gte=start_datetime) & Q(start_datetime__lt=end_datetime))
-            | (
-                Q(start_datetime__lte=start_datetime)
-                & Q(end_datetime__gt=start_datetime)
-            ),
+        return connection_results(
+            SessionNoteResults,
+            SessionNote.objects.filter(session_id=session_id),
+            info,
+            first,
+            after,
         )
 
-        if sessions:
-            return {
-                "status": False,
-                "reason": f"The instructor is teaching a session for the "
-                f"following course at the selected time: "
-                f'"{sessions[0].course.subject}"',
-            }
-
-        # Check out of office
-        out_of_office = InstructorOutOfOffice.objects.filter(
-            Q(instructor=instructor_id),
-            (Q(start_datetime__gte=start_datetime) & Q(start_datetime__lt=end_datetime))
-            | (
-                Q(start_datetime__lte=start_datetime)
-                & Q(end_datetime__gt=start_datetime)
-            ),
+    @login_required
+    def resolve_validate_session_schedule(
+        self, info, instructor_id, start_time, end_time, date
+    ):
+        conflicts = validate_session_schedule(
+            instructor_id,
+            datetime.strptime(date, "%Y-%m-%d").date(),
+            datetime.strptime(start_time, "%H:%M").time(),
+            datetime.strptime(end_time, "%H:%M").time(),
         )
-
-        if out_of_office:
-            return {
-                "status": False,
-                "reason": f"The instructor is marked out of office at that time.",
-            }
-
-        return {"status": True}
+        return schedule_validation(conflicts)
 
     @login_required
     def resolve_validate_course_schedule(
-        self, info, instructor_id, start_time, end_time, start_date, end_date
+        self,
+        info,
+        instructor_id,
+        start_date,
+        end_date,
+        start_time=None,
+        end_time=None,
+        availabilities=None,
+        course_id=None,
     ):
-        start_datetime_obj = datetime.strptime(start_date, "%Y-%m-%d")
-        day_of_week = calendar.day_name[start_datetime_obj.weekday()].lower()
-
-        # Check availabilities
-        instructor_availabilities = InstructorAvailability.objects.filter(
-            instructor=instructor_id,
-            day_of_week=day_of_week,
-            start_time__lte=start_time,
-            end_time__gte=end_time,
-        )
-
-        if not instructor_availabilities:
-            return {
-                "status": False,
-                "reason": "The instructor is not marked for being "
-                "available at this day of week and time.",
-            }
-
-        # Check conflicting courses
-        courses = Course.objects.filter(
-            Q(instructor=instructor_id),
-            Q(day_of_week=day_of_week),
-            (
-                Q(start_date__gte=start_date) & Q(start_date__lt=end_date)
-                | Q(start_date__lte=start_date) & Q(end_date__gt=start_date)
-            ),
-            (
-                Q(start_time__gte=start_time) & Q(start_time__lt=end_time)
-                | Q(start_time__lte=start_time) & Q(end_time__gt=start_time)
-            ),
+        start_date = datetime.strptime(start_date, "%Y-%m-%d").date()
+        end_date = datetime.strptime(end_date, "%Y-%m-%d").date()
+        if not availabilities:
+            if not start_time or not end_time:
+                raise GraphQLError(
+                    "Failed query. Provide availabilities or a start and end time."
+                )
+            # a weekly slot on the day the course starts
+            availabilities = [
+                {
+                    "day_of_week": calendar.day_name[start_date.weekday()].lower(),
+                    "start_time": datetime.strptime(start_time, "%H:%M").time(),
+                    "end_time": datetime.strptime(end_time, "%H:%M").time(),
+                }
+            ]
+        for availability in availabilities:
+            try:
+                validate_recurrence(availability.get("recurrence") or "")
+            except ValueError as error:
+                raise GraphQLError(f"Failed query. {error}")
+
+        conflicts = validate_course_schedule(
+            instructor_id, start_date, end_date, availabilities, course_id
         )
-
-        if courses:
-            return {
-                "status": False,
-                "reason": f"The instructor already is teaching the following "
-                f"course during those days and times: "
-                f'"{courses[0].subject}"',
-            }
-
-        return {"status": True}
+        return schedule_validation(conflicts)
 
     @login_required
     def resolve_attendance(self, info, attendance_id):
@@ -314,11 +369,15 @@ class Query(object):
 
     @login_required
     def resolve_attendances(self, info, course_id=None):
-        queryset = Attendance.objects.all()
-        if course_id is not None:
-            queryset = queryset.filter(session__course=course_id)
+        return bounded_list(filter_attendances(course_id), info)
 
-        return queryset
+    @login_required
+    def resolve_attendances_connection(
+        self, info, course_id=None, first=None, after=None
+    ):
+        return connection_results(
+            AttendanceResults, filter_attendances(course_id), info, first, after
+        )
 
     @login_required
     def resolve_tutoring_request(self, info, tutoring_request_id):
@@ -326,10 +385,16 @@ class Query(object):
 
     @login_required
     def resolve_tutoring_requests(self, info, student_id=None, instructor_id=None):
-        queryset = TutoringRequest.objects.all()
-        if student_id is not None:
-            queryset = queryset.filter(student=student_id)
-        if instructor_id is not None:
-            queryset = queryset.filter(instructor=instructor_id)
+        return bounded_list(filter_tutoring_requests(student_id, instructor_id), info)
 
-        return queryset
+    @login_required
+    def resolve_tutoring_requests_connection(
+        self, info, student_id=None, instructor_id=None, first=None, after=None
+    ):
+        return connection_results(
+            TutoringRequestResults,
+            filter_tutoring_requests(student_id, instructor_id),
+            info,
+            first,
+            after,
+        )
@@ -1,3 +1,737 @@
-from django.test import TestCase
+import random
+from datetime import date, datetime, time, timedelta
 
-# Create your tests here.
+from django.db import IntegrityError, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from graphql import GraphQLError
+
+from account.models import Admin, InstructorAvailability, InstructorOutOfOffice
+from course.models import Course, CourseAvailability
+from mainframe.testing import QueryBudgetTestCase
+from scheduler.conflicts import (
+    OUT_OF_OFFICE,
+    SESSION,
+    UNAVAILABLE,
+    IntervalTree,
+    instructor_overlap_errors,
+    validate_course_schedule,
+)
+from scheduler.generation import (
+    generate_course_sessions,
+    materialize_sessions,
+    regenerate_course_sessions,
+)
+from scheduler.models import Attendance, Session, SessionNote
+from scheduler.recurrence import (
+    LOCAL_TIMEZONE,
+    expand_occurrences,
+    local_date,
+    localize,
+    unmaterialized_occurrences,
+    validate_recurrence,
+)
+from search.benchmark import seed_tenants
+from search.models import SearchDocument
+
+SESSIONS_IN_WEEK = """
+query sessionsInWeek($timeShift: Int) {
+    sessions(timeFrame: "week", timeShift: $timeShift) {
+        id
+        startDatetime
+    }
+}
+"""
+SESSIONS_THIS_WEEK = """
+query {
+    sessions(timeFrame: "week") {
+        id
+        title
+        startDatetime
+        course { id title courseType }
+        instructor { user { id firstName lastName } }
+    }
+}
+"""
+
+
+def seed_this_week(courses):
+    return seed_tenants(
+        students=courses * 4,
+        parents=courses * 2,
+        instructors=2,
+        courses=courses,
+        sessions_per_course=1,
+        enrollments_per_course=4,
+        start_date=date.today(),
+    )[0]
+
+
+def next_monday():
+    today = date.today()
+    return today + timedelta(days=7 - today.weekday())
+
+
+def seed_course(weeks=4, start_date=None):
+    """
+    A course of one weekly session from 9 to 10 and its enrolled students,
+    taught by the only instructor of a new business
+    """
+    business_id = seed_tenants(
+        students=4,
+        parents=2,
+        instructors=1,
+        courses=1,
+        sessions_per_course=weeks,
+        enrollments_per_course=2,
+        start_date=start_date or next_monday(),
+    )[0]
+    return Course.objects.get(business=business_id)
+
+
+def unscheduled_course(weeks=4):
+    """
+    A seeded course without sessions or availabilities
+    """
+    course = seed_course(weeks)
+    Session.objects.filter(course=course).delete()
+    course.availability_list.delete()
+    return course
+
+
+def weekly(day_of_week, start, end):
+    return {"day_of_week": day_of_week, "start_time": start, "end_time": end}
+
+
+def monday(start, end):
+    return weekly("monday", start, end)
+
+
+class SessionQueryBudgetTest(QueryBudgetTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        business_id = seed_this_week(courses=3)
+        cls.owner = Admin.objects.get(business=business_id).user
+
+    def test_sessions_this_week(self):
+        data = self.assertOperationBudget(self.owner, SESSIONS_THIS_WEEK, 5)
+        self.assertEqual(len(data["sessions"]), 3)
+
+        seed_this_week(courses=12)
+        data = self.assertOperationBudget(self.owner, SESSIONS_THIS_WEEK, 5)
+        self.assertEqual(len(data["sessions"]), 15)
+
+
+class GenerateCourseSessionsTest(QueryBudgetTestCase):
+    def test_generates_sessions_in_bulk(self):
+        course = unscheduled_course(weeks=4)
+        with self.assertQueryBudget(12):
+            availabilities = generate_course_sessions(
+                course,
+                [monday(time(9), time(10)), weekly("wednesday", time(16), time(17))],
+            )
+
+        # five mondays through the end date and four wednesdays
+        self.assertEqual(course.num_sessions, 9)
+        self.assertEqual(
+            [availability.num_sessions for availability in availabilities], [5, 4]
+        )
+        sessions = Session.objects.filter(course=course)
+        self.assertEqual(len(sessions), 9)
+        for session in sessions:
+            self.assertEqual(session.instructor_id, course.instructor_id)
+            self.assertEqual(session.title, course.title)
+            self.assertEqual(
+                session.period.lower, session.start_datetime, session.period
+            )
+        self.assertEqual(
+            Attendance.objects.filter(session__course=course).count(),
+            9 * course.enrollment_set.count(),
+        )
+        self.assertEqual(
+            SearchDocument.objects.filter(
+                entity_type=SearchDocument.SESSION_TYPE,
+                object_id__in=[session.pk for session in sessions],
+            ).count(),
+            9,
+        )
+
+    def test_query_count_does_not_grow_with_sessions(self):
+        course = unscheduled_course(weeks=40)
+        with self.assertQueryBudget(12):
+            generate_course_sessions(
+                course,
+                [monday(time(9), time(10)), weekly("wednesday", time(16), time(17))],
+            )
+
+
+class RegenerateCourseSessionsTest(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.course = unscheduled_course(weeks=4)
+        generate_course_sessions(
+            self.course,
+            [monday(time(9), time(10)), weekly("wednesday", time(16), time(17))],
+        )
+        self.course.save()
+
+    def test_unchanged_schedule_writes_nothing(self):
+        before = dict(
+            Session.objects.filter(course=self.course).values_list("id", "updated_at")
+        )
+        with self.assertQueryBudget(6):
+            regenerate_course_sessions(
+                self.course,
+                [monday(time(9), time(10)), weekly("wednesday", time(16), time(17))],
+            )
+        after = dict(
+            Session.objects.filter(course=self.course).values_list("id", "updated_at")
+        )
+        self.assertEqual(before, after)
+
+    def test_moved_sessions_keep_attendance_and_notes(self):
+        session = Session.objects.filter(
+            course=self.course, availability__day_of_week="monday"
+        ).earliest("start_datetime")
+        Attendance.objects.filter(session=session).update(status=Attendance.PRESENT)
+        note = SessionNote.objects.create(
+            subject="Homework",
+            body="Chapter 3",
+            session=session,
+            poster=Admin.objects.get(business=self.course.business).user,
+        )
+
+        regenerate_course_sessions(
+            self.course,
+            [monday(time(13), time(14)), weekly("wednesday", time(16), time(17))],
+        )
+
+        session.refresh_from_db()
+        self.assertEqual(
+            session.start_datetime.astimezone(LOCAL_TIMEZONE).time(), time(13)
+        )
+        self.assertEqual(session.period.upper, session.end_datetime)
+        self.assertEqual(session.availability.start_time, time(13))
+        note.refresh_from_db()
+        self.assertEqual(note.session_id, session.pk)
+        self.assertEqual(
+            set(
+                Attendance.objects.filter(session=session).values_list(
+                    "status", flat=True
+                )
+            ),
+            {Attendance.PRESENT},
+        )
+        self.assertEqual(Session.objects.filter(course=self.course).count(), 9)
+
+    def test_removed_day_deletes_its_sessions(self):
+        availabilities = regenerate_course_sessions(
+            self.course, [monday(time(9), time(10))]
+        )
+
+        self.assertEqual(
+            list(
+                Session.objects.filter(course=self.course)
+                .values_list("availability__day_of_week", flat=True)
+                .distinct()
+            ),
+            ["monday"],
+        )
+        self.assertEqual(
+            [availability.num_sessions for availability in availabilities], [5]
+        )
+        self.assertEqual(self.course.num_sessions, 5)
+        # the wednesday slot had no sessions left to keep it
+        self.assertEqual(self.course.availability_list.count(), 1)
+
+    def test_removed_day_with_notes_fails(self):
+        session = Session.objects.filter(
+            course=self.course, availability__day_of_week="wednesday"
+        ).earliest("start_datetime")
+        SessionNote.objects.create(
+            subject="Homework",
+            body="Chapter 3",
+            session=session,
+            poster=Admin.objects.get(business=self.course.business).user,
+        )
+
+        with self.assertRaisesMessage(
+            GraphQLError, f"The sessions on {local_date(session.start_datetime)}"
+        ):
+            regenerate_course_sessions(self.course, [monday(time(9), time(10))])
+        self.assertTrue(Session.objects.filter(pk=session.pk).exists())
+
+    def test_course_changes_skip_edited_sessions(self):
+        previous = Course.objects.get(pk=self.course.pk)
+        sessions = Session.objects.filter(course=self.course).order_by("start_datetime")
+        edited = sessions[0]
+        edited.title = "Review"
+        edited.is_confirmed = not self.course.is_confirmed
+        edited.save()
+
+        self.course.title = "Renamed"
+        self.course.is_confirmed = not self.course.is_confirmed
+        self.course.save()
+        regenerate_course_sessions(
+            self.course,
+            [monday(time(9), time(10)), weekly("wednesday", time(16), time(17))],
+            previous,
+        )
+
+        edited.refresh_from_db()
+        self.assertEqual(edited.title, "Review")
+        self.assertEqual(
+            set(sessions.exclude(pk=edited.pk).values_list("title", "is_confirmed")),
+            {("Renamed", self.course.is_confirmed)},
+        )
+
+    def test_adjacent_sessions_shift_past_each_other(self):
+        course = seed_course()
+        regenerate_course_sessions(
+            course, [monday(time(9), time(10)), monday(time(10), time(11))]
+        )
+        self.assertEqual(Session.objects.filter(course=course).count(), 10)
+
+        # each moved session overlaps the other's old slot until both are written
+        regenerate_course_sessions(
+            course,
+            [monday(time(9, 30), time(10, 30)), monday(time(10, 30), time(11, 30))],
+        )
+        sessions = Session.objects.filter(course=course)
+        self.assertEqual(len(sessions), 10)
+        self.assertEqual(
+            {
+                session.start_datetime.astimezone(LOCAL_TIMEZONE).time()
+                for session in sessions
+            },
+            {time(9, 30), time(10, 30)},
+        )
+
+
+SESSION_BY_ID = """
+query ($id: ID!) {
+    session(sessionId: $id) {
+        id
+        startDatetime
+        attendanceSet { id }
+    }
+}
+"""
+CREATE_SESSION_NOTE = """
+mutation ($sessionId: ID!, $user: ID!) {
+    createSessionNote(sessionId: $sessionId, user: $user, subject: "Homework", body: "Chapter 3") {
+        sessionNote { session { id } }
+    }
+}
+"""
+UPDATE_ATTENDANCE = """
+mutation ($sessionId: ID!, $enrollmentId: ID!) {
+    updateAttendance(sessionId: $sessionId, enrollmentId: $enrollmentId, status: PRESENT) {
+        attendance { status session { id } }
+    }
+}
+"""
+
+
+class OccurrenceOnDemandTest(QueryBudgetTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.course = unscheduled_course(weeks=60)
+        (cls.availability,) = generate_course_sessions(
+            cls.course, [monday(time(10), time(11))]
+        )
+        cls.owner = Admin.objects.get(business=cls.course.business).user
+
+    def materialized_until(self):
+        return CourseAvailability.objects.get(
+            pk=self.availability.pk
+        ).materialized_until
+
+    def occurrence(self):
+        (session,) = self.graphql(self.owner, SESSIONS_IN_WEEK, {"timeShift": 20})[
+            "sessions"
+        ]
+        return session
+
+    def test_calendar_lists_occurrences_without_creating_them(self):
+        horizon = self.materialized_until()
+        sessions = Session.objects.filter(course=self.course).count()
+
+        occurrence = self.occurrence()
+        self.assertTrue(occurrence["id"].startswith("occurrence:"))
+        self.assertGreater(
+            datetime.fromisoformat(occurrence["startDatetime"]).date(), horizon
+        )
+        self.assertEqual(
+            self.graphql(self.owner, SESSION_BY_ID, occurrence)["session"][
+                "attendanceSet"
+            ],
+            [],
+        )
+        self.assertEqual(self.materialized_until(), horizon)
+        self.assertEqual(Session.objects.filter(course=self.course).count(), sessions)
+
+    def test_note_creates_the_session(self):
+        occurrence = self.occurrence()
+        data = self.graphql(
+            self.owner,
+            CREATE_SESSION_NOTE,
+            {"sessionId": occurrence["id"], "user": self.owner.id},
+        )
+
+        session = Session.objects.get(
+            pk=data["createSessionNote"]["sessionNote"]["session"]["id"]
+        )
+        self.assertEqual(
+            session.start_datetime.isoformat(), occurrence["startDatetime"]
+        )
+        self.assertEqual(self.materialized_until(), local_date(session.start_datetime))
+        self.assertEqual(session.attendance_set.count(), 2)
+        # the calendar now lists the session itself
+        self.assertEqual(self.occurrence()["id"], str(session.pk))
+
+    def test_attendance_creates_the_session(self):
+        occurrence = self.occurrence()
+        enrollment = self.course.enrollment_set.first()
+        data = self.graphql(
+            self.owner,
+            UPDATE_ATTENDANCE,
+            {"sessionId": occurrence["id"], "enrollmentId": enrollment.pk},
+        )["updateAttendance"]["attendance"]
+
+        self.assertEqual(data["status"], "PRESENT")
+        session = Session.objects.get(pk=data["session"]["id"])
+        self.assertEqual(
+            session.attendance_set.get(enrollment=enrollment).status,
+            Attendance.PRESENT,
+        )
+
+
+def occurrence_times(course, availabilities, start_date=None, end_date=None):
+    return [
+        start_datetime.astimezone(LOCAL_TIMEZONE).replace(tzinfo=None)
+        for _, start_datetime, _ in expand_occurrences(
+            course, availabilities, start_date, end_date
+        )
+    ]
+
+
+class RecurrenceTest(SimpleTestCase):
+    def setUp(self):
+        # daylight saving time starts on march 14
+        self.course = Course(start_date=date(2021, 3, 1), end_date=date(2021, 3, 29))
+
+    def availability(self, recurrence="", day_of_week="monday"):
+        return CourseAvailability(
+            day_of_week=day_of_week,
+            start_time=time(9),
+            end_time=time(10),
+            recurrence=recurrence,
+        )
+
+    def test_weekly_by_default(self):
+        self.assertEqual(
+            occurrence_times(self.course, [self.availability()]),
+            [datetime(2021, 3, day, 9) for day in (1, 8, 15, 22, 29)],
+        )
+
+    def test_local_time_is_kept_across_daylight_saving_time(self):
+        _, before, _ = expand_occurrences(self.course, [self.availability()])[1]
+        _, after, _ = expand_occurrences(self.course, [self.availability()])[2]
+        self.assertEqual(before.utcoffset(), timedelta(0))
+        self.assertEqual((before.hour, after.hour), (17, 16))
+
+    def test_interval(self):
+        self.assertEqual(
+            occurrence_times(
+                self.course, [self.availability("FREQ=WEEKLY;INTERVAL=2")]
+            ),
+            [datetime(2021, 3, day, 9) for day in (1, 15, 29)],
+        )
+
+    def test_rule_days_replace_the_day_of_week(self):
+        self.assertEqual(
+            occurrence_times(
+                self.course, [self.availability("FREQ=WEEKLY;BYDAY=TU,TH")]
+            )[:3],
+            [datetime(2021, 3, day, 9) for day in (2, 4, 9)],
+        )
+
+    def test_window_is_bounded_by_the_course(self):
+        self.assertEqual(
+            occurrence_times(
+                self.course,
+                [self.availability(), self.availability(day_of_week="wednesday")],
+                date(2021, 2, 1),
+                date(2021, 3, 8),
+            ),
+            [datetime(2021, 3, day, 9) for day in (1, 3, 8)],
+        )
+
+    def test_unmaterialized_occurrences(self):
+        availability = self.availability()
+        availability.materialized_until = date(2021, 3, 15)
+        inactive = self.availability(day_of_week="friday")
+        inactive.active = False
+        inactive.materialized_until = date(2021, 3, 1)
+        self.assertEqual(
+            [
+                start_datetime.astimezone(LOCAL_TIMEZONE).date()
+                for _, start_datetime, _ in unmaterialized_occurrences(
+                    self.course, [availability, inactive, self.availability()]
+                )
+            ],
+            [date(2021, 3, 22), date(2021, 3, 29)],
+        )
+
+    def test_validate_recurrence(self):
+        validate_recurrence("")
+        validate_recurrence("FREQ=MONTHLY;BYDAY=1MO")
+        for recurrence in (
+            "FREQ=SOMETIMES",
+            "DTSTART:20210101T000000\nRRULE:FREQ=WEEKLY",
+            "FREQ=WEEKLY;DTSTART=20210101",
+        ):
+            with self.assertRaises(ValueError, msg=recurrence):
+                validate_recurrence(recurrence)
+
+
+class MaterializeSessionsTest(TestCase):
+    def test_creates_sessions_through_until_once(self):
+        course = unscheduled_course(weeks=30)
+        (availability,) = generate_course_sessions(course, [monday(time(9), time(10))])
+        horizon = availability.materialized_until
+        created = Session.objects.filter(course=course).count()
+
+        until = horizon + timedelta(weeks=4)
+        sessions = materialize_sessions(until)
+        self.assertEqual(len(sessions), 4)
+        self.assertTrue(
+            all(
+                horizon < local_date(session.start_datetime) <= until
+                for session in sessions
+            )
+        )
+        self.assertEqual(
+            Attendance.objects.filter(session__in=sessions).count(),
+            4 * course.enrollment_set.count(),
+        )
+        availability.refresh_from_db()
+        self.assertEqual(availability.materialized_until, until)
+
+        self.assertEqual(materialize_sessions(until), [])
+        self.assertEqual(Session.objects.filter(course=course).count(), created + 4)
+
+    def test_stops_at_the_course_end(self):
+        course = unscheduled_course(weeks=30)
+        (availability,) = generate_course_sessions(course, [monday(time(9), time(10))])
+
+        materialize_sessions(course.end_date + timedelta(weeks=10))
+        self.assertEqual(Session.objects.filter(course=course).count(), 31)
+        # finished courses are no longer picked up
+        self.assertEqual(
+            materialize_sessions(course.end_date + timedelta(weeks=20)), []
+        )
+
+
+class IntervalTreeTest(SimpleTestCase):
+    def test_matches_a_linear_scan(self):
+        rng = random.Random(0)
+        intervals = []
+        for value in range(500):
+            start = rng.randrange(1000)
+            intervals.append((start, start + rng.randrange(1, 50), value))
+        tree = IntervalTree(intervals)
+
+        for _ in range(500):
+            start = rng.randrange(-50, 1050)
+            end = start + rng.randrange(1, 100)
+            self.assertEqual(
+                sorted(value for _, _, value in tree.overlapping(start, end)),
+                sorted(
+                    value
+                    for interval_start, interval_end, value in intervals
+                    if interval_start < end and interval_end > start
+                ),
+            )
+
+    def test_touching_intervals_do_not_overlap(self):
+        tree = IntervalTree([(0, 10, "a"), (10, 20, "b")])
+        self.assertEqual(tree.overlapping(10, 20), [(10, 20, "b")])
+        self.assertEqual(IntervalTree([]).overlapping(0, 10), [])
+
+
+class ValidateCourseScheduleTest(QueryBudgetTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # four sessions on mondays from 9 to 10
+        cls.course = seed_course(weeks=4)
+        cls.instructor_id = cls.course.instructor_id
+        cls.start = cls.course.start_date
+        InstructorAvailability.objects.create(
+            instructor_id=cls.instructor_id,
+            day_of_week="monday",
+            start_time=time(8),
+            end_time=time(12),
+        )
+        cls.out_of_office = InstructorOutOfOffice.objects.create(
+            instructor_id=cls.instructor_id,
+            start_datetime=localize(cls.start + timedelta(weeks=1), time(0)),
+            end_datetime=localize(cls.start + timedelta(weeks=1, days=1), time(0)),
+        )
+
+    def conflicts(self, availabilities, weeks=2, course_id=None):
+        return [
+            (local_date(conflict["start_datetime"]), conflict["kind"])
+            for conflict in validate_course_schedule(
+                self.instructor_id,
+                self.start,
+                self.start + timedelta(weeks=weeks),
+                availabilities,
+                course_id,
+            )
+        ]
+
+    def test_free_slot_has_no_conflicts(self):
+        self.assertEqual(
+            self.conflicts([monday(time(10), time(11))], weeks=0),
+            [],
+        )
+
+    def test_every_kind_of_conflict(self):
+        week = [self.start + timedelta(weeks=weeks) for weeks in range(3)]
+        self.assertEqual(
+            self.conflicts([monday(time(9, 30), time(10, 30))]),
+            [
+                (week[0], SESSION),
+                (week[1], SESSION),
+                (week[1], OUT_OF_OFFICE),
+                (week[2], SESSION),
+            ],
+        )
+        self.assertEqual(
+            self.conflicts([monday(time(11), time(13))], weeks=0),
+            [(week[0], UNAVAILABLE)],
+        )
+
+    def test_conflicts_name_what_they_overlap(self):
+        conflicts = validate_course_schedule(
+            self.instructor_id,
+            self.start,
+            self.start + timedelta(weeks=1),
+            [monday(time(9), time(10))],
+        )
+        session = Session.objects.filter(course=self.course).earliest("start_datetime")
+        self.assertEqual(conflicts[0]["session_id"], session.pk)
+        self.assertEqual(conflicts[0]["course_id"], self.course.pk)
+        self.assertIn(self.course.title, conflicts[0]["reason"])
+        self.assertEqual(conflicts[2]["out_of_office_id"], self.out_of_office.pk)
+
+    def test_course_is_not_checked_against_itself(self):
+        self.assertEqual(
+            self.conflicts(
+                [monday(time(9), time(10))], weeks=0, course_id=self.course.pk
+            ),
+            [],
+        )
+
+    def test_unmaterialized_occurrences_are_busy(self):
+        course = unscheduled_course(weeks=30)
+        course.instructor_id = self.instructor_id
+        (availability,) = generate_course_sessions(course, [monday(time(11), time(12))])
+        course.save()
+        day = availability.materialized_until + timedelta(
+            days=7 - availability.materialized_until.weekday()
+        )
+        conflicts = validate_course_schedule(
+            self.instructor_id, day, day, [monday(time(11), time(12))]
+        )
+        self.assertEqual(len(conflicts), 1)
+        self.assertEqual(conflicts[0]["course_id"], course.pk)
+        self.assertIsNone(conflicts[0]["session_id"])
+
+    def test_query_count_does_not_grow_with_weeks(self):
+        with self.assertQueryBudget(4):
+            conflicts = validate_course_schedule(
+                self.instructor_id,
+                self.start,
+                self.start + timedelta(weeks=40),
+                [
+                    monday(time(9, 30), time(10, 30)),
+                    weekly("friday", time(9), time(10)),
+                ],
+            )
+        # four sessions, the out of office monday and every friday
+        self.assertEqual(len(conflicts), 4 + 1 + 40)
+
+
+class InstructorOverlapTest(TestCase):
+    def setUp(self):
+        self.course = unscheduled_course(weeks=30)
+        (self.availability,) = generate_course_sessions(
+            self.course, [monday(time(9), time(10))]
+        )
+        self.course.save()
+
+    def double_book(self, weeks=0):
+        """
+        A course of the same instructor on mondays from 9:30 to 10:30,
+        starting weeks after the first
+        """
+        course = unscheduled_course(weeks=4)
+        course.instructor_id = self.course.instructor_id
+        course.start_date = self.course.start_date + timedelta(weeks=weeks)
+        course.end_date = course.start_date + timedelta(weeks=4)
+        course.save()
+        return course
+
+    def test_regeneration_into_a_double_booking_fails(self):
+        other = self.double_book()
+        generate_course_sessions(other, [monday(time(11), time(12))])
+
+        with self.assertRaisesMessage(GraphQLError, "Failed course mutation."):
+            with instructor_overlap_errors("Failed course mutation"):
+                regenerate_course_sessions(other, [monday(time(9, 30), time(10, 30))])
+        self.assertEqual(
+            set(
+                Session.objects.filter(course=other).values_list(
+                    "availability__start_time", flat=True
+                )
+            ),
+            {time(11)},
+        )
+
+        # the check is immediate again for the rest of the transaction
+        session = Session.objects.filter(course=other).earliest("start_datetime")
+        session.start_datetime -= timedelta(hours=1, minutes=30)
+        with self.assertRaises(IntegrityError):
+            with transaction.atomic():
+                session.save()
+
+    def test_materialization_skips_double_booked_courses(self):
+        horizon = self.availability.materialized_until
+        # both start past the horizon, so nothing is checked until then
+        other = self.double_book(weeks=20)
+        (other_availability,) = generate_course_sessions(
+            other, [monday(time(9, 30), time(10, 30))]
+        )
+        free = unscheduled_course(weeks=30)
+        (free_availability,) = generate_course_sessions(
+            free, [monday(time(9), time(10))]
+        )
+
+        with self.assertLogs("scheduler.generation", "WARNING") as logs:
+            materialize_sessions(horizon + timedelta(weeks=12))
+        self.assertEqual(len(logs.output), 1)
+
+        materialized = {
+            availability.pk
+            for availability in CourseAvailability.objects.filter(
+                materialized_until=horizon + timedelta(weeks=12)
+            )
+        }
+        self.assertIn(free_availability.pk, materialized)
+        # the first of the double booked courses wins
+        self.assertEqual(
+            len(materialized & {self.availability.pk, other_availability.pk}), 1
+        )
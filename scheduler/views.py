@@ -10,9 +10,13 @@ from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from account.models import InstructorAvailability, InstructorOutOfOffice
 from course.models import Course
 from mainframe.permissions import ReadOnly, IsDev
+from scheduler.conflicts import (
+    schedule_validation,
+    validate_course_schedule,
+    validate_session_schedule,
+)
 from scheduler.models import Session
 from scheduler.serializers import SessionSerializer
 
@@ -29,24 +33,6 @@ class SessionScheduleValidation(APIView):
         start_time = request.query_params.get("start_time")
         end_time = request.query_params.get("end_time")
         date = request.query_params.get("date")
-        datetime_obj = datetime.strptime(date, "%Y-%m-%d")
-        day_of_week = calendar.day_name[datetime_obj.weekday()].lower()
-        start_datetime = datetime.combine(
-            datetime_obj.date(), datetime.strptime(start_time, "%H:%M").time()
-        )
-        end_datetime = datetime.combine(
-            datetime_obj.date(), datetime.strptime(end_time, "%H:%M").time()
-        )
-        start_datetime = (
-            pytz.timezone("America/Los_Angeles")
-            .localize(start_datetime)
-            .astimezone(pytz.utc)
-        )
-        end_datetime = (
-            pytz.timezone("America/Los_Angeles")
-            .localize(end_datetime)
-            .astimezone(pytz.utc)
-        )
 
         if not start_time or not end_time or not date:
             return Response(
@@ -56,70 +42,19 @@ class SessionScheduleValidation(APIView):
                 },
             )
 
-        # Check availabilities
-        instructor_availabilities = InstructorAvailability.objects.filter(
-            instructor=instructor_id,
-            day_of_week=day_of_week,
-            start_time__lte=start_time,
-            end_time__gte=end_time,
-        )
-
-        if not instructor_availabilities:
-            return Response(
-                {
-                    "status": False,
-                    "reason": "The instructor is not marked for being "
-                    "available at this day of week and time.",
-                }
-            )
-
-        # Check conflicting sessions
-        sessions = Session.objects.filter(
-            Q(course__instructor=instructor_id),
-            (Q(start_datetime__gte=start_datetime) & Q(start_datetime__lt=end_datetime))
-            | (
-                Q(start_datetime__lte=start_datetime)
-                & Q(end_datetime__gt=start_datetime)
-            ),
+        conflicts = validate_session_schedule(
+            instructor_id,
+            datetime.strptime(date, "%Y-%m-%d").date(),
+            datetime.strptime(start_time, "%H:%M").time(),
+            datetime.strptime(end_time, "%H:%M").time(),
         )
-
-        if sessions:
-            return Response(
-                {
-                    "status": False,
-                    "conflicting_session": sessions[0].id,
-                    "reason": f"The instructor is teaching a session for the "
-                    f"following course at the selected time: "
-                    f'"{sessions[0].course.subject}"',
-                }
-            )
-
-        # Check out of office
-        out_of_office = InstructorOutOfOffice.objects.filter(
-            Q(instructor=instructor_id),
-            (Q(start_datetime__gte=start_datetime) & Q(start_datetime__lt=end_datetime))
-            | (
-                Q(start_datetime__lte=start_datetime)
-                & Q(end_datetime__gt=start_datetime)
-            ),
-        )
-
-        if out_of_office:
-            return Response(
-                {
-                    "status": False,
-                    "conflicting_out_of_office_start": out_of_office[0].start_datetime,
-                    "conflicting_out_of_office_end": out_of_office[0].end_datetime,
-                    "reason": f"The instructor is marked out of office at that time.",
-                }
-            )
-
-        return Response({"status": True})
+        return Response(schedule_validation(conflicts))
 
 
 class CourseScheduleValidation(APIView):
     """
-    Validates to see if a course fits with instructor's availability
+    Validates to see if every weekly session of a course fits with
+    instructor's availability
     """
 
     authentication_classes = [TokenAuthentication]
@@ -130,8 +65,6 @@ class CourseScheduleValidation(APIView):
         end_time = request.query_params.get("end_time")
         start_date = request.query_params.get("start_date")
         end_date = request.query_params.get("end_date")
-        start_datetime_obj = datetime.strptime(start_date, "%Y-%m-%d")
-        day_of_week = calendar.day_name[start_datetime_obj.weekday()].lower()
 
         if not start_time or not end_time or not start_date or not end_date:
             return Response(
@@ -142,49 +75,21 @@ class CourseScheduleValidation(APIView):
                 },
             )
 
-        # Check availabilities
-        instructor_availabilities = InstructorAvailability.objects.filter(
-            instructor=instructor_id,
-            day_of_week=day_of_week,
-            start_time__lte=start_time,
-            end_time__gte=end_time,
-        )
-
-        if not instructor_availabilities:
-            return Response(
+        start_date = datetime.strptime(start_date, "%Y-%m-%d").date()
+        conflicts = validate_course_schedule(
+            instructor_id,
+            start_date,
+            datetime.strptime(end_date, "%Y-%m-%d").date(),
+            [
                 {
-                    "status": False,
-                    "reason": "The instructor is not marked for being "
-                    "available at this day of week and time.",
+                    "day_of_week": calendar.day_name[start_date.weekday()].lower(),
+                    "start_time": datetime.strptime(start_time, "%H:%M").time(),
+                    "end_time": datetime.strptime(end_time, "%H:%M").time(),
                 }
-            )
-
-        # Check conflicting courses
-        courses = Course.objects.filter(
-            Q(instructor=instructor_id),
-            Q(day_of_week=day_of_week),
-            (
-                Q(start_date__gte=start_date) & Q(start_date__lt=end_date)
-                | Q(start_date__lte=start_date) & Q(end_date__gt=start_date)
-            ),
-            (
-                Q(start_time__gte=start_time) & Q(start_time__lt=end_time)
-                | Q(start_time__lte=start_time) & Q(end_time__gt=start_time)
-            ),
+            ],
+            request.query_params.get("course_id"),
         )
-
-        if courses:
-            return Response(
-                {
-                    "status": False,
-                    "conflicting_course": courses[0].id,
-                    "reason": f"The instructor already is teaching the following "
-                    f"course during those days and times: "
-                    f'"{courses[0].subject}"',
-                }
-            )
-
-        return Response({"status": True})
+        return Response(schedule_validation(conflicts))
 
 
 class SessionViewSet(viewsets.ModelViewSet):
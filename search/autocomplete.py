@@ -0,0 +1,97 @@
+import threading
+
+from django.core.cache import cache
+from django.db.models import Q
+
+from account.profiles import get_profile
+from mainframe.cache import LRUCache
+from search.models import SearchDocument
+from search.scopes import accessible_account_types, visible_accounts
+
+
+# entries kept per business and how long a cached prefix stays fresh
+AUTOCOMPLETE_CACHE_SIZE = 512
+AUTOCOMPLETE_CACHE_TIMEOUT = 30
+AUTOCOMPLETE_DEFAULT_LIMIT = 10
+AUTOCOMPLETE_MAX_LIMIT = 50
+AUTOCOMPLETE_USER_CACHE_KEY = "autocomplete_user:{user_id}"
+# bounds how long a changed role or business takes to apply
+AUTOCOMPLETE_USER_CACHE_TIMEOUT = 5 * 60
+
+
+_business_caches = {}
+_business_caches_lock = threading.Lock()
+
+
+def get_business_cache(business_id):
+    with _business_caches_lock:
+        if business_id not in _business_caches:
+            _business_caches[business_id] = LRUCache(
+                AUTOCOMPLETE_CACHE_SIZE, AUTOCOMPLETE_CACHE_TIMEOUT
+            )
+        return _business_caches[business_id]
+
+
+def _get_user_profile(user_id):
+    """
+    Profile of the user, cached so typing does not look it up on every
+    keystroke. Users without a profile or business are not cached
+    """
+    key = AUTOCOMPLETE_USER_CACHE_KEY.format(user_id=user_id)
+    profile = cache.get(key)
+    if profile is None:
+        profile = get_profile(user_id)
+        if profile is not None and profile.business_id is not None:
+            cache.set(key, profile, AUTOCOMPLETE_USER_CACHE_TIMEOUT)
+    return profile
+
+
+def autocomplete(user_id, query, entity_types=None, limit=None):
+    """
+    Returns (object id, entity type, label) of the best prefix matches
+    among the documents the user may see, within the user's business
+    """
+    limit = min(limit or AUTOCOMPLETE_DEFAULT_LIMIT, AUTOCOMPLETE_MAX_LIMIT)
+    query = " ".join(query.lower().split())
+    if not query or limit < 1:
+        return []
+
+    profile = _get_user_profile(user_id)
+    # without a business there is no tenant to search within
+    if profile is None or profile.business_id is None:
+        return []
+    business_id = profile.business_id
+    allowed_types = accessible_account_types(profile) + [
+        SearchDocument.COURSE_TYPE,
+        SearchDocument.SESSION_TYPE,
+    ]
+    if entity_types is None:
+        entity_types = allowed_types
+    entity_types = sorted(set(entity_types) & set(allowed_types))
+    if not entity_types:
+        return []
+
+    scope = visible_accounts(profile)
+    restricted = any(entity_type in scope for entity_type in entity_types)
+
+    # users with a restricted scope get their own entries
+    business_cache = get_business_cache(business_id)
+    key = (query, tuple(entity_types), limit, user_id if restricted else None)
+    results = business_cache.get(key)
+    if results is not None:
+        return results
+
+    document_filter = Q()
+    for entity_type in entity_types:
+        type_filter = Q(entity_type=entity_type)
+        if entity_type in scope:
+            type_filter &= Q(object_id__in=scope[entity_type])
+        document_filter |= type_filter
+
+    results = list(
+        SearchDocument.objects.search(query, business_id=business_id)
+        .filter(document_filter)
+        .values_list("object_id", "entity_type", "title")[:limit]
+    )
+    business_cache.set(key, results)
+    return results
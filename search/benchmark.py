@@ -0,0 +1,437 @@
+import random
+import statistics
+import time
+import uuid
+from datetime import date, datetime, time as dtime, timedelta
+
+import pytz
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.backends.cache import SessionStore
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from account.models import Student, Parent, Instructor, Admin, School
+from course.models import Course, CourseAvailability, CourseCategory, Enrollment
+from onboarding.models import Business
+from scheduler.models import Session
+from search.models import SearchDocument
+
+
+# fmt: off
+FIRST_NAMES = [
+    "Aaron", "Alice", "Ben", "Carol", "Daniel", "Emma", "Frank", "Grace",
+    "Henry", "Isabel", "Jack", "Julia", "Kevin", "Laura", "Michael", "Nina",
+    "Oscar", "Paula", "Quinn", "Rachel", "Sam", "Tina", "Victor", "Wendy",
+]
+LAST_NAMES = [
+    "Anderson", "Brown", "Chen", "Davis", "Garcia", "Johnson", "Kim", "Lee",
+    "Lopez", "Martin", "Nguyen", "Patel", "Smith", "Taylor", "Wilson", "Young",
+]
+# fmt: on
+SUBJECTS = ["Algebra", "Biology", "Chemistry", "Geometry", "Physics", "Writing"]
+# (days after the start date, hour) of each weekly course slot
+SLOTS = [(day, hour) for day in range(7) for hour in range(9, 17)]
+
+
+def _bulk_users(rng, prefix, count):
+    User = get_user_model()
+    users = [
+        User(
+            username=f"{prefix}-{i}",
+            email=f"{prefix}-{i}@example.com",
+            first_name=rng.choice(FIRST_NAMES),
+            last_name=rng.choice(LAST_NAMES),
+            password="!",
+        )
+        for i in range(count)
+    ]
+    return User.objects.bulk_create(users, batch_size=1000)
+
+
+@transaction.atomic
+def seed_tenants(
+    businesses=1,
+    students=500,
+    parents=250,
+    instructors=20,
+    courses=100,
+    sessions_per_course=12,
+    enrollments_per_course=8,
+    seed=0,
+    start_date=date(2021, 1, 4),
+):
+    """
+    Creates synthetic businesses with bulk inserts and builds their
+    search vectors and documents, returns the new business ids. Courses
+    start on start_date and meet weekly
+    """
+    rng = random.Random(seed)
+    run_id = uuid.uuid4().hex[:8]
+    tz = pytz.timezone("America/Los_Angeles")
+    school = School.objects.create(name="Benchmark High", zipcode="92612")
+    category = CourseCategory.objects.create(name="Benchmark")
+
+    business_ids = []
+    for b in range(businesses):
+        prefix = f"bench-{run_id}-{b}"
+        business = Business.objects.create(
+            name=f"Benchmark {run_id} {b}",
+            phone_number="9495550100",
+            email=f"{prefix}@example.com",
+            address=f"{b} Benchmark Way",
+        )
+        business_ids.append(business.id)
+
+        owner = _bulk_users(rng, f"{prefix}-owner", 1)[0]
+        Admin.objects.create(
+            user=owner,
+            account_type=Admin.ADMIN_TYPE,
+            admin_type=Admin.OWNER_TYPE,
+            business=business,
+        )
+
+        instructor_rows = Instructor.objects.bulk_create(
+            [
+                Instructor(
+                    user=user,
+                    account_type=Instructor.INSTRUCTOR_TYPE,
+                    business=business,
+                    city="Irvine",
+                    phone_number=f"949555{i:04d}",
+                )
+                for i, user in enumerate(
+                    _bulk_users(rng, f"{prefix}-instructor", instructors)
+                )
+            ]
+        )
+        parent_rows = Parent.objects.bulk_create(
+            [
+                Parent(
+                    user=user,
+                    account_type=Parent.PARENT_TYPE,
+                    business=business,
+                    address=f"{i} Main St",
+                    phone_number=f"714555{i:04d}",
+                )
+                for i, user in enumerate(_bulk_users(rng, f"{prefix}-parent", parents))
+            ],
+            batch_size=1000,
+        )
+        student_rows = Student.objects.bulk_create(
+            [
+                Student(
+                    user=user,
+                    account_type=Student.STUDENT_TYPE,
+                    business=business,
+                    grade=rng.randint(1, 12),
+                    school=school,
+                    primary_parent=rng.choice(parent_rows) if parent_rows else None,
+                )
+                for user in _bulk_users(rng, f"{prefix}-student", students)
+            ],
+            batch_size=1000,
+        )
+
+        # instructors teach one course per weekly slot so their sessions
+        # never overlap, courses past the last slot have no instructor
+        schedule = []
+        for i in range(courses):
+            slot = i // len(instructor_rows) if instructor_rows else len(SLOTS)
+            if slot < len(SLOTS):
+                schedule.append(
+                    (instructor_rows[i % len(instructor_rows)], SLOTS[slot])
+                )
+            else:
+                schedule.append((None, SLOTS[i % len(SLOTS)]))
+
+        course_rows = Course.objects.bulk_create(
+            [
+                Course(
+                    title=f"{rng.choice(SUBJECTS)} {i}",
+                    course_type=rng.choice(
+                        [Course.TUTORING, Course.SMALL_GROUP, Course.CLASS]
+                    ),
+                    instructor=instructor,
+                    business=business,
+                    course_category=category,
+                    max_capacity=rng.choice([1, 5, 10, 20]),
+                    start_date=start_date + timedelta(days=day),
+                    end_date=start_date
+                    + timedelta(days=day, weeks=sessions_per_course),
+                )
+                for i, (instructor, (day, _)) in enumerate(schedule)
+            ],
+            batch_size=1000,
+        )
+        availability_rows = CourseAvailability.objects.bulk_create(
+            [
+                CourseAvailability(
+                    course=course,
+                    day_of_week=course.start_date.strftime("%A").lower(),
+                    start_time=dtime(hour),
+                    end_time=dtime(hour + 1),
+                )
+                for course, (_, (_, hour)) in zip(course_rows, schedule)
+            ],
+            batch_size=1000,
+        )
+
+        Enrollment.objects.bulk_create(
+            [
+                Enrollment(student=student, course=course)
+                for course in course_rows
+                for student in rng.sample(
+                    student_rows, min(enrollments_per_course, len(student_rows))
+                )
+            ],
+            batch_size=1000,
+        )
+
+        sessions = []
+        for course, availability in zip(course_rows, availability_rows):
+            first_start = datetime.combine(course.start_date, availability.start_time)
+            for week in range(sessions_per_course):
+                start = tz.localize(first_start + timedelta(weeks=week))
+                sessions.append(
+                    Session(
+                        course=course,
+                        availability=availability,
+                        instructor=course.instructor,
+                        title=course.title,
+                        start_datetime=start,
+                        end_datetime=start + timedelta(hours=1),
+                    )
+                )
+        Session.objects.bulk_create(sessions, batch_size=1000)
+
+        # bulk inserts skip the signals that keep search data in sync
+        for model in (Student, Parent, Instructor, Admin):
+            model.objects.update_search_vector(business=business)
+        for entity_type, source_qs in (
+            (SearchDocument.STUDENT_TYPE, Student.objects.filter(business=business)),
+            (SearchDocument.PARENT_TYPE, Parent.objects.filter(business=business)),
+            (
+                SearchDocument.INSTRUCTOR_TYPE,
+                Instructor.objects.filter(business=business),
+            ),
+            (SearchDocument.ADMIN_TYPE, Admin.objects.filter(business=business)),
+            (SearchDocument.COURSE_TYPE, Course.objects.filter(business=business)),
+            (
+                SearchDocument.SESSION_TYPE,
+                Session.objects.filter(course__business=business),
+            ),
+        ):
+            SearchDocument.objects.rebuild(entity_type, source_qs)
+
+    return business_ids
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def measure(run, iterations):
+    """
+    Runs the callable once to warm up and then `iterations` times, returns
+    (query count, p50 ms, p95 ms, None) or (None, None, None, error) once a
+    run raises
+    """
+    try:
+        run()
+        timings = []
+        for _ in range(iterations):
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                run()
+                timings.append((time.perf_counter() - start) * 1000)
+    except Exception as error:
+        return None, None, None, f"{type(error).__name__}: {error}"
+    return len(queries), percentile(timings, 0.5), percentile(timings, 0.95), None
+
+
+def _graphql_runner(user, query, variables):
+    from mainframe.schema import schema
+
+    request = RequestFactory().post("/graphql")
+    request.user = user
+
+    def run():
+        result = schema.execute(query, context_value=request, variables=variables)
+        if result.errors:
+            raise result.errors[0]
+
+    return run
+
+
+def _rest_runner(user, view, params):
+    factory = APIRequestFactory()
+
+    def run():
+        request = factory.get("/", params)
+        request.session = SessionStore()
+        force_authenticate(request, user=user)
+        response = view(request)
+        response.render()
+        if response.status_code >= 400:
+            raise Exception(f"status {response.status_code}")
+
+    return run
+
+
+ACCOUNT_SEARCH = """
+query ($query: String!, $sort: String) {
+    accountSearch(query: $query, sort: $sort, page: 1, pageSize: 20) {
+        total
+        results {
+            ... on StudentType { user { id firstName lastName } }
+            ... on ParentType { user { id firstName lastName } }
+            ... on InstructorType { user { id firstName lastName } }
+            ... on AdminType { user { id firstName lastName } }
+        }
+    }
+}
+"""
+COURSE_SEARCH = """
+query ($query: String!, $sort: String) {
+    courseSearch(query: $query, sort: $sort, page: 1, pageSize: 20) {
+        total
+        results { id title }
+    }
+}
+"""
+SESSION_SEARCH = """
+query ($query: String!, $sort: String) {
+    sessionSearch(query: $query, sort: $sort, page: 1, pageSize: 20) {
+        total
+        results { id title }
+    }
+}
+"""
+
+
+def benchmark_search(business_id, iterations=20, seed=0, exclude=()):
+    """
+    Times the search resolvers and REST views for the owner and an
+    instructor of the business, yields one result row per scenario.
+    Scenarios named in exclude are not run and their rows are marked
+    skipped, a failing scenario's row carries its error and no timings
+    """
+    from search.views import AccountsSearchView, CoursesSearchView, SessionsSearchView
+
+    rng = random.Random(seed)
+    owner = Admin.objects.filter(business=business_id).first().user
+    instructor = Instructor.objects.filter(business=business_id).first()
+    users = [("owner", owner)]
+    if instructor is not None:
+        users.append(("instructor", instructor.user))
+
+    names = [rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES), rng.choice(FIRST_NAMES)]
+    account_queries = [" ".join(names[:count]) for count in (1, 2, 3)]
+    subject = rng.choice(SUBJECTS)
+    course_queries = [subject, f"{subject} {rng.randint(0, 9)}"]
+
+    scenarios = []
+    for role, user in users:
+        for query in account_queries:
+            for sort in (None, "alphaAsc", "idDesc", "updateDesc"):
+                scenarios.append(
+                    (
+                        f"accountSearch/{role}",
+                        query,
+                        sort,
+                        _graphql_runner(
+                            user, ACCOUNT_SEARCH, {"query": query, "sort": sort}
+                        ),
+                    )
+                )
+        for query in course_queries:
+            for sort in (None, "dateAsc"):
+                scenarios.append(
+                    (
+                        f"courseSearch/{role}",
+                        query,
+                        sort,
+                        _graphql_runner(
+                            user, COURSE_SEARCH, {"query": query, "sort": sort}
+                        ),
+                    )
+                )
+            for sort in (None, "timeAsc"):
+                scenarios.append(
+                    (
+                        f"sessionSearch/{role}",
+                        query,
+                        sort,
+                        _graphql_runner(
+                            user, SESSION_SEARCH, {"query": query, "sort": sort}
+                        ),
+                    )
+                )
+
+    for query in account_queries:
+        for sort in (None, "alphaAsc"):
+            params = {"query": query, "page": 1, "size": 20}
+            if sort:
+                params["sort"] = sort
+            scenarios.append(
+                (
+                    "rest:search/account",
+                    query,
+                    sort,
+                    _rest_runner(owner, AccountsSearchView.as_view(), params),
+                )
+            )
+    for query in course_queries:
+        params = {"query": query, "page": 1, "size": 20}
+        scenarios.append(
+            (
+                "rest:search/course",
+                query,
+                None,
+                _rest_runner(owner, CoursesSearchView.as_view(), params),
+            )
+        )
+        scenarios.append(
+            (
+                "rest:search/session",
+                query,
+                None,
+                _rest_runner(owner, SessionsSearchView.as_view(), params),
+            )
+        )
+
+    for name, query, sort, run in scenarios:
+        skipped = name in exclude
+        if skipped:
+            queries, p50, p95, error = None, None, None, None
+        else:
+            queries, p50, p95, error = measure(run, iterations)
+        yield {
+            "name": name,
+            "query": query,
+            "tokens": len(query.split()),
+            "sort": sort or "-",
+            "queries": queries,
+            "p50": p50,
+            "p95": p95,
+            "error": error,
+            "skipped": skipped,
+        }
+
+
+def summarize(rows):
+    return {
+        "scenarios": len(rows),
+        "errors": sum(1 for row in rows if row["error"]),
+        "skipped": sum(1 for row in rows if row["skipped"]),
+        "p95_max": max(
+            (row["p95"] for row in rows if row["p95"] is not None), default=0
+        ),
+        "p50_median": statistics.median(
+            [row["p50"] for row in rows if row["p50"] is not None] or [0]
+        ),
+    }
@@ -0,0 +1,104 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from onboarding.models import Business
+from search.benchmark import benchmark_search, seed_tenants, summarize
+
+
+class Command(BaseCommand):
+    help = """
+    Seeds synthetic businesses into the configured database and reports
+    query counts and p50/p95 latencies of the search resolvers and views.
+    Meant for a local Postgres, seeded data is not removed. Fails if any
+    scenario errors, known broken scenarios can be left out with --exclude.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("--businesses", type=int, default=1)
+        parser.add_argument("--students", type=int, default=500)
+        parser.add_argument("--parents", type=int, default=250)
+        parser.add_argument("--instructors", type=int, default=20)
+        parser.add_argument("--courses", type=int, default=100)
+        parser.add_argument("--sessions-per-course", type=int, default=12)
+        parser.add_argument("--enrollments-per-course", type=int, default=8)
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--exclude",
+            action="append",
+            default=[],
+            metavar="SCENARIO",
+            help="Skip a scenario by name, e.g. rest:search/session, repeatable",
+        )
+        parser.add_argument(
+            "--business-id",
+            type=int,
+            help="Benchmark an existing business instead of seeding new ones",
+        )
+
+    def handle(self, *args, **options):
+        if options["iterations"] < 1:
+            raise CommandError("--iterations must be positive")
+
+        if options["business_id"] is not None:
+            if not Business.objects.filter(id=options["business_id"]).exists():
+                raise CommandError(f"Business {options['business_id']} does not exist")
+            business_ids = [options["business_id"]]
+        else:
+            business_ids = seed_tenants(
+                businesses=options["businesses"],
+                students=options["students"],
+                parents=options["parents"],
+                instructors=options["instructors"],
+                courses=options["courses"],
+                sessions_per_course=options["sessions_per_course"],
+                enrollments_per_course=options["enrollments_per_course"],
+                seed=options["seed"],
+            )
+            self.stdout.write(f"Seeded businesses {business_ids}")
+
+        # every tenant shares the tables, so measuring one is representative
+        rows = list(
+            benchmark_search(
+                business_ids[-1],
+                iterations=options["iterations"],
+                seed=options["seed"],
+                exclude=set(options["exclude"]),
+            )
+        )
+        unknown = set(options["exclude"]) - {row["name"] for row in rows}
+        if unknown:
+            raise CommandError(f"Unknown scenarios {', '.join(sorted(unknown))}")
+
+        self.stdout.write(
+            f"{'scenario':<28}{'query':<26}{'sort':<12}"
+            f"{'queries':>8}{'p50 ms':>10}{'p95 ms':>10}"
+        )
+        for row in rows:
+            if row["skipped"]:
+                self.stdout.write(
+                    f"{row['name']:<28}{row['query']:<26}{row['sort']:<12}"
+                    + self.style.WARNING("  skipped")
+                )
+                continue
+            if row["error"]:
+                self.stdout.write(
+                    f"{row['name']:<28}{row['query']:<26}{row['sort']:<12}"
+                    + self.style.ERROR(f"  {row['error'][:80]}")
+                )
+                continue
+            self.stdout.write(
+                f"{row['name']:<28}{row['query']:<26}{row['sort']:<12}"
+                f"{row['queries']:>8}{row['p50']:>10.1f}{row['p95']:>10.1f}"
+            )
+
+        summary = summarize(rows)
+        line = (
+            f"{summary['scenarios']} scenarios, {summary['errors']} errors, "
+            f"{summary['skipped']} skipped, "
+            f"median p50 {summary['p50_median']:.1f} ms, "
+            f"worst p95 {summary['p95_max']:.1f} ms"
+        )
+        # timings of a run with failing scenarios are not comparable
+        if summary["errors"]:
+            raise CommandError(line)
+        self.stdout.write(self.style.SUCCESS(line))
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from search.managers import get_document_sources
+from search.models import SearchDocument
+
+
+class Command(BaseCommand):
+    help = """
+    Rebuilds the denormalized search documents of accounts, courses
+    and sessions from their source tables.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--entity-type",
+            action="append",
+            dest="entity_types",
+            choices=[choice[0] for choice in SearchDocument.ENTITY_TYPE_CHOICES],
+            help="Only rebuild documents of this type, may be repeated",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Number of source rows rebuilt per transaction",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size must be positive")
+
+        sources = get_document_sources()
+        entity_types = options["entity_types"] or list(sources)
+
+        for entity_type in entity_types:
+            model = sources[entity_type]["model"]
+            pks = list(model.objects.order_by("pk").values_list("pk", flat=True))
+
+            # drop documents whose source rows no longer exist
+            SearchDocument.objects.filter(entity_type=entity_type).exclude(
+                object_id__in=model.objects.values("pk")
+            ).delete()
+
+            for start in range(0, len(pks), batch_size):
+                batch = pks[start : start + batch_size]
+                SearchDocument.objects.rebuild(
+                    entity_type, model.objects.filter(pk__in=batch)
+                )
+
+            self.stdout.write(
+                self.style.SUCCESS(f"Rebuilt {len(pks)} {entity_type} documents")
+            )
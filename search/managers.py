@@ -0,0 +1,194 @@
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchRank
+from django.db import connection, models, transaction
+from django.db.models import F, FloatField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Cast, Coalesce, Concat, Greatest, Left
+
+from account.managers import (
+    StudentManager,
+    ParentManager,
+    InstructorManager,
+    AdminManager,
+    TrigramWordSimilarity,
+    build_search_query,
+    build_search_vector,
+)
+
+
+def _active_availability_days(course_ref):
+    from course.models import CourseAvailability
+
+    return Subquery(
+        CourseAvailability.objects.filter(course=OuterRef(course_ref), active=True)
+        .values("course")
+        .annotate(days=StringAgg("day_of_week", " "))
+        .values("days")
+    )
+
+
+ACCOUNT_TITLE = Concat("user__first_name", Value(" "), "user__last_name")
+
+
+def get_document_sources():
+    """
+    Maps each entity type to the model it is built from and the
+    expressions filling the document's columns
+    """
+    from account.models import Student, Parent, Instructor, Admin
+    from course.models import Course
+    from scheduler.models import Session
+
+    course_fields = (
+        ("title", "A"),
+        ("course_type", "C"),
+        ("description", "D"),
+        ("instructor__user__first_name", "B"),
+        ("instructor__user__last_name", "B"),
+        ("room", "C"),
+        ("course_category__name", "B"),
+        ("course_category__description", "D"),
+        (F("hourly_tuition"), "D"),
+        (_active_availability_days("pk"), "C"),
+    )
+
+    session_fields = (
+        ("title", "A"),
+        ("course__title", "A"),
+        ("course__course_type", "C"),
+        ("course__room", "C"),
+        ("course__course_category__name", "B"),
+        ("course__instructor__user__first_name", "B"),
+        ("course__instructor__user__last_name", "B"),
+    )
+
+    account_source = {
+        "title": ACCOUNT_TITLE,
+        "subtitle": F("user__email"),
+        "business": F("business_id"),
+    }
+    return {
+        "student": dict(
+            account_source, model=Student, fields=StudentManager.search_fields
+        ),
+        "parent": dict(
+            account_source, model=Parent, fields=ParentManager.search_fields
+        ),
+        "instructor": dict(
+            account_source, model=Instructor, fields=InstructorManager.search_fields
+        ),
+        "admin": dict(account_source, model=Admin, fields=AdminManager.search_fields),
+        "course": {
+            "model": Course,
+            "fields": course_fields,
+            "title": F("title"),
+            "subtitle": F("course_category__name"),
+            "business": F("business_id"),
+        },
+        "session": {
+            "model": Session,
+            "fields": session_fields,
+            "title": F("course__title"),
+            "subtitle": F("title"),
+            "business": F("course__business_id"),
+        },
+    }
+
+
+class SearchDocumentManager(models.Manager):
+    def search(self, query, entity_types=None, business_id=None):
+        qs = self.get_queryset()
+        if entity_types is not None:
+            qs = qs.filter(entity_type__in=entity_types)
+        if business_id is not None:
+            qs = qs.filter(business=business_id)
+
+        search_query = build_search_query(query)
+        if search_query is None:
+            return qs.none()
+        return (
+            qs.filter(search_vector=search_query)
+            # ts_rank returns a real, as double precision the rank survives a
+            # round trip through keyset cursors
+            .annotate(
+                rank=Cast(SearchRank(F("search_vector"), search_query), FloatField())
+            ).order_by("-rank", "entity_type", "object_id")
+        )
+
+    def fuzzy_search(self, query, entity_types=None, business_id=None):
+        """
+        Typo tolerant search over document titles and subtitles, every
+        token has to resemble a word of either one
+        """
+        qs = self.get_queryset()
+        if entity_types is not None:
+            qs = qs.filter(entity_type__in=entity_types)
+        if business_id is not None:
+            qs = qs.filter(business=business_id)
+
+        tokens = query.split() if query else []
+        if not tokens:
+            return qs.none()
+
+        similarity = Value(0.0, output_field=FloatField())
+        for token in tokens:
+            qs = qs.filter(
+                Q(title__trigram_word_similar=token)
+                | Q(subtitle__trigram_word_similar=token)
+            )
+            similarity += Greatest(
+                TrigramWordSimilarity("title", token),
+                TrigramWordSimilarity("subtitle", token),
+            )
+        return qs.annotate(similarity=similarity).order_by(
+            "-similarity", "entity_type", "object_id"
+        )
+
+    @transaction.atomic
+    def rebuild(self, entity_type, source_qs=None):
+        """
+        Upserts the documents of entity_type built from source_qs in one
+        INSERT ... SELECT, or every document of that type if no queryset is
+        given. Concurrent rebuilds of the same rows wait for each other on
+        the unique index instead of failing. Returns the number of rows
+        written
+        """
+        source = get_document_sources()[entity_type]
+        if source_qs is None:
+            source_qs = source["model"].objects.all()
+            self.filter(entity_type=entity_type).exclude(
+                object_id__in=source_qs.values("pk")
+            ).delete()
+
+        rows = source_qs.order_by().annotate(
+            document_id=F("pk"),
+            document_title=Left(Coalesce(source["title"], Value("")), 256),
+            document_subtitle=Left(Coalesce(source["subtitle"], Value("")), 256),
+            document_business=source["business"],
+            document_vector=build_search_vector(source["fields"]),
+            document_updated_at=F("updated_at"),
+        )
+        columns = (
+            "document_id",
+            "document_title",
+            "document_subtitle",
+            "document_business",
+            "document_vector",
+            "document_updated_at",
+        )
+        select, params = rows.values_list(*columns).query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {self.model._meta.db_table} (entity_type, object_id, "
+                "title, subtitle, business_id, search_vector, updated_at) "
+                f"SELECT %s, {', '.join(columns)} FROM ({select}) AS source "
+                "ON CONFLICT (entity_type, object_id) DO UPDATE SET "
+                "title = EXCLUDED.title, subtitle = EXCLUDED.subtitle, "
+                "business_id = EXCLUDED.business_id, "
+                "search_vector = EXCLUDED.search_vector, "
+                "updated_at = EXCLUDED.updated_at",
+                (entity_type, *params),
+            )
+            return cursor.rowcount
+
+    def remove(self, entity_type, object_ids):
+        return self.filter(entity_type=entity_type, object_id__in=object_ids).delete()
@@ -0,0 +1,96 @@
+# Generated by Django 2.2.28 on 2026-10-18 17:35
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("account", "0049_account_trigram_indexes"),
+        ("onboarding", "0003_business_stripe_account_id"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchDocument",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "entity_type",
+                    models.CharField(
+                        choices=[
+                            ("student", "Student"),
+                            ("parent", "Parent"),
+                            ("instructor", "Instructor"),
+                            ("admin", "Admin"),
+                            ("course", "Course"),
+                            ("session", "Session"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("object_id", models.IntegerField()),
+                ("title", models.CharField(max_length=256)),
+                ("subtitle", models.CharField(blank=True, max_length=256)),
+                (
+                    "search_vector",
+                    django.contrib.postgres.search.SearchVectorField(null=True),
+                ),
+                ("updated_at", models.DateTimeField(null=True)),
+                (
+                    "business",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="onboarding.Business",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="searchdocument",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="search_sear_search__b5d516_gin"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="searchdocument",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["title"],
+                name="search_document_title_trgm",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="searchdocument",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["subtitle"],
+                name="search_document_subtitle_trgm",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="searchdocument",
+            index=models.Index(
+                fields=["entity_type", "business"],
+                name="search_sear_entity__1cf409_idx",
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="searchdocument",
+            unique_together={("entity_type", "object_id")},
+        ),
+    ]
@@ -1,3 +1,175 @@
+from django.contrib.auth import get_user_model
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models import Q
 
-# Create your models here.
+from account.models import Student, Parent, Instructor, Admin
+from course.models import Course
+from onboarding.models import Business
+from scheduler.models import Session
+from search.managers import SearchDocumentManager
+
+
+class SearchDocument(models.Model):
+    """
+    Denormalized search entry for an account, course or session so that
+    every search endpoint can be answered by one indexed query
+    """
+
+    STUDENT_TYPE = "student"
+    PARENT_TYPE = "parent"
+    INSTRUCTOR_TYPE = "instructor"
+    ADMIN_TYPE = "admin"
+    COURSE_TYPE = "course"
+    SESSION_TYPE = "session"
+    ENTITY_TYPE_CHOICES = (
+        (STUDENT_TYPE, "Student"),
+        (PARENT_TYPE, "Parent"),
+        (INSTRUCTOR_TYPE, "Instructor"),
+        (ADMIN_TYPE, "Admin"),
+        (COURSE_TYPE, "Course"),
+        (SESSION_TYPE, "Session"),
+    )
+    ACCOUNT_TYPES = (STUDENT_TYPE, PARENT_TYPE, INSTRUCTOR_TYPE, ADMIN_TYPE)
+
+    entity_type = models.CharField(max_length=20, choices=ENTITY_TYPE_CHOICES)
+    # user id for accounts, primary key otherwise
+    object_id = models.IntegerField()
+    business = models.ForeignKey(Business, on_delete=models.CASCADE, null=True)
+
+    # Display
+    title = models.CharField(max_length=256)
+    subtitle = models.CharField(max_length=256, blank=True)
+
+    search_vector = SearchVectorField(null=True)
+
+    # Timestamps of the source entity
+    updated_at = models.DateTimeField(null=True)
+
+    objects = SearchDocumentManager()
+
+    class Meta:
+        unique_together = ("entity_type", "object_id")
+        indexes = [
+            GinIndex(fields=["search_vector"]),
+            GinIndex(
+                fields=["title"],
+                name="search_document_title_trgm",
+                opclasses=["gin_trgm_ops"],
+            ),
+            GinIndex(
+                fields=["subtitle"],
+                name="search_document_subtitle_trgm",
+                opclasses=["gin_trgm_ops"],
+            ),
+            models.Index(fields=["entity_type", "business"]),
+        ]
+
+
+ACCOUNT_MODEL_TYPES = {
+    Student: SearchDocument.STUDENT_TYPE,
+    Parent: SearchDocument.PARENT_TYPE,
+    Instructor: SearchDocument.INSTRUCTOR_TYPE,
+    Admin: SearchDocument.ADMIN_TYPE,
+}
+
+
+def sync_account_documents(user_id, account_models=tuple(ACCOUNT_MODEL_TYPES)):
+    documents = SearchDocument.objects
+    for model in account_models:
+        documents.rebuild(ACCOUNT_MODEL_TYPES[model], model.objects.filter(pk=user_id))
+
+    # names of related accounts are indexed on students, courses and sessions
+    if Parent in account_models:
+        documents.rebuild(
+            SearchDocument.STUDENT_TYPE,
+            Student.objects.filter(
+                Q(primary_parent=user_id) | Q(secondary_parent=user_id)
+            ),
+        )
+    if Instructor in account_models:
+        documents.rebuild(
+            SearchDocument.COURSE_TYPE, Course.objects.filter(instructor=user_id)
+        )
+        documents.rebuild(
+            SearchDocument.SESSION_TYPE,
+            Session.objects.filter(course__instructor=user_id),
+        )
+
+
+def sync_account_document(sender, instance, raw, **kwargs):
+    if raw:
+        return
+    sync_account_documents(instance.pk, account_models=(sender,))
+
+
+def sync_user_documents(sender, instance, raw, update_fields, **kwargs):
+    if raw:
+        return
+
+    # skip saves that cannot change searchable fields, e.g. last_login
+    searchable_fields = {"first_name", "last_name", "email"}
+    if update_fields is not None and searchable_fields.isdisjoint(update_fields):
+        return
+    sync_account_documents(instance.pk)
+
+
+def sync_course_documents(sender, instance, raw, **kwargs):
+    if raw:
+        return
+    SearchDocument.objects.rebuild(
+        SearchDocument.COURSE_TYPE, Course.objects.filter(pk=instance.pk)
+    )
+    SearchDocument.objects.rebuild(
+        SearchDocument.SESSION_TYPE, Session.objects.filter(course=instance.pk)
+    )
+
+
+def sync_session_document(sender, instance, raw, **kwargs):
+    if raw:
+        return
+    SearchDocument.objects.rebuild(
+        SearchDocument.SESSION_TYPE, Session.objects.filter(pk=instance.pk)
+    )
+
+
+def remove_document(sender, instance, **kwargs):
+    if sender in ACCOUNT_MODEL_TYPES:
+        entity_type = ACCOUNT_MODEL_TYPES[sender]
+    elif sender is Course:
+        entity_type = SearchDocument.COURSE_TYPE
+    else:
+        entity_type = SearchDocument.SESSION_TYPE
+    SearchDocument.objects.remove(entity_type, [instance.pk])
+
+
+for account_model in ACCOUNT_MODEL_TYPES:
+    models.signals.post_save.connect(
+        sync_account_document,
+        sender=account_model,
+        dispatch_uid=f"sync_{account_model.__name__.lower()}_document",
+    )
+
+models.signals.post_save.connect(
+    sync_user_documents,
+    sender=get_user_model(),
+    dispatch_uid="sync_user_documents",
+)
+models.signals.post_save.connect(
+    sync_course_documents,
+    sender=Course,
+    dispatch_uid="sync_course_documents",
+)
+models.signals.post_save.connect(
+    sync_session_document,
+    sender=Session,
+    dispatch_uid="sync_session_document",
+)
+
+for document_model in (*ACCOUNT_MODEL_TYPES, Course, Session):
+    models.signals.post_delete.connect(
+        remove_document,
+        sender=document_model,
+        dispatch_uid=f"remove_{document_model.__name__.lower()}_document",
+    )
@@ -1,12 +1,12 @@
 import graphene
-from graphene import Field, Int, List, String
+from graphene import Boolean, Field, ID, Int, List, String
 from graphene_django.types import DjangoObjectType
 from django.contrib.auth import get_user_model
+from django.db.models import Exists, OuterRef, Q
 from graphql_jwt.decorators import login_required
 
-from itertools import chain
-from operator import attrgetter
 from datetime import datetime
+from dateutil.parser import parse
 import pytz
 
 from account.schema import UserInfoType
@@ -16,45 +16,25 @@ from account.models import (
     Parent,
     Admin,
 )
-from account.managers import (
-    StudentManager,
-    InstructorManager,
-    ParentManager,
-    AdminManager,
-)
+from account.profiles import get_request_profile
 
 from course.models import Course, Enrollment
 from course.schema import CourseType
+from mainframe.pagination import keyset_paginate, paginate, selects_field
 
 from scheduler.models import Session
 from scheduler.schema import SessionType
 
-
-def paginate(results, page, size):
-    if page and size:
-        try:
-            size = int(size)
-            page = int(page)
-            total_len = len(results)
-            range_end = (
-                size * page
-            )  # max number of results that fit entirely within page size
-            if page > 0 and range_end - size < total_len:
-                results = results[
-                    range_end - size : total_len
-                    if total_len <= range_end
-                    else range_end
-                ]
-            else:
-                return []
-        except ValueError:
-            pass
-    return results
+from search.autocomplete import autocomplete
+from search.models import SearchDocument
+from search.scopes import accessible_account_types, visible_accounts
 
 
 class AccountSearchResults(graphene.ObjectType):
     results = List(UserInfoType, required=True)
     total = Int()
+    end_cursor = String()
+    has_next_page = Boolean()
 
 
 class CourseSearchResults(graphene.ObjectType):
@@ -67,15 +47,24 @@ class SessionSearchResults(graphene.ObjectType):
     total = Int()
 
 
+class AutocompleteResult(graphene.ObjectType):
+    id = ID()
+    type = String()
+    label = String()
+
+
 class Query(object):
     accountSearch = Field(
         AccountSearchResults,
         query=String(required=True),
         profile=String(),
         grade=Int(),
+        fuzzy=Boolean(),
         sort=String(),
         page=Int(),
         page_size=Int(),
+        first=Int(),
+        after=String(),
     )
 
     courseSearch = Field(
@@ -98,177 +87,165 @@ class Query(object):
         page_size=Int(),
     )
 
+    autocomplete = List(
+        AutocompleteResult,
+        query=String(required=True),
+        types=List(String),
+        limit=Int(),
+    )
+
+    @login_required
+    def resolve_autocomplete(self, info, query, **kwargs):
+        matches = autocomplete(
+            info.context.user.id, query, kwargs.get("types"), kwargs.get("limit")
+        )
+        return [
+            AutocompleteResult(id=object_id, type=entity_type, label=label)
+            for object_id, entity_type, label in matches
+        ]
+
     @login_required
     def resolve_accountSearch(self, info, **kwargs):
         # access control results based on user type
-        user_id = info.context.user.id
-
-        is_student = Student.objects.filter(user=user_id).exists()
-        is_instructor = Instructor.objects.filter(user=user_id).exists()
-        is_parent = Parent.objects.filter(user=user_id).exists()
-        if is_student:
-            profiles = ["ADMIN", "INSTRUCTOR", "PARENT"]
-        elif is_instructor:
-            profiles = ["ADMIN", "INSTRUCTOR", "PARENT", "STUDENT"]
-        elif is_parent:
-            profiles = ["ADMIN", "INSTRUCTOR", "STUDENT"]
-        else:  # admin
-            profiles = ["ADMIN", "PARENT", "INSTRUCTOR", "STUDENT"]
+        user_profile = get_request_profile(info.context)
+
+        profiles = [
+            account_type.upper()
+            for account_type in accessible_account_types(user_profile)
+        ]
 
         # query on profile filter if set else all account types
         profile = kwargs.get("profile", None)
         if profile in profiles:  # only use profile if accessible
             profiles = [profile]
 
-        # define filter param to django manager/object mappings
-        filterToSearch = {
-            "STUDENT": getattr(StudentManager, "search"),
-            "INSTRUCTOR": getattr(InstructorManager, "search"),
-            "PARENT": getattr(ParentManager, "search"),
-            "ADMIN": getattr(AdminManager, "search"),
-        }
+        # define filter param to django object mappings
         filterToModel = {
-            "STUDENT": Student.objects,
-            "INSTRUCTOR": Instructor.objects,
-            "PARENT": Parent.objects,
-            "ADMIN": Admin.objects,
+            "STUDENT": Student,
+            "INSTRUCTOR": Instructor,
+            "PARENT": Parent,
+            "ADMIN": Admin,
         }
-        # set results and query
-        results = Student.objects.none()
-        query = kwargs.get("query")
 
-        # iterate over account types to search
-        for profile in profiles:
-            profile_results = filterToModel[profile].none()
+        # account ids visible to instructors, parents and students
+        scope = visible_accounts(user_profile)
 
+        # restrict documents of every accessible account type
+        document_filter = Q()
+        for profile in profiles:
             # filter for ADMIN if profile is admin type
             admin_profile = None
             if profile.lower() in [t[0] for t in Admin.TYPE_CHOICES]:
                 admin_profile = profile.lower()
                 profile = "ADMIN"
 
-            for token in query.split():
-                if filterToSearch.get(profile):
-                    profile_results = filterToSearch[profile](
-                        filterToModel[profile], token, profile_results
-                    )
+            profile_filter = Q(entity_type=profile.lower())
 
             # filter for admin types
             if admin_profile is not None:
-                profile_results = profile_results.filter(admin_type=admin_profile)
+                profile_filter &= Q(
+                    object_id__in=Admin.objects.filter(admin_type=admin_profile).values(
+                        "user"
+                    )
+                )
 
             if profile == "STUDENT":
                 # filter for grade if STUDENT
                 try:
                     grade = int(kwargs.get("grade", None))
                     if 1 <= grade and grade <= 13:
-                        profile_results = profile_results.filter(grade=grade)
+                        profile_filter &= Q(
+                            object_id__in=Student.objects.filter(grade=grade).values(
+                                "user"
+                            )
+                        )
                 except:
                     pass
 
-                # students in instructor's courses
-                if is_instructor:
-                    courses = Course.objects.filter(instructor=user_id)
-                    student_ids = set()
-                    for course in courses:
-                        student_ids.update(course.enrollment_list)
-                    profile_results = profile_results.filter(user_id__in=student_ids)
-
-                # parent's students
-                if is_parent:
-                    parent = Parent.objects.get(user=user_id)
-                    profile_results = profile_results.filter(
-                        user_id__in=parent.student_list
-                    )
+            if profile.lower() in scope:
+                profile_filter &= Q(object_id__in=scope[profile.lower()])
 
-            # parent
-            if profile == "PARENT":
-                # parents of students in instructor's courses
-                if is_instructor:
-                    # find students
-                    courses = Course.objects.filter(instructor=user_id)
-                    student_ids = set()
-                    for course in courses:
-                        student_ids.update(course.enrollment_list)
-
-                    # students' parents
-                    parent_ids = set()
-                    for student_id in student_ids:
-                        student = Student.objects.get(user_id=student_id)
-                        if student.primary_parent:
-                            parent_ids.add(student.primary_parent.user.id)
-                        if student.secondary_parent:
-                            parent_ids.add(student.secondary_parent.user.id)
-                    profile_results = profile_results.filter(user_id__in=parent_ids)
-
-                # student's parents
-                if is_student:
-                    student = Student.objects.get(user=user_id)
-                    primary_parent_id = (
-                        None
-                        if not student.primary_parent
-                        else student.primary_parent.user.id
-                    )
-                    secondary_parent_id = (
-                        None
-                        if not student.secondary_parent
-                        else student.primary_parent.user.id
-                    )
-                    profile_results = profile_results.filter(
-                        user_id__in=[primary_parent_id, secondary_parent_id]
-                    )
+            document_filter |= profile_filter
 
-            results = chain(results, profile_results)
+        query = kwargs.get("query")
+        if kwargs.get("fuzzy", False):
+            documents = SearchDocument.objects.fuzzy_search(query)
+            ordering = ("-similarity", "entity_type", "object_id")
+        else:
+            documents = SearchDocument.objects.search(query)
+            ordering = ("-rank", "entity_type", "object_id")
+        documents = documents.filter(document_filter)
 
         # sort results
         sort = kwargs.get("sort", None)
         if sort is not None:
-            if sort == "alphaAsc":
-                results = sorted(
-                    results, key=attrgetter("user.first_name", "user.last_name")
-                )
-            elif sort == "alphaDesc":
-                results = sorted(
-                    results,
-                    key=attrgetter("user.first_name", "user.last_name"),
-                    reverse=True,
+            sortToParameter = {
+                "alphaAsc": ("title", "object_id"),
+                "alphaDesc": ("-title", "-object_id"),
+                "idAsc": ("object_id",),
+                "idDesc": ("-object_id",),
+                "updateAsc": ("updated_at", "object_id"),
+                "updateDesc": ("-updated_at", "-object_id"),
+            }
+            ordering = sortToParameter.get(sort, ordering)
+
+        total = None
+        if selects_field(info, "total"):
+            total = documents.count()
+
+        end_cursor = None
+        has_next_page = None
+        first = kwargs.get("first", None)
+        if first is not None:
+            documents, end_cursor, has_next_page = keyset_paginate(
+                documents.defer("search_vector"),
+                ordering,
+                first,
+                kwargs.get("after", None),
+            )
+            documents = [
+                (document.entity_type, document.object_id) for document in documents
+            ]
+        else:
+            documents = list(
+                paginate(
+                    documents.order_by(*ordering).values_list(
+                        "entity_type", "object_id"
+                    ),
+                    kwargs.get("page", None),
+                    kwargs.get("page_size", None),
                 )
-            elif sort == "idAsc":
-                results = sorted(results, key=lambda obj: obj.user.id)
-            elif sort == "idDesc":
-                results = sorted(results, key=lambda obj: obj.user.id, reverse=True)
-            elif sort == "updateAsc":
-                results = sorted(results, key=lambda obj: obj.updated_at)
-            elif sort == "updateDesc":
-                results = sorted(results, key=lambda obj: obj.updated_at, reverse=True)
-
-        results = list(results)
-        total = len(results)
-        results = paginate(
-            results, kwargs.get("page", None), kwargs.get("page_size", None)
+            )
+
+        # load the page's accounts, one query per account type
+        object_ids = {}
+        for entity_type, object_id in documents:
+            object_ids.setdefault(entity_type, []).append(object_id)
+        instances = {
+            entity_type: filterToModel[entity_type.upper()]
+            .objects.select_related("user")
+            .in_bulk(ids)
+            for entity_type, ids in object_ids.items()
+        }
+        results = [
+            instances[entity_type][object_id]
+            for entity_type, object_id in documents
+            if object_id in instances[entity_type]
+        ]
+
+        return AccountSearchResults(
+            results=results,
+            total=total,
+            end_cursor=end_cursor,
+            has_next_page=has_next_page,
         )
 
-        return AccountSearchResults(results=results, total=total)
-
     @login_required
     def resolve_courseSearch(self, info, **kwargs):
-        results = Course.objects.none()
-        query = kwargs.get("query")
-
-        for word in query.split():
-            dayOfWeekDic = {
-                "monday": "MON",
-                "tuesday": "TUE",
-                "wednesday": "WED",
-                "thursday": "THU",
-                "friday": "FRI",
-                "saturday": "SAT",
-                "sunday": "SUN",
-            }
-            # date check
-            if dayOfWeekDic.get(word.lower()):
-                word = dayOfWeekDic.get(word.lower())
-            results = Course.objects.search(word, results)
+        course_documents = SearchDocument.objects.search(
+            kwargs.get("query"), entity_types=[SearchDocument.COURSE_TYPE]
+        )
+        results = Course.objects.filter(id__in=course_documents.values("object_id"))
 
         # course filter
         course_type = kwargs.get("course_type", None)
@@ -280,31 +257,15 @@ class Query(object):
             if course_type == "class":
                 results = results.filter(max_capacity__gt=5)
 
-        # size filter
+        # size and availability filter
         course_size = kwargs.get("course_size", None)
         if course_size is not None:
             course_size = int(course_size)
-            course_ids = []
-            for course in results:
-                curr_size = len(Enrollment.objects.filter(course=course.id))
-                if curr_size <= course_size:
-                    course_ids.append(course.id)
-            results = Course.objects.filter(id__in=course_ids)
-
-        # availability filter
-        availability = kwargs.get("availability", None)
-        if availability is not None and (
-            availability == "open" or availability == "filled"
-        ):
-            # calculate availability
-            course_ids = []
-            for course in results:
-                capacity = len(Enrollment.objects.filter(course=course.id))
-                if availability == "open" and capacity < course.max_capacity:
-                    course_ids.append(course.id)
-                if availability == "filled" and capacity >= course.max_capacity:
-                    course_ids.append(course.id)
-            results = Course.objects.filter(id__in=course_ids)
+        results = Course.objects.enrollment_filter(
+            size=course_size,
+            availability=kwargs.get("availability", None),
+            qs_initial=results,
+        )
 
         # sort results
         sort = kwargs.get("sort", None)
@@ -332,8 +293,37 @@ class Query(object):
 
         query = kwargs.get("query", None)
         if query is not None:
+            text_words = []
             for word in query.split():
-                results = Session.objects.search(word, results)
+                try:
+                    # filter by session start date / time
+                    moment = parse(word)
+                    results = results.filter(
+                        Q(start_datetime__date=moment) | Q(start_datetime__time=moment)
+                    )
+                except ValueError:
+                    text_words.append(word)
+
+            # course and instructor names, or the names of enrolled students
+            if text_words:
+                text = " ".join(text_words)
+                session_documents = SearchDocument.objects.search(
+                    text, entity_types=[SearchDocument.SESSION_TYPE]
+                )
+                student_documents = SearchDocument.objects.search(
+                    text, entity_types=[SearchDocument.STUDENT_TYPE]
+                )
+                results = results.annotate(
+                    student_match=Exists(
+                        Enrollment.objects.filter(
+                            course=OuterRef("course"),
+                            student__in=student_documents.values("object_id"),
+                        )
+                    )
+                ).filter(
+                    Q(id__in=session_documents.values("object_id"))
+                    | Q(student_match=True)
+                )
 
         # time filter
         time = kwargs.get("time", None)
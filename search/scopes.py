@@ -0,0 +1,54 @@
+from django.db.models import Q
+
+from account.models import Student, Parent, Instructor
+
+
+def accessible_account_types(profile):
+    """
+    Account types the profile may search, students do not see other
+    students and parents do not see other parents
+    """
+    if isinstance(profile, Student):
+        return ["admin", "instructor", "parent"]
+    if isinstance(profile, Instructor):
+        return ["admin", "instructor", "parent", "student"]
+    if isinstance(profile, Parent):
+        return ["admin", "instructor", "student"]
+    # admin
+    return ["admin", "parent", "instructor", "student"]
+
+
+def _parents_of(students):
+    return Parent.objects.filter(
+        Q(user__in=students.values("primary_parent"))
+        | Q(user__in=students.values("secondary_parent"))
+    ).values("user")
+
+
+def visible_accounts(profile):
+    """
+    Maps each account type the profile may only partially see to a
+    subquery of the user ids it can see, types missing from the result are
+    unrestricted. The subqueries run inside the search query itself
+    """
+    scope = {}
+
+    # students in instructor's courses and their parents
+    if isinstance(profile, Instructor):
+        course_students = Student.objects.filter(
+            enrollment__course__instructor=profile.pk
+        )
+        scope["student"] = course_students.values("user")
+        scope["parent"] = _parents_of(course_students)
+
+    # parent's students
+    elif isinstance(profile, Parent):
+        scope["student"] = Student.objects.filter(
+            Q(primary_parent=profile.pk) | Q(secondary_parent=profile.pk)
+        ).values("user")
+
+    # student's parents
+    elif isinstance(profile, Student):
+        scope["parent"] = _parents_of(Student.objects.filter(user=profile.pk))
+
+    return scope
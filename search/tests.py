@@ -1,3 +1,188 @@
-from django.test import TestCase
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+
+from account.models import Admin, Instructor, Student
+from course.models import Course, Enrollment
+from mainframe.testing import QueryBudgetTestCase
+from search.autocomplete import autocomplete
+from search.benchmark import ACCOUNT_SEARCH, seed_tenants
+from search.models import SearchDocument
+
+
+class SearchQueryBudgetTest(QueryBudgetTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        business_id = seed_tenants(
+            students=40, parents=20, instructors=3, courses=6, sessions_per_course=2
+        )[0]
+        cls.owner = Admin.objects.get(business=business_id).user
+        cls.instructor = Instructor.objects.filter(business=business_id).first().user
+
+    def test_account_search(self):
+        variables = {"query": "a", "sort": "alphaAsc"}
+        for user in (self.owner, self.instructor):
+            data = self.assertOperationBudget(user, ACCOUNT_SEARCH, 12, variables)
+            self.assertLessEqual(len(data["accountSearch"]["results"]), 20)
+
+
+RENAME_INSTRUCTOR = """
+mutation ($id: ID!) {
+    createInstructor(user: {id: $id, firstName: "Zebulon"}, biography: "New") {
+        instructor { user { firstName } }
+    }
+}
+"""
+SESSION_SEARCH = """
+query ($query: String!) {
+    sessionSearch(query: $query) {
+        total
+        results { id }
+    }
+}
+"""
+
+
+class SearchDocumentSyncTest(QueryBudgetTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        business_id = seed_tenants(
+            students=4, parents=2, instructors=1, courses=1, sessions_per_course=2
+        )[0]
+        cls.owner = Admin.objects.get(business=business_id).user
+        cls.instructor = Instructor.objects.get(business=business_id)
+
+    def test_instructor_update_reindexes_documents(self):
+        self.graphql(self.owner, RENAME_INSTRUCTOR, {"id": self.instructor.pk})
+
+        self.assertTrue(
+            Instructor.objects.filter(
+                pk=self.instructor.pk, search_vector="zebulon"
+            ).exists()
+        )
+        course = Course.objects.get(instructor=self.instructor)
+        for entity_type, object_ids in (
+            (SearchDocument.INSTRUCTOR_TYPE, [self.instructor.pk]),
+            (SearchDocument.COURSE_TYPE, [course.pk]),
+            (SearchDocument.SESSION_TYPE, course.session_set.values("pk")),
+        ):
+            documents = SearchDocument.objects.filter(
+                entity_type=entity_type, object_id__in=object_ids
+            )
+            self.assertTrue(documents.exists())
+            self.assertEqual(
+                documents.count(), documents.filter(search_vector="zebulon").count()
+            )
+
+    def test_rebuild_updates_documents_in_place(self):
+        documents = SearchDocument.objects.filter(
+            entity_type=SearchDocument.INSTRUCTOR_TYPE, object_id=self.instructor.pk
+        )
+        (document_id,) = documents.values_list("id", flat=True)
+        get_user_model().objects.filter(pk=self.instructor.pk).update(
+            first_name="Zebulon"
+        )
+
+        SearchDocument.objects.rebuild(
+            SearchDocument.INSTRUCTOR_TYPE,
+            Instructor.objects.filter(pk=self.instructor.pk),
+        )
+        self.assertEqual(
+            list(documents.values_list("id", "title")),
+            [(document_id, f"Zebulon {self.instructor.user.last_name}")],
+        )
+
+    def test_sessions_match_enrolled_students(self):
+        student = Student.objects.filter(
+            enrollment__course__instructor=self.instructor
+        ).first()
+        student.user.first_name = "Quillon"
+        student.user.save()
+
+        data = self.graphql(self.owner, SESSION_SEARCH, {"query": "quillon"})
+        course = Course.objects.get(instructor=self.instructor)
+        self.assertEqual(
+            {int(session["id"]) for session in data["sessionSearch"]["results"]},
+            set(course.session_set.values_list("pk", flat=True)),
+        )
+
+
+class AutocompleteTest(QueryBudgetTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.business_id, other_business_id = seed_tenants(
+            businesses=2,
+            students=10,
+            parents=5,
+            instructors=2,
+            courses=4,
+            sessions_per_course=1,
+        )
+        cls.owner = Admin.objects.get(business=cls.business_id).user
+
+    def test_matches_stay_within_the_business(self):
+        matches = autocomplete(self.owner.id, "a", limit=50)
+        self.assertTrue(matches)
+        for object_id, entity_type, _ in matches:
+            document = SearchDocument.objects.get(
+                entity_type=entity_type, object_id=object_id
+            )
+            self.assertEqual(document.business_id, self.business_id)
+
+    def test_user_without_a_business_gets_nothing(self):
+        user = get_user_model().objects.create_user(username="visitor")
+        self.assertEqual(autocomplete(user.id, "a"), [])
+
+    def test_instructors_only_see_their_students(self):
+        instructor = Instructor.objects.filter(
+            business=self.business_id, course__enrollment__isnull=False
+        ).first()
+        enrolled, other = Student.objects.filter(
+            enrollment__course__instructor=instructor
+        ).distinct()[:2]
+        Enrollment.objects.filter(student=other, course__instructor=instructor).delete()
+        for student in (enrolled, other):
+            student.user.first_name = "Quillon"
+            student.user.save()
+
+        with self.assertQueryBudget(2):
+            matches = autocomplete(instructor.pk, "quillon", ["student"])
+        self.assertEqual([object_id for object_id, _, _ in matches], [enrolled.pk])
+
+
+class BenchmarkCommandTest(QueryBudgetTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.business_id = seed_tenants(
+            students=4, parents=2, instructors=1, courses=1, sessions_per_course=1
+        )[0]
+
+    def benchmark(self, *exclude):
+        args = [f"--exclude={name}" for name in exclude]
+        call_command(
+            "benchmark_search",
+            f"--business-id={self.business_id}",
+            "--iterations=1",
+            *args,
+            stdout=StringIO(),
+        )
+
+    def test_failing_scenarios_fail_the_command(self):
+        def broken(user, view, params):
+            def run():
+                raise Exception("status 500")
+
+            return run
+
+        with mock.patch("search.benchmark._rest_runner", broken):
+            with self.assertRaisesMessage(CommandError, "errors"):
+                self.benchmark()
+            self.benchmark(
+                "rest:search/account", "rest:search/course", "rest:search/session"
+            )
+
+    def test_unknown_exclusions_are_rejected(self):
+        with self.assertRaisesMessage(CommandError, "rest:search/missing"):
+            self.benchmark("rest:search/missing")
@@ -8,16 +8,12 @@ import pytz
 
 from account.models import (
     Student,
-    StudentManager,
     Instructor,
-    InstructorManager,
     Parent,
-    ParentManager,
     Admin,
-    AdminManager,
 )
 
-from course.models import Course, Enrollment
+from course.models import Course
 
 from scheduler.models import Session
 
@@ -47,12 +43,6 @@ class AccountsSearchView(generics.ListAPIView):
         # query with profile filter
         profileFilter = self.request.query_params.get("profile", None)
         if profileFilter is not None:
-            filterToSearch = {
-                "student": getattr(StudentManager, "search"),
-                "instructor": getattr(InstructorManager, "search"),
-                "parent": getattr(ParentManager, "search"),
-                "admin": getattr(AdminManager, "search"),
-            }
             filterToModel = {
                 "student": Student.objects,
                 "instructor": Instructor.objects,
@@ -60,11 +50,8 @@ class AccountsSearchView(generics.ListAPIView):
                 "admin": Admin.objects,
             }
 
-            for query in queries.split():
-                if filterToSearch.get(profileFilter):
-                    searchResults = filterToSearch[profileFilter](
-                        filterToModel[profileFilter], query, searchResults
-                    )
+            if filterToModel.get(profileFilter):
+                searchResults = filterToModel[profileFilter].search(queries)
 
             if profileFilter == "student":
                 try:
@@ -76,24 +63,11 @@ class AccountsSearchView(generics.ListAPIView):
 
         # query on all models
         else:
-            studentSearchResults = Student.objects.none()
-            parentSearchResults = Parent.objects.none()
-            instructorSearchResults = Instructor.objects.none()
-            adminSearchResults = Admin.objects.none()
-            for query in queries.split():
-                studentSearchResults = Student.objects.search(
-                    query, studentSearchResults
-                )
-                parentSearchResults = Parent.objects.search(query, parentSearchResults)
-                instructorSearchResults = Instructor.objects.search(
-                    query, instructorSearchResults
-                )
-                adminSearchResults = Admin.objects.search(query, adminSearchResults)
             searchResults = chain(
-                studentSearchResults,
-                parentSearchResults,
-                instructorSearchResults,
-                adminSearchResults,
+                Student.objects.search(queries),
+                Parent.objects.search(queries),
+                Instructor.objects.search(queries),
+                Admin.objects.search(queries),
             )
 
         # sort results
@@ -194,31 +168,15 @@ class CoursesSearchView(generics.ListAPIView):
             if courseFilter == "class":
                 searchResults = searchResults.filter(max_capacity__gt=5)
 
-        # size filter
+        # size and availability filter
         sizeFilter = self.request.query_params.get("size", None)
         if sizeFilter is not None:
-            size = int(sizeFilter)
-            course_ids = []
-            for course in searchResults:
-                curr_size = len(Enrollment.objects.filter(course=course.id))
-                if curr_size <= size:
-                    course_ids.append(course.id)
-            searchResults = Course.objects.filter(id__in=course_ids)
-
-        # availability filter
-        availabilityFilter = self.request.query_params.get("availability", None)
-        if availabilityFilter is not None and (
-            availabilityFilter == "open" or availabilityFilter == "filled"
-        ):
-            # calculate availability
-            course_ids = []
-            for course in searchResults:
-                capacity = len(Enrollment.objects.filter(course=course.id))
-                if availabilityFilter == "open" and capacity < course.max_capacity:
-                    course_ids.append(course.id)
-                if availabilityFilter == "filled" and capacity >= course.max_capacity:
-                    course_ids.append(course.id)
-            searchResults = Course.objects.filter(id__in=course_ids)
+            sizeFilter = int(sizeFilter)
+        searchResults = Course.objects.enrollment_filter(
+            size=sizeFilter,
+            availability=self.request.query_params.get("availability", None),
+            qs_initial=searchResults,
+        )
 
         # sort results
         sortFilter = self.request.query_params.get("sort", None)